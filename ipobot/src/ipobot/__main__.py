@@ -1,14 +1,43 @@
 
-import argparse, json
-from .pipeline import run_pipeline
+import argparse, json, sys
+from .pipeline import run_pipeline, warm_explainer
+from .data.replay import add_cli_args, apply_cli_args
 
 def main():
-    p = argparse.ArgumentParser(description="IPOBot CLI")
+    # `python -m ipobot batch ...` -> headless many-IPO mode
+    if sys.argv[1:2] == ["batch"]:
+        from .app.batch import main as batch_main
+        raise SystemExit(batch_main(sys.argv[2:]))
+    # `python -m ipobot serve ...` -> long-lived HTTP JSON service
+    if sys.argv[1:2] == ["serve"]:
+        from .app.server import main as serve_main
+        raise SystemExit(serve_main(sys.argv[2:]))
+    # `python -m ipobot schedule ...` -> pre-compute upcoming IPOs into the warm store
+    if sys.argv[1:2] == ["schedule"]:
+        from .app.scheduler import main as schedule_main
+        raise SystemExit(schedule_main(sys.argv[2:]))
+
+    p = argparse.ArgumentParser(description="IPOBot CLI (subcommands: batch, serve, schedule)")
     p.add_argument("--symbol", required=True, help="IPO symbol or ticker code")
     p.add_argument("--query", required=True, help="News search query")
+    p.add_argument("--budget-ms", type=float, default=None,
+                   help="End-to-end latency budget; unfinished stages come back marked partial")
+    p.add_argument("--drhp", default=None, metavar="PDF",
+                   help="DRHP PDF to fill fundamentals live providers lack (pre-listing IPOs)")
+    p.add_argument("--profile", nargs="?", const="profiles", default=None, metavar="DIR",
+                   help="Write folded stacks + per-stage allocation report to DIR (default: profiles/)")
+    p.add_argument("--profile-interval-ms", type=float, default=5.0, help="Stack sampling interval")
+    add_cli_args(p)
     args = p.parse_args()
+    apply_cli_args(args)
+    warm_explainer()  # one-shot process: a missing attribution table is built here, outside the budget
 
-    result = run_pipeline(args.symbol, args.query)
+    if args.profile:
+        from .profiling import profile_run
+        with profile_run(args.profile, tag=args.symbol, interval_ms=args.profile_interval_ms):
+            result = run_pipeline(args.symbol, args.query, budget_ms=args.budget_ms, drhp_path=args.drhp)
+    else:
+        result = run_pipeline(args.symbol, args.query, budget_ms=args.budget_ms, drhp_path=args.drhp)
     print(json.dumps(result, indent=2, ensure_ascii=False))
 
 if __name__ == "__main__":
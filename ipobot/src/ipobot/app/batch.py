@@ -0,0 +1,244 @@
+# src/ipobot/app/batch.py
+# Headless batch runner: many IPOs per process start, one JSON line per result.
+
+from __future__ import annotations
+
+import argparse, csv, io, json, sys, time
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+# ---------- input ----------
+def _row_from_dict(d: Dict) -> Optional[Dict]:
+    """Accept {'symbol'| 'name' | 'ipo_name', optional 'query'} with any key case."""
+    d = {str(k).strip().lower(): v for k, v in (d or {}).items() if k is not None}
+    symbol = (d.get("symbol") or "").strip() if isinstance(d.get("symbol"), str) else ""
+    name = (d.get("name") or d.get("ipo_name") or "")
+    name = name.strip() if isinstance(name, str) else ""
+    key = symbol or name
+    if not key:
+        return None
+    query = d.get("query")
+    query = query.strip() if isinstance(query, str) and query.strip() else f"{name or symbol} IPO latest news"
+    return {"input": key, "symbol": symbol or None, "name": name or None, "query": query}
+
+
+def read_rows(fh: Iterable[str], fmt: str = "auto") -> Iterator[Dict]:
+    """
+    Yield normalized rows from a CSV (with header), JSONL, or plain-text stream.
+    Plain text = one name or symbol per line. `fmt='auto'` sniffs the first non-blank line.
+    """
+    it = iter(fh)
+    first = None
+    for line in it:
+        if line.strip():
+            first = line
+            break
+    if first is None:
+        return
+
+    if fmt == "auto":
+        s = first.lstrip()
+        if s.startswith("{"):
+            fmt = "jsonl"
+        elif "," in s and any(h in s.lower() for h in ("symbol", "name")):
+            fmt = "csv"
+        else:
+            fmt = "text"
+
+    def _rest():
+        yield first
+        yield from it
+
+    if fmt == "jsonl":
+        for line in _rest():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = _row_from_dict(json.loads(line))
+            except Exception:
+                row = None
+            if row:
+                yield row
+    elif fmt == "csv":
+        for d in csv.DictReader(_rest()):
+            row = _row_from_dict(d)
+            if row:
+                yield row
+    else:
+        for line in _rest():
+            s = line.strip()
+            if s and not s.startswith("#"):
+                yield _row_from_dict({"name": s})
+
+
+def _row_key(inp: str, query: str) -> str:
+    """Resume/dedup key: the same symbol under a different query is a different row."""
+    return f"{inp}\x00{query}"
+
+
+def _done_keys(path: Optional[str]) -> Set[str]:
+    """
+    (input, query) keys with an ok row in an existing JSONL output (for resume). Failed rows
+    are run again and their newer line wins, as with dataset checkpoints.
+    """
+    done: Set[str] = set()
+    if not path:
+        return done
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    continue  # tolerate a truncated last line from an interrupted run
+                if rec.get("input") and rec.get("ok"):
+                    done.add(_row_key(rec["input"], rec.get("query") or ""))
+    except FileNotFoundError:
+        pass
+    return done
+
+# ---------- runner ----------
+def _pipeline_item(row: Dict) -> Dict:
+    """Map a batch row onto an iter_pipeline item (symbols are used as-is, names get resolved)."""
+    if row.get("symbol"):
+        return {"symbol": row["symbol"], "query": row["query"], "symbol_is_final": True, "input": row["input"]}
+    return {"name": row["name"], "query": row["query"], "input": row["input"]}
+
+
+def run_batch(
+    rows: Iterable[Dict],
+    out,
+    *,
+    workers: int = 4,
+    executor: str = "thread",
+    skip: Optional[Set[str]] = None,
+    budget_ms: Optional[float] = None,
+) -> Dict:
+    """
+    Analyze `rows` on a thread/process pool, writing one JSON line to `out` per finished row.
+    Rows are pulled lazily through iter_pipeline, so input size does not bound memory.
+    Returns a throughput summary dict.
+    """
+    from ipobot.pipeline import iter_pipeline
+
+    skip = skip or set()
+    seen: Set[str] = set()
+    counts = {"skipped": 0}
+
+    def _todo():
+        for r in rows:
+            key = _row_key(r["input"], r["query"])
+            if key in skip or key in seen:
+                counts["skipped"] += 1
+                continue
+            seen.add(key)
+            yield _pipeline_item(r)
+
+    ok = failed = 0
+    memory: List[Dict] = []
+    t0 = time.perf_counter()
+    for item, res in iter_pipeline(_todo(), workers=workers, executor=executor, budget_ms=budget_ms):
+        mem = res.pop("worker_memory", None)  # fork executor: per-worker report, summarized below
+        if mem:
+            memory.append(mem)
+        failed_row = "error" in res
+        rec = {"input": item["input"], "ok": not failed_row, **res, "query": item["query"]}  # query: resume key
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        out.flush()
+        if failed_row:
+            failed += 1
+        else:
+            ok += 1
+    elapsed = time.perf_counter() - t0
+
+    summary = {
+        "processed": ok + failed,
+        "ok": ok,
+        "failed": failed,
+        "skipped": counts["skipped"],
+        "elapsed_s": round(elapsed, 3),
+        "items_per_s": round((ok + failed) / elapsed, 3) if elapsed > 0 else None,
+        "workers": workers,
+        "executor": executor,
+    }
+    if executor == "fork":
+        from ipobot.prefork import summarize
+        summary["memory"] = summarize(memory)
+    return summary
+
+
+def build_parser(prog: str = "ipobot batch") -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog=prog, description="IPOBot batch mode (JSONL out)")
+    p.add_argument("input", nargs="?", default="-",
+                   help="CSV/JSONL/text file of names or symbols ('-' = stdin)")
+    p.add_argument("--format", choices=["auto", "csv", "jsonl", "text"], default="auto",
+                   help="Input format (default: sniff)")
+    p.add_argument("-o", "--output", help="JSONL output file (default: stdout). Existing rows are skipped.")
+    p.add_argument("-w", "--workers", type=int, default=4, help="Pool size")
+    p.add_argument("--executor", choices=["thread", "process", "fork"], default="thread",
+                   help="Worker pool kind (fork: load FinBERT/model once, share it with forked workers)")
+    p.add_argument("--no-resume", action="store_true", help="Re-run rows already done in --output (failed rows are always retried)")
+    p.add_argument("--budget-ms", type=float, default=None, help="Per-row latency budget (partial results past it)")
+    p.add_argument("--profile", nargs="?", const="profiles", default=None, metavar="DIR",
+                   help="Profile the whole batch (thread executor): folded stacks + allocation report")
+    from ipobot.data.replay import add_cli_args
+    add_cli_args(p)
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    from ipobot.data.replay import apply_cli_args
+    apply_cli_args(args)  # exported via env, so process-pool workers record/replay too
+
+    if args.input == "-":
+        src = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    else:
+        src = open(args.input, "r", encoding="utf-8", newline="")
+
+    skip = set() if args.no_resume else _done_keys(args.output)
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    def _go():
+        return run_batch(
+            read_rows(src, args.format), out,
+            workers=args.workers, executor=args.executor, skip=skip, budget_ms=args.budget_ms,
+        )
+
+    try:
+        if args.profile:
+            from ipobot.profiling import profile_run
+            if args.executor in ("process", "fork"):
+                print("[batch] --profile only sees this process; use --executor thread", file=sys.stderr)
+            with profile_run(args.profile, tag="batch", concurrent=args.workers > 1):
+                summary = _go()
+        else:
+            summary = _go()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if args.input != "-":
+            src.close()
+
+    print(
+        f"[batch] {summary['processed']} processed ({summary['ok']} ok, {summary['failed']} failed), "
+        f"{summary['skipped']} skipped in {summary['elapsed_s']:.2f}s "
+        f"→ {summary['items_per_s'] or 0:.2f} items/s "
+        f"({summary['executor']} x{summary['workers']})",
+        file=sys.stderr,
+    )
+    mem = summary.get("memory")
+    if mem:
+        for k, v in mem["preloaded"].items():
+            if k.endswith("_error"):
+                print(f"[batch]   preload {k[:-6]} failed: {v}", file=sys.stderr)
+        for w in mem["workers"]:
+            print(f"[batch]   worker {w['pid']}: rss {w['rss_mb']:.0f} MB (shared {w['shared_mb']:.0f}, "
+                  f"private {w['private_mb']:.0f}, peak private {w['peak_private_mb']:.0f}), pss {w['pss_mb']:.0f} MB",
+                  file=sys.stderr)
+        print(f"[batch]   parent + workers: rss {mem['total_rss_mb']:.0f} MB summed, "
+              f"pss {mem['total_pss_mb']:.0f} MB actually used", file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,38 +5,64 @@ if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
 
-from ipobot.pipeline import run_pipeline
+from ipobot.pipeline import run_pipeline, warm_explainer
 from ipobot.data.lookup import resolve_symbol
 
 
-def run(symbol: str, query: str):
-    """Run IPOBot with a known symbol & query."""
-    return run_pipeline(symbol, query)
+def run(symbol: str, query: str, **kwargs):
+    """Run IPOBot with a known symbol & query (kwargs: run_pipeline options, e.g. budget_ms)."""
+    return run_pipeline(symbol, query, **kwargs)
 
 
-def run_name(ipo_name: str):
+def run_name(ipo_name: str, **kwargs):
     """Run IPOBot by just giving IPO name (will auto-resolve to symbol)."""
-    symbol = resolve_symbol(ipo_name)
+    symbol, _learned = resolve_symbol(ipo_name)
     if not symbol:
         raise SystemExit(f"❌ Unknown IPO name: {ipo_name}. Add it in data/lookup.py")
     query = f"{ipo_name} IPO latest news"
-    return run_pipeline(symbol, query)
+    return run_pipeline(symbol, query, **kwargs)
 
 
 if __name__ == "__main__":
     import argparse, json
-    p = argparse.ArgumentParser(description="IPOBot CLI")
+    if sys.argv[1:2] == ["batch"]:
+        from ipobot.app.batch import main as batch_main
+        raise SystemExit(batch_main(sys.argv[2:]))
+
+    p = argparse.ArgumentParser(description="IPOBot CLI (use `batch` subcommand for many IPOs)")
     p.add_argument("--ipo_name", help="IPO name (e.g., OYO, LIC, Zomato)")
     p.add_argument("--symbol", help="Ticker symbol (if known)")
     p.add_argument("--query", help="Custom news query")
+    p.add_argument("--budget-ms", type=float, default=None,
+                   help="End-to-end latency budget; unfinished stages come back marked partial")
+    p.add_argument("--drhp", default=None, metavar="PDF",
+                   help="DRHP PDF to fill fundamentals live providers lack (pre-listing IPOs)")
+    p.add_argument("--profile", nargs="?", const="profiles", default=None, metavar="DIR",
+                   help="Write folded stacks + per-stage allocation report to DIR (default: profiles/)")
+    p.add_argument("--profile-interval-ms", type=float, default=5.0, help="Stack sampling interval")
+    from ipobot.data.replay import add_cli_args, apply_cli_args
+    add_cli_args(p)
     args = p.parse_args()
+    apply_cli_args(args)
+
+    opts = {"budget_ms": args.budget_ms, "drhp_path": args.drhp}
+    warm_explainer()  # one-shot process: a missing attribution table is built here, outside the budget
+
+    def _go():
+        if args.ipo_name:
+            return run_name(args.ipo_name, **opts)
+        elif args.symbol:
+            q = args.query or f"{args.symbol} IPO latest news"
+            return run(args.symbol, q, **opts)
+        else:
+            raise SystemExit("❌ You must provide either --ipo_name or --symbol")
 
-    if args.ipo_name:
-        result = run_name(args.ipo_name)
-    elif args.symbol:
-        q = args.query or f"{args.symbol} IPO latest news"
-        result = run(args.symbol, q)
+    if args.profile:
+        from ipobot.profiling import profile_run
+        with profile_run(args.profile, tag=args.ipo_name or args.symbol or "run",
+                         interval_ms=args.profile_interval_ms):
+            result = _go()
     else:
-        raise SystemExit("❌ You must provide either --ipo_name or --symbol")
+        result = _go()
 
     print(json.dumps(result, indent=2, ensure_ascii=False))
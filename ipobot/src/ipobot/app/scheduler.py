@@ -0,0 +1,250 @@
+# src/ipobot/app/scheduler.py
+# Background pre-computation for the IPO calendar: every `interval_min` the scheduler pulls
+# fetch_upcoming_ipos(), resolves symbols the same way the Streamlit calendar does, and
+# re-runs the pipeline for every IPO whose stored result is due, into data/warm_store.py.
+#
+# Order and cadence follow the subscription window:
+#   tier 0  open now                 by close_date (closing soonest first), every refresh_open_min
+#   tier 1  opens within soon_days   by open_date,                          every refresh_soon_min
+#   tier 2  opens later / undated    by open_date,                          every refresh_later_min
+#   tier 3  closed, awaiting listing by close_date (most recent first),     every refresh_closed_min
+# IPOs closed more than listing_days ago are dropped. Runs are paced to `runs_per_hour`
+# (each run is a handful of provider calls) and the scheduler backs off for `backoff_s`
+# (doubling, up to an hour) whenever a provider answers 429.
+#
+#   python -m ipobot schedule                  # daemon
+#   python -m ipobot schedule --once --dry-run # show the plan
+#   python -m ipobot serve --schedule          # daemon thread inside the HTTP service
+#
+#   scheduler:
+#     interval_min: 15
+#     workers: 2
+#     runs_per_hour: 60
+#     budget_ms: 20000
+#     soon_days: 3
+#     listing_days: 7
+#     refresh_open_min: 30
+#     refresh_soon_min: 120
+#     refresh_later_min: 720
+#     refresh_closed_min: 360
+#     backoff_s: 120
+
+from __future__ import annotations
+
+import argparse, datetime as dt, json, sys, threading, time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULTS = {
+    "interval_min": 15,
+    "workers": 2,
+    "runs_per_hour": 60,
+    "budget_ms": 20000,
+    "soon_days": 3,
+    "listing_days": 7,
+    "refresh_open_min": 30,
+    "refresh_soon_min": 120,
+    "refresh_later_min": 720,
+    "refresh_closed_min": 360,
+    "backoff_s": 120,
+}
+MAX_BACKOFF_S = 3600
+_TIER_REFRESH = ("refresh_open_min", "refresh_soon_min", "refresh_later_min", "refresh_closed_min")
+
+
+def _date(s) -> Optional[dt.date]:
+    try:
+        return dt.date.fromisoformat(str(s)[:10]) if s else None
+    except ValueError:
+        return None
+
+
+def priority(item: Dict, today: dt.date, soon_days: int = 3, listing_days: int = 7) -> Optional[Tuple[int, int]]:
+    """(tier, days) sort key for one calendar item (lower runs first); None = not worth pre-computing."""
+    open_d, close_d = _date(item.get("open_date")), _date(item.get("close_date"))
+    if open_d and open_d <= today and (close_d is None or today <= close_d):
+        return 0, (close_d - today).days if close_d else 0
+    if close_d and close_d < today:
+        since = (today - close_d).days
+        return (3, since) if since <= listing_days else None
+    if open_d:
+        away = (open_d - today).days
+        return (1, away) if away <= soon_days else (2, away)
+    return 2, 10_000
+
+
+def plan(items: List[Dict], last_runs: Dict[str, float], cfg: Optional[Dict] = None,
+         now: Optional[float] = None) -> List[Dict]:
+    """Calendar items whose stored result is due, in run order."""
+    c = {**DEFAULTS, **(cfg or {})}
+    now = time.time() if now is None else now
+    today = dt.date.fromtimestamp(now)
+    jobs = []
+    for it in items:
+        name = (it.get("name") or "").strip()
+        key = priority(it, today, int(c["soon_days"]), int(c["listing_days"])) if name else None
+        if key is None:
+            continue
+        last = last_runs.get(name)
+        refresh_s = float(c[_TIER_REFRESH[key[0]]]) * 60.0
+        if last is not None and now - last < refresh_s:
+            continue
+        jobs.append({**it, "name": name, "tier": key[0], "days": key[1], "last_run": last})
+    jobs.sort(key=lambda j: (j["tier"], j["days"], j["last_run"] or 0.0))
+    return jobs
+
+
+class _Pacer:
+    """Spaces run starts to `per_hour`; backoff() pushes the next start out (429s)."""
+
+    def __init__(self, per_hour: float, backoff_s: float):
+        self.interval = 3600.0 / max(1e-6, float(per_hour))
+        self.backoff_s = float(backoff_s)
+        self._penalty = self.backoff_s
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Block until the next start is allowed; False when `stop` was set meanwhile."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        return not stop.wait(start - now) if start > now else not stop.is_set()
+
+    def backoff(self) -> float:
+        with self._lock:
+            pause = self._penalty
+            self._penalty = min(MAX_BACKOFF_S, self._penalty * 2)
+            self._next = max(self._next, time.monotonic() + pause)
+            return pause
+
+    def relax(self) -> None:
+        with self._lock:
+            self._penalty = self.backoff_s
+
+
+def _rate_limited(res: Dict) -> List[str]:
+    calls = (res.get("meta") or {}).get("provider_calls") or []
+    return sorted({c.get("provider") or "?" for c in calls if c.get("status") == 429})
+
+
+class Scheduler:
+    """Calendar poller + paced pipeline runs into a WarmStore. start()/stop() for a daemon thread."""
+
+    def __init__(self, cfg: Optional[Dict] = None, store=None, log=None):
+        from ipobot.config import load_config
+        from ipobot.data.warm_store import from_config
+
+        full = cfg if cfg is not None else (load_config() or {})
+        self.cfg = {**DEFAULTS, **(full.get("scheduler") or {})}
+        self.store = store or from_config(full)
+        self.pacer = _Pacer(float(self.cfg["runs_per_hour"]), float(self.cfg["backoff_s"]))
+        self.log = log or (lambda msg: print(f"[schedule] {msg}", file=sys.stderr))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_cycle: Optional[Dict] = None
+
+    def _resolve(self, name: str, fallback: Optional[str]) -> str:
+        """Symbol the way the Streamlit calendar resolves it, so interactive lookups hit the same key."""
+        from ipobot.data.lookup import resolve_symbol, suggest_symbol
+        from ipobot.deadline import Deadline
+
+        sym, _learned = resolve_symbol(name, deadline=Deadline.from_budget(10_000))
+        return sym or fallback or suggest_symbol(name)
+
+    def _paced(self, jobs: List[Dict]) -> Iterator[Dict]:
+        for j in jobs:
+            if not self.pacer.wait(self._stop):
+                return
+            sym = self._resolve(j["name"], j.get("symbol"))
+            yield {"symbol": sym, "query": f"{j['name']} IPO latest news", "symbol_is_final": True, "job": j}
+
+    def run_once(self, dry_run: bool = False) -> Dict:
+        """One cycle: calendar -> due jobs -> paced runs. Returns a summary."""
+        from ipobot.data.ipo_calendar import fetch_upcoming_ipos
+
+        t0 = time.perf_counter()
+        try:
+            items = fetch_upcoming_ipos()
+        except Exception as e:
+            items = []
+            self.log(f"calendar failed: {type(e).__name__}: {e}")
+        jobs = plan(items, self.store.last_runs(), self.cfg)
+        summary = {"calendar": len(items), "due": len(jobs), "ran": 0, "ok": 0, "failed": 0, "rate_limited": 0}
+        if dry_run:
+            summary["plan"] = [{k: j.get(k) for k in ("name", "open_date", "close_date", "tier", "days", "last_run")}
+                               for j in jobs]
+        elif jobs:
+            from ipobot.pipeline import iter_pipeline
+
+            workers = max(1, int(self.cfg["workers"]))
+            budget = self.cfg.get("budget_ms")
+            for item, res in iter_pipeline(self._paced(jobs), workers=workers, max_in_flight=workers,
+                                           budget_ms=float(budget) if budget else None):
+                j = item["job"]
+                summary["ran"] += 1
+                limited = _rate_limited(res)
+                if limited:
+                    summary["rate_limited"] += 1
+                    self.log(f"429 from {', '.join(limited)}: pausing {self.pacer.backoff():.0f}s")
+                else:
+                    self.pacer.relax()
+                if "error" in res:
+                    summary["failed"] += 1
+                    self.log(f"{j['name']} ({item['symbol']}): {res['error']}")
+                    continue
+                self.store.put(item["symbol"], item["query"], res, name=j["name"],
+                               open_date=j.get("open_date"), close_date=j.get("close_date"))
+                summary["ok"] += 1
+        summary["elapsed_s"] = round(time.perf_counter() - t0, 2)
+        self.last_cycle = {**summary, "finished_at": time.time()}
+        return summary
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                s = self.run_once()
+                self.log(f"{s['calendar']} on calendar, {s['due']} due, {s['ok']} stored, "
+                         f"{s['failed']} failed in {s['elapsed_s']:.1f}s")
+            except Exception as e:  # a bad cycle must not kill the daemon
+                self.log(f"cycle failed: {type(e).__name__}: {e}")
+            self._stop.wait(float(self.cfg["interval_min"]) * 60.0)
+
+    def start(self) -> "Scheduler":
+        self._thread = threading.Thread(target=self.run_forever, name="ipobot-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="ipobot schedule", description="Pre-compute analyses for upcoming IPOs")
+    p.add_argument("--once", action="store_true", help="Run one cycle and exit")
+    p.add_argument("--dry-run", action="store_true", help="With --once: print the plan, run nothing")
+    p.add_argument("--list", action="store_true", help="Print the stored warm results and exit")
+    from ipobot.data.replay import add_cli_args, apply_cli_args
+    add_cli_args(p)
+    args = p.parse_args(argv)
+    apply_cli_args(args)
+
+    sched = Scheduler()
+    if args.list:
+        for e in sched.store.entries():
+            print(json.dumps(e, ensure_ascii=False))
+        return 0
+    if args.once:
+        print(json.dumps(sched.run_once(dry_run=args.dry_run), indent=2, ensure_ascii=False))
+        return 0
+    try:
+        sched.run_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
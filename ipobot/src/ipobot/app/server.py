@@ -0,0 +1,300 @@
+# src/ipobot/app/server.py
+# Long-lived JSON service: keeps model / FinBERT / HTTP sessions warm and coalesces
+# identical concurrent requests (singleflight) so a burst of refreshes = one fetch.
+#
+#   python -m ipobot serve --port 8765 [--schedule]
+#   GET /analyze?symbol=ZOMATO.NS&query=Zomato+IPO   (also: name=..., final=1, buy_prob=, hold_prob=, budget_ms=, fresh=1)
+#   GET /calendar
+#   GET /history?symbol=ZOMATO.NS&view=changes        (view: latest | runs | changes | diff; start=, end=, decision=, limit=)
+#   GET /health
+#   GET /metrics                                     (Prometheus text format)
+
+from __future__ import annotations
+
+import argparse, json, sys, threading, time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+
+# ---------- singleflight ----------
+class SingleFlight:
+    """Share one in-flight call per key; later callers wait on the leader's result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Return (result, shared). `shared` is True when another caller did the work.
+        A follower waits at most `timeout` seconds for the leader (then TimeoutError).
+        """
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._calls[key] = fut
+
+        if leader:
+            try:
+                fut.set_result(fn())
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+        return fut.result(timeout=None if leader else timeout), not leader
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+_flight = SingleFlight()
+_stats = {"requests": 0, "shared": 0, "warm": 0, "started_at": time.time()}
+_scheduler = None  # app.scheduler.Scheduler when started with --schedule
+_stats_lock = threading.Lock()
+
+
+# ---------- warm-up ----------
+def warm_up() -> List[str]:
+    """Load the model and its attribution table, FinBERT (if live sentiment is on) and provider sessions once."""
+    from ipobot.config import load_config
+    from ipobot.model.predict import load_or_train_model
+
+    cfg = load_config() or {}
+    done = []
+    load_or_train_model(cfg.get("model_path", "models/demo_model.pkl"))
+    done.append("model")
+    from ipobot.pipeline import warm_explainer
+    if warm_explainer(cfg):  # attribution table: built here (or loaded), never on a request
+        done.append("explainer")
+    if cfg.get("use_live_sentiment", False):
+        try:
+            from ipobot.nlp.sentiment import _load_finbert
+            _load_finbert((cfg.get("sentiment") or {}).get("model", "ProsusAI/finbert"))
+            done.append("finbert")
+        except Exception as e:
+            done.append(f"finbert_failed: {type(e).__name__}")
+    try:
+        from ipobot.fundamentals.ratios import _session
+        _session()
+        done.append("http_session")
+    except Exception:
+        pass
+    return done
+
+
+# ---------- handlers ----------
+def _flag(v: Optional[str]) -> bool:
+    return (v or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _analyze(params: Dict[str, str]) -> Tuple[int, Dict]:
+    from ipobot.deadline import Deadline
+    from ipobot.pipeline import apply_thresholds, run_pipeline
+
+    sym = (params.get("symbol") or params.get("name") or "").strip()
+    if not sym:
+        return 400, {"error": "missing 'symbol' or 'name'"}
+    query = (params.get("query") or f"{sym} IPO latest news").strip()
+    final = _flag(params.get("final")) or bool(params.get("symbol") and not params.get("name"))
+
+    thr = {}
+    for k in ("buy_prob", "hold_prob"):
+        if params.get(k):
+            try:
+                thr[k] = float(params[k])
+            except ValueError:
+                return 400, {"error": f"bad float for '{k}'"}
+    try:
+        budget_ms = float(params["budget_ms"]) if params.get("budget_ms") else None
+    except ValueError:
+        return 400, {"error": "bad float for 'budget_ms'"}
+    dl = Deadline.from_budget(budget_ms)  # the request's budget runs from here
+
+    if not _flag(params.get("fresh")):
+        warm = _warm(sym, query, final, thr, dl)
+        if warm is not None:  # pre-computed by the scheduler; only the thresholds are re-applied
+            with _stats_lock:
+                _stats["warm"] += 1
+            return 200, {**warm, "shared": False, "warm": True}
+
+    # Coalesce on the IPO and the budget: thresholds are re-applied per caller, but a result cut
+    # short by one budget is never handed to a caller that asked for another. `dl` bounds the
+    # wait for a leader and any run of this caller's own together, never each separately.
+    key = ("analyze", sym.upper() if final else sym.lower(), query.lower(), final, budget_ms)
+    run = lambda: run_pipeline(sym, query, symbol_is_final=final, budget_ms=budget_ms, deadline=dl)
+    try:
+        res, shared = _flight.do(key, run, timeout=dl.remaining())
+    except FuturesTimeout:
+        # Leader still running at our deadline: answer with what is left of it. That is no time,
+        # so every budgeted stage comes back partial without another call to the providers.
+        res, shared = run(), False
+    with _stats_lock:
+        _stats["shared"] += int(shared)
+    return 200, {**apply_thresholds(res, thr), "shared": shared}
+
+
+def _warm(sym: str, query: str, final: bool, thr: Dict, deadline=None) -> Optional[Dict]:
+    """
+    Scheduler's stored result for this request, decided at the current thresholds (None = run live).
+    A name lookup here spends the request's `deadline`, which the live run then continues on.
+    """
+    from ipobot.config import load_config
+    from ipobot.data.warm_store import from_config, warm_result
+    from ipobot.pipeline import apply_thresholds
+
+    cfg = load_config() or {}
+    if not from_config(cfg).path.exists():
+        return None  # no scheduler has run against this config
+    try:
+        if not final:
+            from ipobot.data.lookup import resolve_symbol
+            sym, _learned = resolve_symbol(sym, deadline=deadline)
+            if not sym:
+                return None
+        res = warm_result(sym, query, cfg)
+    except Exception:
+        return None  # a broken warm store falls back to a live run
+    return apply_thresholds(res, {**(cfg.get("thresholds") or {}), **thr}) if res else None
+
+
+def _calendar(_params: Dict[str, str]) -> Tuple[int, Dict]:
+    from ipobot.data.ipo_calendar import fetch_upcoming_ipos
+
+    items, shared = _flight.do(("calendar",), fetch_upcoming_ipos)
+    with _stats_lock:
+        _stats["shared"] += int(shared)
+    return 200, {"items": items, "count": len(items), "shared": shared}
+
+
+def _history(params: Dict[str, str]) -> Tuple[int, Dict]:
+    from ipobot.config import load_config
+    from ipobot.data.history_store import from_config
+
+    store = from_config(load_config() or {})
+    if store is None:
+        return 404, {"error": "history_store is disabled"}
+    sym = (params.get("symbol") or "").strip() or None
+    view = params.get("view") or ("runs" if sym else "latest")
+    try:
+        limit = int(params["limit"]) if params.get("limit") else None
+    except ValueError:
+        return 400, {"error": "bad int for 'limit'"}
+    if view in ("changes", "diff") and not sym:
+        return 400, {"error": f"view={view} needs 'symbol'"}
+    try:
+        if view == "latest":
+            got = store.latest(sym)
+            items = [got] if isinstance(got, dict) else (got or [])
+        elif view == "runs":
+            items = store.runs(sym, start=params.get("start"), end=params.get("end"),
+                               decision=params.get("decision"), limit=limit)
+        elif view == "changes":
+            items = store.changes(sym, start=params.get("start"), end=params.get("end"))
+        elif view == "diff":
+            got = store.diff(sym)
+            items = [got] if got else []
+        else:
+            return 400, {"error": f"unknown view '{view}'"}
+    except ValueError as e:  # bad ISO start/end
+        return 400, {"error": str(e)}
+    return 200, {"items": items, "count": len(items)}
+
+
+def _health(_params: Dict[str, str]) -> Tuple[int, Dict]:
+    with _stats_lock:
+        st = dict(_stats)
+    st["in_flight"] = _flight.in_flight()
+    st["uptime_s"] = round(time.time() - st.pop("started_at"), 1)
+    if _scheduler is not None:
+        st["scheduler"] = _scheduler.last_cycle
+    return 200, {"status": "ok", **st}
+
+
+ROUTES: Dict[str, Callable[[Dict[str, str]], Tuple[int, Dict]]] = {
+    "/analyze": _analyze,
+    "/calendar": _calendar,
+    "/history": _history,
+    "/health": _health,
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "IPOBot/1.0"
+
+    def do_GET(self):
+        u = urlparse(self.path)
+        if u.path.rstrip("/") == "/metrics":
+            from ipobot.metrics import render_prometheus
+            return self._send_text(200, render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        route = ROUTES.get(u.path.rstrip("/") or "/")
+        if route is None:
+            return self._send(404, {"error": f"unknown path {u.path}", "routes": sorted(ROUTES)})
+        params = {k: v[-1] for k, v in parse_qs(u.query).items()}
+        if route is not _health:
+            with _stats_lock:
+                _stats["requests"] += 1
+        try:
+            code, body = route(params)
+        except Exception as e:
+            code, body = 500, {"error": f"{type(e).__name__}: {e}"}
+        self._send(code, body)
+
+    def _send(self, code: int, body: Dict):
+        self._send_text(code, json.dumps(body, ensure_ascii=False, default=str), "application/json; charset=utf-8")
+
+    def _send_text(self, code: int, text: str, content_type: str):
+        data = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        sys.stderr.write("[serve] %s - %s\n" % (self.address_string(), fmt % args))
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, warm: bool = True, schedule: bool = False) -> None:
+    global _scheduler
+    if warm:
+        print(f"[serve] warm: {', '.join(warm_up())}", file=sys.stderr)
+    if schedule:
+        from ipobot.app.scheduler import Scheduler
+        _scheduler = Scheduler().start()
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    print(f"[serve] listening on http://{host}:{port}", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        if _scheduler is not None:
+            _scheduler.stop(timeout=1.0)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="ipobot serve", description="IPOBot HTTP JSON service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--no-warm", action="store_true", help="Skip model/FinBERT preload")
+    p.add_argument("--schedule", action="store_true",
+                   help="Pre-compute upcoming IPOs in a background thread (see app/scheduler.py)")
+    from ipobot.data.replay import add_cli_args, apply_cli_args
+    add_cli_args(p)
+    args = p.parse_args(argv)
+    apply_cli_args(args)
+    serve(args.host, args.port, warm=not args.no_warm, schedule=args.schedule)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,13 +4,16 @@ SRC = pathlib.Path(__file__).resolve().parents[2]
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+import datetime as dt
 import json
 import re
 import streamlit as st
 
-from ipobot.pipeline import run_pipeline
+from ipobot.pipeline import run_pipeline, apply_thresholds
 from ipobot.data.lookup import resolve_symbol, suggest_symbol
 from ipobot.data.ipo_calendar import fetch_upcoming_ipos
+from ipobot.data.warm_store import warm_result
+from ipobot.records import Fundamentals
 
 st.set_page_config(page_title="IPOBot (IPOMONSTER)", page_icon="📈", layout="wide")
 
@@ -21,13 +24,12 @@ st.caption("Type an IPO name or pick from 'Upcoming IPOs'. I’ll fetch news, ru
 st.sidebar.header("⚙️ Thresholds")
 buy_thr = st.sidebar.slider("Buy threshold (prob)", 0.50, 0.90, 0.62, 0.01)
 hold_thr = st.sidebar.slider("Hold threshold (prob)", 0.30, buy_thr, 0.45, 0.01)
+thresholds = {"buy_prob": buy_thr, "hold_prob": hold_thr}
 
-def decide(prob: float, buy_t: float, hold_t: float):
-    if prob >= buy_t:
-        return "BUY"
-    if prob >= hold_t:
-        return "HOLD"
-    return "AVOID"
+# Pipeline results survive reruns: moving a slider only re-derives decision + reasoning
+# (apply_thresholds) from the cached sentiment / fundamentals / probability.
+st.session_state.setdefault("quick_result", None)   # (raw input, symbol, result)
+st.session_state.setdefault("batch_results", [])    # [(ipo name, result)]
 
 
 _TICKER_RE = re.compile(r"^[A-Z][A-Z0-9\-\.]{0,9}$")  
@@ -45,40 +47,9 @@ def looks_like_ticker(s: str) -> bool:
 
 def normalize_fundamentals(f: dict) -> dict:
     """Accept either UI-style keys ('P/E', 'ROE (%)', …) or code-style keys ('pe','roe', …)."""
-    f = f or {}
-
-    def pick(*keys):
-        for k in keys:
-            if k in f and f[k] is not None:
-                return f[k]
-        return None
-
-    out = {
-        "P/E": pick("P/E", "pe"),
-        "Peer P/E": pick("Peer P/E", "peer_pe"),
-        "ROE (%)": pick("ROE (%)", "roe", "roe_pct"),
-        "D/E": pick("D/E", "de", "debt_to_equity"),
-        "Revenue CAGR (%)": pick("Revenue CAGR (%)", "revenue_cagr", "rev_cagr", "rev_cagr_pct"),
-        "P/E discount vs peer (%)": pick("P/E discount vs peer (%)", "pe_discount_vs_peer"),
-    }
-
-    
-    d = out["P/E discount vs peer (%)"]
-    try:
-        if d is not None:
-            d = float(d)
-            out["P/E discount vs peer (%)"] = round(d * 100, 2) if abs(d) <= 1 else round(d, 2)
-    except Exception:
-        pass
-
-   
-    for k, v in list(out.items()):
-        try:
-            if v is not None:
-                out[k] = round(float(v), 2)
-        except Exception:
-            pass
-    return out
+    # one alias table for both schemas (a fractional pe_discount_vs_peer becomes a percentage)
+    out = Fundamentals.from_dict(f).to_ui()
+    return {k: None if v is None else round(v, 2) for k, v in out.items()}
 
 def format_peer_gap(pe: float | None, peer: float | None):
     """Return (label, value) where label is 'discount' or 'premium' vs peer."""
@@ -93,40 +64,30 @@ def format_peer_gap(pe: float | None, peer: float | None):
         return None, None
 
 
-st.subheader("🔎 Quick analyze by IPO name")
-ipo_name = st.text_input("IPO name or ticker", placeholder="e.g., OYO, LICI.NS, Zomato, TSLA, AAPL").strip()
-colA, colB = st.columns([1, 3])
-run_click = colA.button("🚀 Analyze")
-
-if run_click:
-    raw = ipo_name
-    sym = None
-    learned = False
-
-    
-    if looks_like_ticker(raw):
-        sym = raw.upper()
-    else:
-        sym, learned = resolve_symbol(raw)
-
-    if sym is None:
-        sym = suggest_symbol(raw)
-        st.warning(f"Symbol not found in mappings or APIs. Using fallback: {sym}")
-    elif learned:
-        st.success(f"Learned mapping: {raw} → {sym}")
-
-    st.info(f"Using symbol: **{sym}**")
-
-    query = f"{raw} IPO latest news"
-    with st.spinner(f"Analyzing {raw} ({sym})…"):
-        res = run_pipeline(
-            sym,
-            query,
-            override_thresholds={"buy_prob": buy_thr, "hold_prob": hold_thr},
-        )
-
+def _render_history(sym: str):
+    from ipobot.config import load_config
+    from ipobot.data.history_store import from_config
+
+    store = from_config(load_config() or {})
+    if store is None:
+        return
+    store.flush(timeout=2.0)  # include the run just made
+    runs = store.runs(sym, limit=50)
+    if len(runs) < 2:
+        return
+    with st.expander(f"🕒 Previous calls on {sym} ({len(runs)})"):
+        st.line_chart({"probability": [r["probability"] for r in runs]})
+        st.table([{"time": dt.datetime.fromtimestamp(r["ts"]).strftime("%Y-%m-%d %H:%M"),
+                   "decision": r["decision"], "probability": round(r["probability"] or 0.0, 3),
+                   "sentiment": round(r["sentiment"] or 0.0, 2)} for r in reversed(runs)])
+        d = store.diff(sym)
+        if d and d["changes"]:
+            st.caption("Changed since the previous run:")
+            st.json(d["changes"])
+
+
+def render_result(res: dict, sym: str):
     prob = float(res["probability"])
-    res["decision"] = decide(prob, buy_thr, hold_thr)
 
     # KPI row
     k1, k2, k3, k4 = st.columns(4)
@@ -168,12 +129,58 @@ if run_click:
         tone = (n.get("sent") or "neutral").capitalize()
         st.markdown(f"- **{n.get('title','(no title)')}** — _{tone}_")
 
+    _render_history(sym)
+
     with st.expander("🔧 Debug Info"):
         st.json(res.get("meta", {}))
         st.write("Warnings:", res.get("warnings", []))
         st.write("Errors:", res.get("errors", []))
 
 
+st.subheader("🔎 Quick analyze by IPO name")
+ipo_name = st.text_input("IPO name or ticker", placeholder="e.g., OYO, LICI.NS, Zomato, TSLA, AAPL").strip()
+colA, colB = st.columns([1, 3])
+run_click = colA.button("🚀 Analyze")
+
+if run_click:
+    raw = ipo_name
+    sym = None
+    learned = False
+
+    
+    if looks_like_ticker(raw):
+        sym = raw.upper()
+    else:
+        sym, learned = resolve_symbol(raw)
+
+    if sym is None:
+        sym = suggest_symbol(raw)
+        st.warning(f"Symbol not found in mappings or APIs. Using fallback: {sym}")
+    elif learned:
+        st.success(f"Learned mapping: {raw} → {sym}")
+
+    st.info(f"Using symbol: **{sym}**")
+
+    query = f"{raw} IPO latest news"
+    res = warm_result(sym, query)  # pre-computed by the scheduler (python -m ipobot schedule)
+    if res is not None:
+        st.caption(f"Pre-computed {res['meta']['warm']['age_s'] / 60:.0f} min ago by the scheduler.")
+    else:
+        with st.spinner(f"Analyzing {raw} ({sym})…"):
+            res = run_pipeline(
+                sym,
+                query,
+                override_thresholds=thresholds,
+            )
+    st.session_state["quick_result"] = (raw, sym, res)
+
+
+if st.session_state["quick_result"] is not None:
+    _raw, _sym, _res = st.session_state["quick_result"]
+    if _raw == ipo_name:  # still the IPO in the box
+        render_result(apply_thresholds(_res, thresholds), _sym)
+
+
 st.subheader("📅 Upcoming IPOs (auto-fetched)")
 try:
     cal_items = fetch_upcoming_ipos()
@@ -191,6 +198,7 @@ else:
     sel = st.multiselect("Select IPOs to analyze", options=choices, max_selections=5)
 
     if st.button("🔎 Analyze selected IPOs"):
+        batch = []
         for c in sel:
             idx = choices.index(c)
             it = cal_items[idx]
@@ -207,30 +215,34 @@ else:
             st.info(f"[{ipo}] Using symbol: **{sym}**")
 
             q = f"{ipo} IPO latest news"
-            with st.spinner(f"Analyzing {ipo} ({sym})…"):
-                res = run_pipeline(
-                    sym,
-                    query,
-                    override_thresholds={"buy_prob": buy_thr, "hold_prob": hold_thr},
-                    symbol_is_final=True,  
-                )
-
-
-            p = float(res["probability"])
-            dec = decide(p, buy_thr, hold_thr)
-            st.markdown(
-                f"### {ipo}  \n**Decision:** {dec}  •  **Prob:** {p:.2f}  •  **Gain %:** {res['expected_gain_pct']:.1f}%"
-            )
-            st.markdown(res["reasoning"])
-            with st.expander("Fundamentals / News / Debug"):
-                st.json(res["fundamentals"])
-                st.write("News:")
-                for n in res.get("news_sample", []):
-                    tone = (n.get("sent") or "neutral").capitalize()
-                    st.markdown(f"- **{n.get('title','(no title)')}** — _{tone}_")
-                st.write("Meta:", res.get("meta", {}))
-                st.write("Warnings:", res.get("warnings", []))
-                st.write("Errors:", res.get("errors", []))
+            res = warm_result(sym, q)
+            if res is None:
+                with st.spinner(f"Analyzing {ipo} ({sym})…"):
+                    res = run_pipeline(
+                        sym,
+                        q,
+                        override_thresholds=thresholds,
+                        symbol_is_final=True,  
+                    )
+            batch.append((ipo, res))
+        st.session_state["batch_results"] = batch
+
+    for ipo, res in st.session_state["batch_results"]:
+        res = apply_thresholds(res, thresholds)
+        p = float(res["probability"])
+        st.markdown(
+            f"### {ipo}  \n**Decision:** {res['decision']}  •  **Prob:** {p:.2f}  •  **Gain %:** {res['expected_gain_pct']:.1f}%"
+        )
+        st.markdown(res["reasoning"])
+        with st.expander("Fundamentals / News / Debug"):
+            st.json(res["fundamentals"])
+            st.write("News:")
+            for n in res.get("news_sample", []):
+                tone = (n.get("sent") or "neutral").capitalize()
+                st.markdown(f"- **{n.get('title','(no title)')}** — _{tone}_")
+            st.write("Meta:", res.get("meta", {}))
+            st.write("Warnings:", res.get("warnings", []))
+            st.write("Errors:", res.get("errors", []))
 
 
 with st.expander("✏️ Edit IPO name → symbol mappings"):
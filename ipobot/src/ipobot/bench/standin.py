@@ -0,0 +1,130 @@
+# src/ipobot/bench/standin.py
+# Local stand-in for every outbound provider call: serves recorded HTTP fixtures
+# through a requests transport adapter, so benchmarks run offline and repeatably.
+
+from __future__ import annotations
+
+import json, pathlib, threading, time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from ipobot.data.replay import request_key, patched_transport
+
+FIXTURES_DIR = pathlib.Path(__file__).resolve().parent / "fixtures"
+
+
+class FixtureStore:
+    """
+    Fixture entries: {"method", "url", "params"?, "status", "headers"?, "json"|"body", "elapsed_ms"?}.
+    Lookup is exact (method, host+path, params) first, then host+path only.
+    """
+
+    def __init__(self, entries: List[Dict]):
+        self.exact: Dict[Tuple, Dict] = {}
+        self.by_path: Dict[Tuple[str, str], Dict] = {}
+        for e in entries:
+            url = e["url"]
+            if e.get("params"):
+                url += ("&" if "?" in url else "?") + "&".join(f"{k}={v}" for k, v in e["params"].items())
+            key = request_key(e.get("method", "GET"), url)
+            self.exact.setdefault(key, e)
+            self.by_path.setdefault(key[:2], e)
+
+    @classmethod
+    def load(cls, paths: Optional[List[pathlib.Path]] = None) -> "FixtureStore":
+        entries: List[Dict] = []
+        for p in paths or sorted(FIXTURES_DIR.glob("*.json")):
+            data = json.loads(pathlib.Path(p).read_text(encoding="utf-8"))
+            entries.extend(data.get("http", []) if isinstance(data, dict) else data)
+        return cls(entries)
+
+    def match(self, method: str, url: str) -> Optional[Dict]:
+        key = request_key(method, url)
+        return self.exact.get(key) or self.by_path.get(key[:2])
+
+
+class FixtureAdapter(BaseAdapter):
+    """requests transport that answers from a FixtureStore (unknown URLs -> 404, counted as misses)."""
+
+    def __init__(self, store: FixtureStore, latency_scale: float = 1.0):
+        super().__init__()
+        self.store = store
+        self.latency_scale = float(latency_scale)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses: Dict[str, int] = {}
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        entry = self.store.match(request.method, request.url)
+        with self._lock:
+            if entry is None:
+                k = " ".join(request_key(request.method, request.url)[:2])
+                self.misses[k] = self.misses.get(k, 0) + 1
+            else:
+                self.hits += 1
+
+        if entry is not None and self.latency_scale > 0:
+            time.sleep(float(entry.get("elapsed_ms", 0)) * self.latency_scale / 1000.0)
+
+        resp = requests.Response()
+        resp.request = request
+        resp.url = request.url
+        resp.encoding = "utf-8"
+        resp.reason = "OK"
+        if entry is None:
+            resp.status_code = 404
+            resp.reason = "Not Found (no fixture)"
+            resp._content = b""
+            resp.headers = CaseInsensitiveDict()
+            return resp
+        resp.status_code = int(entry.get("status", 200))
+        if "json" in entry:
+            resp._content = json.dumps(entry["json"]).encode("utf-8")
+            hdrs = {"Content-Type": "application/json"}
+        else:
+            resp._content = str(entry.get("body", "")).encode("utf-8")
+            hdrs = {"Content-Type": "text/html; charset=utf-8"}
+        hdrs.update(entry.get("headers") or {})
+        resp.headers = CaseInsensitiveDict(hdrs)
+        return resp
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": dict(self.misses)}
+
+
+@contextmanager
+def standin(store: Optional[FixtureStore] = None, latency_scale: float = 1.0):
+    """
+    Route all requests (Session and module-level requests.get), feedparser URL fetches and
+    yfinance lookups through fixtures for the duration of the block. Yields the adapter.
+    """
+    store = store or FixtureStore.load()
+    adapter = FixtureAdapter(store, latency_scale=latency_scale)
+
+    def _yf(symbol, deadline, _orig):
+        # yfinance has its own transport; replay its recorded derived output instead
+        url = f"https://yfinance.local/{symbol}"
+        e = store.match("GET", url)
+        adapter.send(requests.Request("GET", url).prepare())
+        return dict(e["json"]) if e and isinstance(e.get("json"), dict) else None
+
+    def _prices(symbols, deadline, _orig):
+        got = {}
+        for s in symbols:  # batched yfinance closes: only what the fixtures recorded
+            url = f"https://yfinance.local/price/{s}"
+            e = store.match("GET", url)
+            if e and isinstance(e.get("json"), dict) and e["json"].get("close") is not None:
+                adapter.send(requests.Request("GET", url).prepare())
+                got[s] = float(e["json"]["close"])
+        return got
+
+    with patched_transport(lambda sess, url, _orig: adapter, _yf, _prices):
+        yield adapter
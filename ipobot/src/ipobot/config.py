@@ -3,7 +3,36 @@ import os, yaml, pathlib
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 CFG_PATH = ROOT / "config.yaml"
+ENV_PATH = ROOT / ".env"
+
+_env_loaded = False
+
+def config_path() -> pathlib.Path:
+    """config.yaml next to src/, unless IPOBOT_CONFIG points elsewhere (bench, services)."""
+    env = os.getenv("IPOBOT_CONFIG")
+    return pathlib.Path(env) if env else CFG_PATH
+
+def load_env() -> None:
+    """Read .env into os.environ once, on first need (keeps python-dotenv off the import path)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv(ENV_PATH)  # existing environment variables win
+
+def getenv(*names: str):
+    """First non-empty env var among `names` (after loading .env)."""
+    load_env()
+    for n in names:
+        v = os.getenv(n)
+        if v:
+            return v
+    return None
 
 def load_config():
-    with open(CFG_PATH, "r", encoding="utf-8") as f:
+    with open(config_path(), "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
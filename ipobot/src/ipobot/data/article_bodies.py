@@ -0,0 +1,314 @@
+# src/ipobot/data/article_bodies.py
+# Article bodies for body-level sentiment (optional pipeline stage, config sentiment.bodies).
+#
+#   - fetched on a bounded thread pool, at most `per_host` requests in flight per host and
+#     `host_interval_s` between request starts to the same host
+#   - HTML is streamed through a stdlib HTMLParser as it arrives: text of <p>/<li>/<h*> outside
+#     script/style/nav/header/footer/aside/form is kept, and reading stops at `max_bytes`
+#   - body sentiment is cached per URL (SQLite, .cache/bodies/) together with the model that
+#     scored it, so an article is downloaded and scored once; failures are retried after FAIL_TTL
+#
+#   sentiment:
+#     bodies:
+#       enabled: false
+#       max_articles: 8
+#       workers: 8
+#       per_host: 2
+#       host_interval_s: 0.5
+#       max_bytes: 400000
+#       weight: 0.5          # blend: (1 - weight) * headline sentiment + weight * body sentiment
+
+from __future__ import annotations
+
+import hashlib, pathlib, sqlite3, threading, time, urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+from ipobot.config import ROOT
+from ipobot.deadline import expired, timeout_for
+from ipobot.metrics import bind, cache_event, provider_call
+
+DEFAULT_DB = ROOT / ".cache" / "bodies" / "bodies.sqlite"
+BODY_TIMEOUT = 10        # seconds per article
+MAX_BYTES = 400_000      # stop reading a page after this much HTML
+MIN_CHARS = 400          # shorter extractions are consent walls / redirect stubs, not articles
+FAIL_TTL = 24 * 3600     # retry failed URLs after this long
+PER_HOST = 2
+HOST_INTERVAL_S = 0.5
+MAX_WORKERS = 8
+USER_AGENT = "Mozilla/5.0 (compatible; ipobot/0.1; +personal research prototype)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    url_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    url TEXT,
+    fetched_ts REAL,
+    chars INTEGER,
+    windows INTEGER,
+    score REAL,                 -- NULL: fetch/extraction failed
+    PRIMARY KEY (url_hash, model)
+);
+"""
+
+
+# ---------- extraction ----------
+class _MainText(HTMLParser):
+    """Incremental main-text extractor: feed() chunks as they arrive, read .text() at any point."""
+
+    SKIP = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "figure", "button"}
+    KEEP = {"p", "li", "h1", "h2", "h3", "h4", "blockquote"}
+    VOID = {"br", "img", "hr", "meta", "link", "input", "source", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip = 0
+        self._keep = 0
+        self._buf: List[str] = []
+        self.parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID:
+            return
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.KEEP:
+            self._flush()
+            self._keep += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip:
+            self._skip -= 1
+        elif tag in self.KEEP and self._keep:
+            self._keep -= 1
+            if not self._keep:
+                self._flush()
+
+    def handle_data(self, data):
+        if self._keep and not self._skip:
+            self._buf.append(data)
+
+    def _flush(self):
+        block = " ".join("".join(self._buf).split())
+        self._buf = []
+        if len(block) >= 40:  # captions, bylines and share buttons are shorter than a sentence
+            self.parts.append(block)
+
+    def text(self) -> str:
+        self._flush()
+        return "\n".join(self.parts)
+
+
+def extract_text(chunks) -> str:
+    """Main text from an iterable of HTML str/bytes chunks (decoded as UTF-8 when bytes)."""
+    p = _MainText()
+    for c in chunks:
+        p.feed(c.decode("utf-8", "replace") if isinstance(c, bytes) else c)
+    p.close()
+    return p.text()
+
+
+# ---------- per-host politeness ----------
+class _HostGate:
+    """At most `per_host` concurrent requests per host, starts spaced by `interval` seconds."""
+
+    def __init__(self, per_host: int = PER_HOST, interval: float = HOST_INTERVAL_S):
+        self.per_host = max(1, int(per_host))
+        self.interval = max(0.0, float(interval))
+        self._lock = threading.Lock()
+        self._sems: Dict[str, threading.Semaphore] = {}
+        self._next: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, host: str):
+        with self._lock:
+            sem = self._sems.setdefault(host, threading.Semaphore(self.per_host))
+        with sem:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next.get(host, 0.0))
+                self._next[host] = start + self.interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def fetch_body(url: str, *, deadline=None, max_bytes: int = MAX_BYTES, session=None) -> Optional[str]:
+    """Stream one page and return its main text (None when too short / not HTML / failed)."""
+    import requests
+
+    host = urllib.parse.urlsplit(url).hostname or ""
+    get = (session or requests).get
+    with provider_call("article", host) as c:
+        with get(url, stream=True, timeout=timeout_for(deadline, BODY_TIMEOUT),
+                 headers={"User-Agent": USER_AGENT, "Accept": "text/html"}) as r:
+            c.response(r)
+            ctype = r.headers.get("Content-Type", "text/html")
+            if not r.ok or "html" not in ctype:
+                c.ok = False
+                return None
+            p, read = _MainText(), 0
+            r.encoding = r.encoding or "utf-8"
+            for chunk in r.iter_content(chunk_size=16384, decode_unicode=True):
+                p.feed(chunk if isinstance(chunk, str) else chunk.decode(r.encoding, "replace"))
+                read += len(chunk)
+                if read >= max_bytes or expired(deadline):
+                    break
+            p.close()
+    text = p.text()
+    return text if len(text) >= MIN_CHARS else None
+
+
+# ---------- cache ----------
+class BodyCache:
+    """Body sentiment per (url, model); a short-lived connection per call (threads/processes share it)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = pathlib.Path(path) if path else DEFAULT_DB
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+            self._ready = True
+        return con
+
+    def get_many(self, urls: List[str], model: str) -> Dict[str, Optional[float]]:
+        """{url: score | None(failed recently)} for cached URLs; missing/expired failures are absent."""
+        if not urls:
+            return {}
+        keys = {hashlib.sha1(u.encode("utf-8")).hexdigest(): u for u in urls}
+        con = self._connect()
+        try:
+            rows = con.execute(
+                f"SELECT url_hash, score, fetched_ts FROM bodies WHERE model = ? AND url_hash IN "
+                f"({','.join('?' * len(keys))})", (model, *keys)).fetchall()
+        finally:
+            con.close()
+        now = time.time()
+        return {keys[h]: score for h, score, ts in rows if score is not None or now - (ts or 0) < FAIL_TTL}
+
+    def put_many(self, rows: List[tuple], model: str) -> None:
+        """rows: (url, chars, windows, score | None)."""
+        if not rows:
+            return
+        now = time.time()
+        con = self._connect()
+        try:
+            with con:
+                con.executemany("INSERT OR REPLACE INTO bodies VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                [(hashlib.sha1(u.encode("utf-8")).hexdigest(), model, u, now, n, w, s)
+                                 for u, n, w, s in rows])
+        finally:
+            con.close()
+
+
+# ---------- stage ----------
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_SIZE = 0
+_GATE: Optional[_HostGate] = None
+_lock = threading.Lock()
+_cache: Optional[BodyCache] = None
+
+
+def _pool(workers: int) -> ThreadPoolExecutor:
+    global _POOL, _POOL_SIZE
+    with _lock:
+        if _POOL is None or _POOL_SIZE != workers:
+            _POOL = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ipobot-bodies")
+            _POOL_SIZE = workers
+        return _POOL
+
+
+def _gate(per_host: int, interval: float) -> _HostGate:
+    global _GATE
+    with _lock:
+        if _GATE is None or (_GATE.per_host, _GATE.interval) != (per_host, interval):
+            _GATE = _HostGate(per_host, interval)
+        return _GATE
+
+
+def default_cache() -> BodyCache:
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = BodyCache()
+        return _cache
+
+
+def body_sentiment(items: List[Dict], *, scorer: Callable[[List[str]], List[tuple]], model: str,
+                   deadline=None, max_articles: int = 8, workers: int = MAX_WORKERS,
+                   per_host: int = PER_HOST, host_interval_s: float = HOST_INTERVAL_S,
+                   max_bytes: int = MAX_BYTES, cache: Optional[BodyCache] = None) -> Dict:
+    """
+    Body sentiment for the first `max_articles` items with a URL.
+    `scorer(texts) -> [(score, windows)]` (nlp.sentiment.body_scores). Cached URLs cost one
+    SQLite lookup; the rest are fetched concurrently, then scored together in one call.
+    Returns {'score': mean over scored bodies | None, 'scores': {url: score}, 'fetched', 'cached'}.
+    """
+    urls = list(dict.fromkeys(it["url"] for it in items if it.get("url")))[:max_articles]
+    cache = cache or default_cache()
+    hit = cache.get_many(urls, model)
+    for u in urls:
+        cache_event("article_body", u in hit)
+    todo = [u for u in urls if u not in hit]
+
+    texts: Dict[str, Optional[str]] = {}
+    if todo and not expired(deadline):
+        gate = _gate(per_host, host_interval_s)
+
+        def one(u):
+            with gate.slot(urllib.parse.urlsplit(u).hostname or ""):
+                if expired(deadline):
+                    return u, None, False
+                try:
+                    return u, fetch_body(u, deadline=deadline, max_bytes=max_bytes), True
+                except Exception:
+                    return u, None, True
+
+        futs = [_pool(max(1, int(workers))).submit(bind(lambda u=u: one(u))) for u in todo]
+        attempted = set()
+        for f in futs:
+            u, text, tried = f.result()
+            texts[u] = text
+            if tried:
+                attempted.add(u)
+
+        ok = [u for u in todo if texts.get(u)]
+        scored: Dict[str, tuple] = {}
+        if ok and not expired(deadline):
+            scored = dict(zip(ok, scorer([texts[u] for u in ok])))
+        rows = [(u, len(texts[u]), scored[u][1], scored[u][0]) for u in ok if u in scored]
+        rows += [(u, 0, 0, None) for u in todo if u in attempted and not texts.get(u)]  # remember failures
+        cache.put_many(rows, model)
+        hit.update({u: scored[u][0] for u in scored})
+
+    scores = {u: s for u, s in hit.items() if s is not None}
+    return {
+        "score": round(sum(scores.values()) / len(scores), 4) if scores else None,
+        "scores": scores,
+        "fetched": len(texts),
+        "cached": len(urls) - len(todo),
+    }
+
+
+def sentiment_from_config(items: List[Dict], cfg: Dict, deadline=None) -> Optional[Dict]:
+    """body_sentiment() with config `sentiment.bodies`; None when FinBERT is off (no scorer)."""
+    from ipobot.nlp.sentiment import body_scorer
+
+    got = body_scorer(cfg)
+    if got is None:
+        return None
+    scorer, model = got
+    b = ((cfg.get("sentiment") or {}).get("bodies") or {})
+    return body_sentiment(items, scorer=scorer, model=model, deadline=deadline,
+                          max_articles=int(b.get("max_articles", 8)), workers=int(b.get("workers", MAX_WORKERS)),
+                          per_host=int(b.get("per_host", PER_HOST)),
+                          host_interval_s=float(b.get("host_interval_s", HOST_INTERVAL_S)),
+                          max_bytes=int(b.get("max_bytes", MAX_BYTES)))
@@ -1,4 +1,433 @@
+# src/ipobot/data/drhp_extractor.py
+# DRHP (Draft Red Herring Prospectus) extraction with PyMuPDF.
+#
+# DRHPs run to 400-700 pages, so pages are read in fixed-size ranges across a process pool
+# (each worker opens its own handle) and streamed back in page order with a bounded number
+# of ranges in flight. Only pages inside the sections we care about are kept:
+#
+#   restated_financials  RESTATED (CONSOLIDATED) FINANCIAL INFORMATION / STATEMENTS
+#   summary_financials   SUMMARY (OF) FINANCIAL INFORMATION
+#   objects_of_issue     OBJECTS OF THE ISSUE / OFFER
+#   risk_factors         RISK FACTORS
+#   peer_comparison      BASIS FOR (THE) ISSUE / OFFER PRICE (holds the listed-peer table)
+#
+# Results are cached per document hash under .cache/drhp/, so re-opening a DRHP is instant,
+# and fed to the full-text index in drhp_index.py.
 
+from __future__ import annotations
 
-def extract_from_pdf(pdf_path: str):
-    raise NotImplementedError("Add PyMuPDF-based DRHP parsing here.")
+import gzip, hashlib, json, os, pathlib, re, tempfile, threading, time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from ipobot.config import ROOT
+from ipobot.metrics import cache_event
+
+EXTRACTOR_VERSION = 1
+CACHE_DIR = ROOT / ".cache" / "drhp"
+CHUNK_PAGES = 24                  # pages per worker task
+MAX_SECTION_CHARS = 400_000       # keep long sections (restated financials) bounded in memory
+_HEAD_LINES = 6                   # headings sit in the first few non-empty lines of a page
+
+SECTIONS = ("restated_financials", "summary_financials", "objects_of_issue", "risk_factors", "peer_comparison")
+
+# Ordered: the first full-line match wins. `None` marks other DRHP sections, which only end ours.
+_HEADINGS: List[Tuple[Optional[str], re.Pattern]] = [(name, re.compile(p)) for name, p in [
+    (None, r"OTHER FINANCIAL INFORMATION"),
+    ("restated_financials", r"RESTATED (CONSOLIDATED |STANDALONE )?FINANCIAL (INFORMATION|STATEMENTS)"),
+    ("summary_financials", r"SUMMARY (OF )?(THE )?(RESTATED )?FINANCIAL (INFORMATION|STATEMENTS)"),
+    ("restated_financials", r"FINANCIAL (INFORMATION|STATEMENTS)"),
+    ("objects_of_issue", r"OBJECTS? OF THE (ISSUE|OFFER)"),
+    ("risk_factors", r"RISK FACTORS"),
+    ("peer_comparison", r"BASIS (FOR|OF) (THE )?(ISSUE|OFFER) PRICE"),
+    (None, r"(DEFINITIONS AND ABBREVIATIONS|(OFFER DOCUMENT|PROSPECTUS) SUMMARY|SUMMARY OF THE "
+           r"(OFFER DOCUMENT|PROSPECTUS)|GENERAL INFORMATION|CAPITAL STRUCTURE|THE (ISSUE|OFFER)|"
+           r"INDUSTRY OVERVIEW|OUR BUSINESS|KEY (INDUSTRY )?REGULATIONS AND POLICIES.*|"
+           r"HISTORY AND CERTAIN CORPORATE MATTERS|OUR MANAGEMENT|OUR PROMOTERS?( AND PROMOTER GROUP)?|"
+           r"(OUR )?GROUP COMPANIES|DIVIDEND POLICY|MANAGEMENT.S DISCUSSION AND ANALYSIS.*|"
+           r"CAPITALI[SZ]ATION STATEMENT|FINANCIAL INDEBTEDNESS|OUTSTANDING LITIGATION.*|"
+           r"GOVERNMENT AND OTHER APPROVALS|OTHER REGULATORY AND STATUTORY DISCLOSURES|"
+           r"(ISSUE|OFFER) (STRUCTURE|PROCEDURE)|TERMS OF THE (ISSUE|OFFER)|"
+           r"(MAIN )?PROVISIONS OF THE ARTICLES OF ASSOCIATION|MATERIAL CONTRACTS.*|DECLARATION|"
+           r"STATEMENT OF (POSSIBLE )?SPECIAL TAX BENEFITS|FORWARD.LOOKING STATEMENTS|"
+           r"CERTAIN CONVENTIONS.*|SECTION [IVXL]+)"),
+]]
+_SECTION_PREFIX = re.compile(r"^SECTION [IVXL]+\s*[:\-–—]\s*")
+_CONTINUED = re.compile(r"\s*\(CONTINUED\)$")
+
+
+# ---------- per-page work (runs in pool workers) ----------
+def _pymupdf():
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf  # PyMuPDF < 1.24
+        except ImportError as e:
+            raise ImportError("DRHP extraction needs PyMuPDF: pip install pymupdf") from e
+    return pymupdf
+
+
+def _page_heading(text: str) -> Tuple[Optional[str], bool]:
+    """(section name | None, matched any heading) from the first few non-empty lines."""
+    hits: List[Optional[str]] = []
+    seen = 0
+    for line in text.splitlines():
+        line = " ".join(line.split()).upper()
+        if not line:
+            continue
+        seen += 1
+        if seen > _HEAD_LINES:
+            break
+        line = _CONTINUED.sub("", _SECTION_PREFIX.sub("", line))
+        for name, pat in _HEADINGS:
+            if pat.fullmatch(line):
+                hits.append(name)
+                break
+    if not hits:
+        return None, False
+    named = [h for h in hits if h is not None]
+    return (named[-1] if named else None), True
+
+
+def _is_toc(text: str) -> bool:
+    up = text.upper()
+    if "TABLE OF CONTENTS" in up[:400]:
+        return True
+    # a contents page names most sections with page numbers; a real page opens just one
+    return sum(1 for name, pat in _HEADINGS
+               if name and re.search(pat.pattern + r"[\s.]+\d+\s*$", up, re.M)) >= 3
+
+
+def _extract_range(path: str, start: int, end: int) -> List[Tuple[int, Optional[str], bool, str]]:
+    """[(page number, heading section, heading matched, text)] for pages start..end-1."""
+    out = []
+    with _pymupdf().open(path) as doc:
+        for pno in range(start, min(end, doc.page_count)):
+            text = doc.load_page(pno).get_text("text") or ""
+            if _is_toc(text):
+                out.append((pno, None, False, ""))
+                continue
+            name, matched = _page_heading(text)
+            out.append((pno, name, matched, text))
+    return out
+
+
+# ---------- section assembly ----------
+class _Sections:
+    """Consumes pages in order and keeps text only while inside a wanted section."""
+
+    def __init__(self, max_chars: int = MAX_SECTION_CHARS):
+        self.max_chars = max_chars
+        self.current: Optional[str] = None
+        self.parts: Dict[str, List[str]] = {}
+        self.sizes: Dict[str, int] = {}
+        self.pages: Dict[str, List[int]] = {}
+        self.truncated: Dict[str, bool] = {}
+
+    def feed(self, pno: int, name: Optional[str], matched: bool, text: str) -> None:
+        if matched and name != self.current:
+            # a section is read once: the first occurrence is the real one, later mentions are running text
+            self.current = name if name not in self.pages else None
+        if self.current is None or not text:
+            return
+        sec = self.current
+        self.pages.setdefault(sec, [pno + 1, pno + 1])[1] = pno + 1
+        if self.sizes.get(sec, 0) >= self.max_chars:
+            self.truncated[sec] = True
+            return
+        self.parts.setdefault(sec, []).append(text)
+        self.sizes[sec] = self.sizes.get(sec, 0) + len(text)
+
+    def result(self) -> Dict[str, Dict]:
+        return {
+            sec: {"pages": self.pages[sec], "text": "\n".join(self.parts.get(sec, [])),
+                  "truncated": self.truncated.get(sec, False)}
+            for sec in SECTIONS if sec in self.pages
+        }
+
+
+# ---------- financials ----------
+_NUM = re.compile(r"^\(?-?\s*[\d,]*\d(?:\.\d+)?\)?%?$")
+_ROWS = {
+    "revenue": r"revenue from operations",
+    "pat": r"(restated )?(net )?profit (after tax|for the (year|period))",
+    "net_worth": r"(net ?worth|total equity)",
+    "borrowings": r"total (borrowings|debt)",
+    "roe": r"return on (average )?(net ?worth|equity)",
+    "de": r"(total )?debt[\s-]*(to|/)[\s-]*equity",
+    "eps": r"(basic )?(earnings per (equity )?share|eps)",
+}
+_ROW_PATS = {k: re.compile(r"^" + p + r"\b", re.I) for k, p in _ROWS.items()}
+_INDUSTRY_PE = re.compile(r"industry\s+(p\s*/\s*e|price\s*[/-]?\s*(to\s*)?earnings?)", re.I)
+_AVERAGE = re.compile(r"average\s*[:\-–]?\s*(\d+(?:\.\d+)?)", re.I)
+
+
+def _num(tok: str) -> Optional[float]:
+    tok = tok.strip().replace(",", "").rstrip("%").replace(" ", "")
+    neg = tok.startswith("(") and tok.endswith(")")
+    tok = tok.strip("()")
+    try:
+        v = float(tok)
+    except ValueError:
+        return None
+    return -v if neg else v
+
+
+def _row_values(lines: List[str], i: int, label_end: int, max_vals: int = 5) -> List[float]:
+    """Numbers after a row label: rest of the label line, then following numeric-only lines."""
+    vals: List[float] = []
+    for tok in lines[i][label_end:].split():
+        if _NUM.match(tok):
+            v = _num(tok)
+            if v is not None:
+                vals.append(v)
+    for line in lines[i + 1:i + 1 + max_vals * 2]:
+        toks = line.split()
+        if not toks or not all(_NUM.match(t) for t in toks):
+            if vals:
+                break
+            continue  # PyMuPDF often puts each cell on its own line; tolerate a wrapped label
+        vals.extend(v for v in (_num(t) for t in toks) if v is not None)
+        if len(vals) >= max_vals:
+            break
+    return vals[:max_vals]
+
+
+def parse_financials(text: str) -> Dict[str, List[float]]:
+    """
+    First occurrence of each key row (revenue, profit, net worth, borrowings, ROE, D/E, EPS).
+    Columns are taken latest-first, the usual DRHP layout (Fiscal N, N-1, N-2).
+    """
+    found: Dict[str, List[float]] = {}
+    lines = [" ".join(l.split()) for l in text.splitlines()]
+    for i, line in enumerate(lines):
+        for key, pat in _ROW_PATS.items():
+            if key in found:
+                continue
+            m = pat.match(line)
+            if m:
+                vals = _row_values(lines, i, m.end())
+                if vals:
+                    found[key] = vals
+                break
+        if len(found) == len(_ROW_PATS):
+            break
+    return found
+
+
+def parse_peer_pe(text: str) -> Optional[float]:
+    """Industry / peer average P/E from the Basis for Offer Price section."""
+    for m in _INDUSTRY_PE.finditer(text or ""):
+        a = _AVERAGE.search(text, m.end(), m.end() + 400)
+        if a:
+            return float(a.group(1))
+    return None
+
+
+def to_fundamentals(financials: Dict[str, List[float]], peer_pe: Optional[float]) -> Dict:
+    """Same keys as fundamentals.ratios.get_fundamentals; P/E stays None until a price is set."""
+    from ipobot.fundamentals.ratios import _revenue_cagr, _safe_div, _round
+
+    def first(key):
+        v = financials.get(key) or []
+        return v[0] if v else None
+
+    roe = first("roe")
+    if roe is None:
+        r = _safe_div(first("pat"), first("net_worth"))
+        roe = None if r is None else r * 100.0
+    de = first("de")
+    if de is None:
+        de = _safe_div(first("borrowings"), first("net_worth"))
+    cagr = _revenue_cagr(financials.get("revenue") or [], min_years=3)
+    return {
+        "P/E": None,
+        "Peer P/E": _round(peer_pe),
+        "ROE (%)": _round(roe),
+        "D/E": _round(de),
+        "Revenue CAGR (%)": _round(None if cagr is None else cagr * 100.0),
+        "P/E discount vs peer (%)": None,
+    }
+
+
+# ---------- cache ----------
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_memo_lock = threading.Lock()
+
+
+def document_hash(path: str) -> str:
+    """sha256 of the file contents, memoized per (path, size, mtime) within the process."""
+    p = pathlib.Path(path).resolve()
+    st = p.stat()
+    key = (str(p), st.st_size, st.st_mtime_ns)
+    with _memo_lock:
+        if key in _hash_memo:
+            return _hash_memo[key]
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    with _memo_lock:
+        _hash_memo[key] = digest
+    return digest
+
+
+def _cache_path(doc_hash: str, cache_dir: pathlib.Path) -> pathlib.Path:
+    return cache_dir / f"{doc_hash}-v{EXTRACTOR_VERSION}.json.gz"
+
+
+def _cache_write(path: pathlib.Path, data: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(gzip.compress(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# ---------- public ----------
+def extract_from_pdf(pdf_path: str, *, workers: Optional[int] = None, chunk_pages: int = CHUNK_PAGES,
+                     cache_dir: Optional[str] = None, use_cache: bool = True,
+                     company: Optional[str] = None, index=True) -> Dict:
+    """
+    Parse a DRHP PDF. Returns
+      {doc_hash, path, pages, sections: {name: {pages: [first, last], text, truncated}},
+       financials: {row: [latest, ...]}, fundamentals: {...get_fundamentals keys...},
+       extractor_version, elapsed_ms, cached}
+    `index` (True = the default drhp_index.DRHPIndex, or an instance; False to skip) receives
+    the sections under `company` (default: from the file name). Requires PyMuPDF (`pip install pymupdf`).
+    """
+    t0 = time.perf_counter()
+    cdir = pathlib.Path(cache_dir) if cache_dir else CACHE_DIR
+    doc_hash = document_hash(pdf_path)
+    cpath = _cache_path(doc_hash, cdir)
+    if use_cache:
+        try:
+            data = json.loads(gzip.decompress(cpath.read_bytes()))
+            cache_event("drhp", True)
+            data.update({"path": str(pdf_path), "cached": True})
+            _feed_index(index, data, company)
+            data["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            return data
+        except (FileNotFoundError, ValueError, OSError):
+            cache_event("drhp", False)
+
+    with _pymupdf().open(pdf_path) as doc:
+        n_pages = doc.page_count
+
+    chunk_pages = max(1, int(chunk_pages))
+    ranges = [(s, min(s + chunk_pages, n_pages)) for s in range(0, n_pages, chunk_pages)]
+    workers = workers if workers is not None else min(len(ranges), os.cpu_count() or 1)
+    sections = _Sections()
+    path = str(pdf_path)
+
+    if workers <= 1 or len(ranges) <= 1:
+        for s, e in ranges:
+            for page in _extract_range(path, s, e):
+                sections.feed(*page)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # in order, at most 2 ranges per worker in flight: only those pages' text is ever held
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            pending: deque = deque()
+            it = iter(ranges)
+            for s, e in it:
+                pending.append(ex.submit(_extract_range, path, s, e))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                for page in pending.popleft().result():
+                    sections.feed(*page)
+                nxt = next(it, None)
+                if nxt is not None:
+                    pending.append(ex.submit(_extract_range, path, *nxt))
+
+    secs = sections.result()
+    fin_text = "\n".join(secs[s]["text"] for s in ("summary_financials", "restated_financials") if s in secs)
+    financials = parse_financials(fin_text)
+    peer_pe = parse_peer_pe(secs.get("peer_comparison", {}).get("text", ""))
+    data = {
+        "doc_hash": doc_hash,
+        "pages": n_pages,
+        "extractor_version": EXTRACTOR_VERSION,
+        "sections": secs,
+        "financials": financials,
+        "fundamentals": to_fundamentals(financials, peer_pe),
+    }
+    if use_cache:
+        try:
+            _cache_write(cpath, data)
+        except OSError:
+            pass  # read-only checkout: still return the result
+    data.update({"path": path, "cached": False})
+    _feed_index(index, data, company)
+    data["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return data
+
+
+def _feed_index(index, data: Dict, company: Optional[str]) -> None:
+    if not index:
+        return
+    import sqlite3
+    from ipobot.data.drhp_index import default_index
+
+    try:
+        (default_index() if index is True else index).add(data, company)
+    except (sqlite3.Error, OSError):
+        pass  # search is a convenience; never fail an extraction over it
+
+
+def _norm(s: str) -> str:
+    s = (s or "").strip()
+    for suf in (".NS", ".BO"):
+        if s.upper().endswith(suf):
+            s = s[: -len(suf)]
+    s = re.sub(r"\b(ipo|drhp|rhp|limited|ltd)\b", "", s, flags=re.I)
+    return re.sub(r"[^a-z0-9]", "", s.lower())
+
+
+def find_drhp(symbol_or_name: str, cfg: Optional[Dict] = None) -> Optional[str]:
+    """A `<name>.pdf` under config `drhp.dir` matching the symbol or company name, if any."""
+    d = ((cfg or {}).get("drhp") or {}).get("dir")
+    if not d or not symbol_or_name:
+        return None
+    root = pathlib.Path(d)
+    if not root.is_absolute():
+        root = ROOT / root
+    want = _norm(symbol_or_name)
+    if not want or not root.is_dir():
+        return None
+    for p in sorted(root.glob("*.pdf")):
+        if _norm(p.stem) == want:
+            return str(p)
+    return None
+
+
+def fill_from_drhp(fins: Dict, pdf_path: str, **kwargs) -> List[str]:
+    """
+    Fill the fundamentals fields live providers left empty with DRHP figures (not-yet-listed
+    companies). Returns the filled keys; each is credited to 'drhp' in meta.field_sources.
+    """
+    from ipobot.metrics import field_source
+    from ipobot.fundamentals.ratios import _pct, _round
+
+    d = extract_from_pdf(pdf_path, **kwargs)["fundamentals"]
+    filled = []
+    for k, v in d.items():
+        if v is not None and fins.get(k) is None:
+            fins[k] = v
+            filled.append(k)
+            field_source(k, "drhp")
+    if fins.get("P/E discount vs peer (%)") is None and fins.get("P/E") is not None \
+            and fins.get("Peer P/E") not in (None, 0):
+        fins["P/E discount vs peer (%)"] = _round(_pct(1 - fins["P/E"] / fins["Peer P/E"]))
+    return filled
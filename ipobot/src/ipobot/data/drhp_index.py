@@ -0,0 +1,201 @@
+# src/ipobot/data/drhp_index.py
+# Full-text index over extracted DRHP sections (SQLite FTS5, BM25 ranking).
+#
+# drhp_extractor.extract_from_pdf feeds every document it parses; a document is
+# (re)indexed only when its hash or the extractor version is new, so feeding is cheap.
+#
+#   python -m ipobot.data.drhp_index add drhp/*.pdf
+#   python -m ipobot.data.drhp_index search "related party" --section risk_factors
+#   python -m ipobot.data.drhp_index search "contingent liabilities" --company "acme foods"
+
+from __future__ import annotations
+
+import argparse, json, pathlib, re, sqlite3, sys, time
+from typing import Dict, List, Optional
+
+from ipobot.config import ROOT
+
+DEFAULT_DB = ROOT / ".cache" / "drhp" / "index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_hash TEXT PRIMARY KEY,
+    company TEXT NOT NULL,
+    path TEXT,
+    pages INTEGER,
+    extractor_version INTEGER,
+    indexed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS docs_company ON docs(company COLLATE NOCASE);
+CREATE VIRTUAL TABLE IF NOT EXISTS sections USING fts5(
+    text,
+    company UNINDEXED,
+    section UNINDEXED,
+    doc_hash UNINDEXED,
+    first_page UNINDEXED,
+    last_page UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+"""
+
+
+def company_from_path(path: str) -> str:
+    """'drhp/Acme Foods Ltd - DRHP.pdf' -> 'Acme Foods Ltd'."""
+    stem = pathlib.Path(path).stem
+    stem = re.sub(r"[\s_\-]*\b(drhp|rhp|draft red herring prospectus)\b.*$", "", stem, flags=re.I)
+    return " ".join(re.sub(r"[_\-]+", " ", stem).split()) or pathlib.Path(path).stem
+
+
+def to_match(query: str) -> str:
+    """Plain words -> one FTS5 phrase per quoted part, AND-ed: related party "fair value" ->
+    "related party" "fair value". Use raw=True in search() for FTS5 operators (OR, NEAR, prefix*)."""
+    phrases = re.findall(r'"([^"]+)"', query)
+    rest = re.sub(r'"[^"]*"', " ", query).split()
+    if rest:
+        phrases.insert(0, " ".join(rest))
+    return " ".join('"' + p.replace('"', "") + '"' for p in phrases if p.strip())
+
+
+class DRHPIndex:
+    """One SQLite file; a short-lived connection per call so threads/processes can share it."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = pathlib.Path(path) if path else DEFAULT_DB
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=30)
+        con.row_factory = sqlite3.Row
+        if not self._ready:
+            con.execute("PRAGMA journal_mode=WAL")  # persistent; lets searches run during indexing
+            con.executescript(_SCHEMA)
+            self._ready = True
+        return con
+
+    def has(self, doc_hash: str, extractor_version: Optional[int] = None) -> bool:
+        con = self._connect()
+        try:
+            row = con.execute("SELECT extractor_version FROM docs WHERE doc_hash = ?", (doc_hash,)).fetchone()
+        finally:
+            con.close()
+        return row is not None and (extractor_version is None or row[0] == extractor_version)
+
+    def add(self, extracted: Dict, company: Optional[str] = None) -> bool:
+        """Index one extract_from_pdf() result. Returns False when it was already up to date."""
+        h, ver = extracted["doc_hash"], extracted.get("extractor_version")
+        company = company or company_from_path(extracted.get("path") or h)
+        con = self._connect()
+        try:
+            with con:  # one transaction: readers never see a half-indexed document
+                row = con.execute("SELECT extractor_version, company FROM docs WHERE doc_hash = ?", (h,)).fetchone()
+                if row is not None and row[0] == ver and row[1] == company:
+                    return False
+                con.execute("DELETE FROM sections WHERE doc_hash = ?", (h,))
+                con.execute("INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?, ?, ?)",
+                            (h, company, extracted.get("path"), extracted.get("pages"), ver,
+                             time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())))
+                con.executemany(
+                    "INSERT INTO sections (text, company, section, doc_hash, first_page, last_page) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(s["text"], company, name, h, s["pages"][0], s["pages"][1])
+                     for name, s in (extracted.get("sections") or {}).items() if s.get("text")])
+            return True
+        finally:
+            con.close()
+
+    def remove(self, doc_hash: str) -> None:
+        con = self._connect()
+        try:
+            with con:
+                con.execute("DELETE FROM sections WHERE doc_hash = ?", (doc_hash,))
+                con.execute("DELETE FROM docs WHERE doc_hash = ?", (doc_hash,))
+        finally:
+            con.close()
+
+    def search(self, query: str, *, section: Optional[str] = None, company: Optional[str] = None,
+               limit: int = 20, raw: bool = False) -> List[Dict]:
+        """
+        BM25-ranked hits (best first): {company, section, doc_hash, pages, score, snippet}.
+        `company` matches case-insensitively as a substring.
+        """
+        match = query if raw else to_match(query)
+        if not match:
+            return []
+        sql = ("SELECT company, section, doc_hash, first_page, last_page, bm25(sections) AS score, "
+               "snippet(sections, 0, '[', ']', ' … ', 16) AS snippet FROM sections WHERE sections MATCH ?")
+        args: List = [match]
+        if section:
+            sql += " AND section = ?"
+            args.append(section)
+        if company:
+            sql += " AND company LIKE ?"
+            args.append(f"%{company}%")
+        sql += " ORDER BY score LIMIT ?"
+        args.append(int(limit))
+        con = self._connect()
+        try:
+            rows = con.execute(sql, args).fetchall()
+        finally:
+            con.close()
+        return [{"company": r["company"], "section": r["section"], "doc_hash": r["doc_hash"],
+                 "pages": [r["first_page"], r["last_page"]], "score": round(-r["score"], 4),
+                 "snippet": r["snippet"]} for r in rows]
+
+    def documents(self) -> List[Dict]:
+        con = self._connect()
+        try:
+            return [dict(r) for r in con.execute("SELECT * FROM docs ORDER BY company")]
+        finally:
+            con.close()
+
+
+_default: Optional[DRHPIndex] = None
+
+
+def default_index() -> DRHPIndex:
+    global _default
+    if _default is None:
+        _default = DRHPIndex()
+    return _default
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Search stored DRHP sections")
+    p.add_argument("--db", default=None, help=f"Index file (default: {DEFAULT_DB})")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    a = sub.add_parser("add", help="Extract (or load cached) and index DRHP PDFs")
+    a.add_argument("pdfs", nargs="+")
+    a.add_argument("--company", default=None, help="Company name (default: from the file name)")
+    s = sub.add_parser("search", help="Ranked full-text query")
+    s.add_argument("query")
+    s.add_argument("--section", default=None,
+                   help="restated_financials | summary_financials | objects_of_issue | risk_factors | peer_comparison")
+    s.add_argument("--company", default=None)
+    s.add_argument("--limit", type=int, default=20)
+    s.add_argument("--raw", action="store_true", help="Pass the query through as FTS5 syntax")
+    sub.add_parser("list", help="Indexed documents")
+    args = p.parse_args(argv)
+
+    idx = DRHPIndex(args.db)
+    if args.cmd == "add":
+        from ipobot.data.drhp_extractor import extract_from_pdf
+        for pdf in args.pdfs:
+            r = extract_from_pdf(pdf, company=args.company, index=idx)
+            print(f"{pdf}: {r['pages']} pages, sections: {', '.join(r['sections']) or '-'}"
+                  f"{' (cached)' if r['cached'] else ''}")
+    elif args.cmd == "search":
+        t0 = time.perf_counter()
+        hits = idx.search(args.query, section=args.section, company=args.company, limit=args.limit, raw=args.raw)
+        for h in hits:
+            print(json.dumps(h, ensure_ascii=False))
+        print(f"{len(hits)} hits in {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+    else:
+        for d in idx.documents():
+            print(json.dumps(d, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
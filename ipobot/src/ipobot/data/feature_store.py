@@ -0,0 +1,234 @@
+# src/ipobot/data/feature_store.py
+# Columnar store of every analysis: inputs (sentiment, fundamentals, the model's feature
+# vector) and outputs (probability, decision), one row per (symbol, timestamp).
+#
+#   <dir>/date=YYYY-MM-DD/part-<time>-<pid>-<id>.parquet      (Hive partitioning, UTC dates)
+#
+# Appends go to an in-memory buffer and are written as one Parquet part per flush
+# (every `flush_rows` rows, on flush()/exit, or per row in pool worker processes).
+# Readers use pyarrow.dataset with memory-mapped files, partition pruning and column
+# projection, so analytics / retraining / batch scoring never re-run a network stage.
+#
+#   feature_store:
+#     enabled: true
+#     dir: "feature_store"
+#     flush_rows: 256
+
+from __future__ import annotations
+
+import atexit, datetime as dt, os, pathlib, threading, uuid
+from typing import Dict, Iterable, List, Optional
+
+from ipobot.config import ROOT
+from ipobot.model.predict import FEATURES, feature_vector
+from ipobot.records import Fundamentals
+
+DEFAULT_DIR = ROOT / "feature_store"
+FLUSH_ROWS = 256
+X_COLUMNS = [f"x_{f}" for f in FEATURES]
+
+# column -> pyarrow type name (kept as strings so importing this module stays cheap)
+SCHEMA = [
+    ("ts", "timestamp"), ("symbol", "string"), ("query", "string"),
+    ("sentiment", "float64"),
+    ("pe", "float64"), ("peer_pe", "float64"), ("roe_pct", "float64"), ("de", "float64"),
+    ("revenue_cagr_pct", "float64"), ("pe_discount_pct", "float64"), ("fundamental_score", "float64"),
+    *[(c, "float64") for c in X_COLUMNS],
+    ("probability", "float64"), ("expected_gain_pct", "float64"), ("decision", "string"),
+    ("buy_prob", "float64"), ("hold_prob", "float64"),
+    ("partial", "bool"), ("model_path", "string"), ("elapsed_ms", "float64"),
+]
+COLUMNS = [c for c, _ in SCHEMA]
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    types = {"timestamp": pa.timestamp("ms", tz="UTC"), "string": pa.string(),
+             "float64": pa.float64(), "bool": pa.bool_()}
+    return pa.schema([(c, types[t]) for c, t in SCHEMA])
+
+
+def _f(v) -> Optional[float]:
+    try:
+        return None if v is None else float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def row_from_result(res: Dict, thresholds: Optional[Dict] = None, ts: Optional[dt.datetime] = None) -> Dict:
+    """Flatten a run_pipeline() result into one store row (feature vector recomputed exactly)."""
+    fund = Fundamentals.from_dict(res.get("fundamentals") or {})
+    fdetail = res.get("fundamental_details") or {}
+    x = feature_vector(res.get("sentiment"), fdetail)
+    thr = thresholds or {}
+    score = None
+    comps = fdetail.get("components")
+    if isinstance(comps, dict):
+        score = sum(_f(v) or 0.0 for v in comps.values())
+    row = {
+        "ts": ts or dt.datetime.now(dt.timezone.utc),
+        "symbol": res.get("symbol"),
+        "query": res.get("query"),
+        "sentiment": _f(res.get("sentiment")),
+        **fund.to_dict(),  # canonical names are the store's columns
+        "fundamental_score": score,
+        "probability": _f(res.get("probability")),
+        "expected_gain_pct": _f(res.get("expected_gain_pct")),
+        "decision": res.get("decision"),
+        "buy_prob": _f(thr.get("buy_prob")),
+        "hold_prob": _f(thr.get("hold_prob")),
+        "partial": bool(res.get("partial")),
+        "model_path": (res.get("meta") or {}).get("model_path"),
+        "elapsed_ms": _f((res.get("meta") or {}).get("elapsed_ms")),
+    }
+    row.update(dict(zip(X_COLUMNS, x)))
+    return row
+
+
+class FeatureStore:
+    def __init__(self, root: Optional[os.PathLike] = None, flush_rows: int = FLUSH_ROWS):
+        self.root = pathlib.Path(root) if root else DEFAULT_DIR
+        self.flush_rows = max(1, int(flush_rows))
+        self._buf: List[Dict] = []
+        self._lock = threading.Lock()
+
+    # ---------- write ----------
+    def append(self, row: Dict) -> None:
+        with self._lock:
+            self._buf.append(row)
+            full = len(self._buf) >= self.flush_rows
+        if full or _in_worker_process():
+            self.flush()  # pool workers exit without running atexit: never hold rows there
+
+    def append_result(self, res: Dict, thresholds: Optional[Dict] = None) -> None:
+        self.append(row_from_result(res, thresholds))
+
+    def flush(self) -> List[str]:
+        """Write buffered rows, one Parquet part per date partition. Returns the new files."""
+        with self._lock:
+            rows, self._buf = self._buf, []
+        if not rows:
+            return []
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        by_date: Dict[str, List[Dict]] = {}
+        for r in rows:
+            by_date.setdefault(r["ts"].astimezone(dt.timezone.utc).date().isoformat(), []).append(r)
+        schema = _arrow_schema()
+        written = []
+        stamp = dt.datetime.now(dt.timezone.utc).strftime("%H%M%S%f")
+        for day, part in by_date.items():
+            d = self.root / f"date={day}"
+            d.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pylist(part, schema=schema)
+            name = f"part-{stamp}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+            tmp = d / f".{name}.tmp"  # dot-prefixed: ignored by readers until renamed
+            pq.write_table(table, tmp, compression="zstd")
+            os.replace(tmp, d / name)
+            written.append(str(d / name))
+        return written
+
+    def compact(self, day: Optional[str] = None) -> int:
+        """Merge each date partition's small parts into one file. Returns partitions rewritten."""
+        import pyarrow.parquet as pq
+
+        self.flush()
+        n = 0
+        for d in sorted(self.root.glob(f"date={day}" if day else "date=*")):
+            parts = sorted(d.glob("part-*.parquet"))
+            if len(parts) < 2:
+                continue
+            table = pq.read_table(parts, schema=_arrow_schema())
+            name = f"part-{dt.datetime.now(dt.timezone.utc).strftime('%H%M%S%f')}-compact-{uuid.uuid4().hex[:8]}.parquet"
+            tmp = d / f".{name}.tmp"
+            pq.write_table(table.sort_by([("ts", "ascending")]), tmp, compression="zstd")
+            os.replace(tmp, d / name)
+            for p in parts:
+                p.unlink()
+            n += 1
+        return n
+
+    # ---------- read ----------
+    def dataset(self):
+        import pyarrow.dataset as ds
+        from pyarrow.fs import LocalFileSystem
+
+        return ds.dataset(str(self.root), format="parquet", partitioning="hive", schema=None,
+                          filesystem=LocalFileSystem(use_mmap=True), exclude_invalid_files=False,
+                          ignore_prefixes=[".", "_"])
+
+    def read(self, columns: Optional[Iterable[str]] = None, *, start: Optional[str] = None,
+             end: Optional[str] = None, symbols: Optional[Iterable[str]] = None):
+        """
+        pyarrow.Table of `columns` (default: all) for dates in [start, end] (YYYY-MM-DD) and
+        optional symbols. Only matching partitions are opened, only requested columns decoded.
+        """
+        import pyarrow.dataset as ds
+
+        self.flush()
+        if not self.root.is_dir():
+            return _arrow_schema().empty_table().select(list(columns) if columns else COLUMNS)
+        data = self.dataset()
+        date = ds.field("date").cast("string")
+        flt = None
+        for cond in ((date >= start) if start else None, (date <= end) if end else None,
+                     ds.field("symbol").isin(list(symbols)) if symbols else None):
+            if cond is not None:
+                flt = cond if flt is None else flt & cond
+        return data.to_table(columns=list(columns) if columns else COLUMNS, filter=flt)
+
+    def features(self, **kwargs):
+        """(X as float64 ndarray in FEATURES order, symbols, ts) for retraining / batch scoring."""
+        import numpy as np
+
+        t = self.read(X_COLUMNS + ["symbol", "ts"], **kwargs)
+        X = np.column_stack([t.column(c).to_numpy(zero_copy_only=False) for c in X_COLUMNS]) \
+            if t.num_rows else np.empty((0, len(X_COLUMNS)))
+        return X.astype(float, copy=False), t.column("symbol").to_pylist(), t.column("ts").to_pylist()
+
+
+def _in_worker_process() -> bool:
+    import multiprocessing
+
+    return multiprocessing.parent_process() is not None
+
+
+_default: Optional[FeatureStore] = None
+_default_lock = threading.Lock()
+
+
+def from_config(cfg: Optional[Dict]) -> Optional[FeatureStore]:
+    """Process-wide store from config `feature_store` (None when disabled)."""
+    global _default
+    fs_cfg = (cfg or {}).get("feature_store") or {}
+    if not fs_cfg.get("enabled", False):
+        return None
+    root = pathlib.Path(fs_cfg.get("dir") or DEFAULT_DIR)
+    if not root.is_absolute():
+        root = ROOT / root
+    with _default_lock:
+        if _default is None or _default.root != root:
+            if _default is not None:
+                _default.flush()
+            _default = FeatureStore(root, flush_rows=int(fs_cfg.get("flush_rows", FLUSH_ROWS)))
+            atexit.register(_flush_quietly, _default)
+        return _default
+
+
+def _flush_quietly(store: FeatureStore) -> None:
+    try:
+        store.flush()
+    except Exception:
+        pass
+
+
+def record(res: Dict, cfg: Optional[Dict], thresholds: Optional[Dict] = None) -> None:
+    """Append one run_pipeline() result if the store is enabled. Never raises."""
+    try:
+        store = from_config(cfg)
+        if store is not None:
+            store.append_result(res, thresholds)
+    except Exception:
+        pass  # persistence must never break an analysis
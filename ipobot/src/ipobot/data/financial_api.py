@@ -1,8 +1,11 @@
 
 from __future__ import annotations
 
-from typing import Dict, List
-from ipobot.fundamentals.ratios import get_fundamentals as _ratios_get
+from typing import Dict, List, Optional
+from ipobot.config import load_config
+from ipobot.deadline import expired, timeout_for
+from ipobot.metrics import field_source
+from ipobot.fundamentals.ratios import get_fundamentals as _ratios_get, _pct, _round
 
 
 
@@ -10,11 +13,44 @@ def _try_tickers(symbol: str) -> List[str]:
     s = (symbol or "").strip()
     return [s] if s else []
 
-def get_fundamentals(symbol: str, use_live: bool = False) -> Dict:
+def get_fundamentals(symbol: str, use_live: bool = False, deadline=None,
+                     peer_symbols: Optional[List[str]] = None, name: Optional[str] = None) -> Dict:
     """
     Thin wrapper that delegates to fundamentals.ratios.get_fundamentals().
     `use_live` is reserved for future caching/toggling—ignored here.
+    `deadline` (ipobot.deadline.Deadline) is passed through to every provider call.
+    Peer P/E comes from `peer_symbols`, else config financials.peer_sets / peer_symbols
+    (see fundamentals/peers.py); it is fetched while the symbol's own cascade runs.
     Returns a dict of fundamentals (UI-style keys inside the ratios module).
     """
-  
-    return _ratios_get(symbol, peer_pe=None) or {}
+    from ipobot.fundamentals import peers as _peers
+
+    fin_cfg = (load_config() or {}).get("financials") or {}
+    if peer_symbols is None:
+        peer_symbols = _peers.peer_symbols_for(symbol, {"financials": fin_cfg}, name=name)
+    else:
+        peer_symbols = [p for p in peer_symbols if p and p != symbol]
+    fut = None
+    if peer_symbols:
+        fut = _peers.peer_pe_async(peer_symbols, deadline=deadline,
+                                   ttl=float(fin_cfg.get("peer_cache_ttl_s", _peers.PEER_TTL)))
+
+    res = _ratios_get(symbol, peer_pe=None, deadline=deadline) or {}
+    if fut is None:
+        return res
+
+    try:
+        stats = fut.result(timeout=timeout_for(deadline, 60.0))
+    except Exception:
+        if expired(deadline):
+            res["partial"] = True  # peers did not finish inside the budget
+        return res
+    stat = "trimmed_mean" if fin_cfg.get("peer_pe_stat") == "trimmed_mean" else "median"
+    peer = stats.get(stat)
+    res["Peer P/E"] = _round(peer)
+    res["peer_pe_stats"] = stats
+    if peer is not None:
+        field_source("Peer P/E", f"peers:{stat}")
+        if res.get("P/E") is not None and peer != 0:
+            res["P/E discount vs peer (%)"] = _round(_pct(1 - res["P/E"] / peer))
+    return res
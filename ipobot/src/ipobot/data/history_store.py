@@ -0,0 +1,367 @@
+# src/ipobot/data/history_store.py
+# Every run_pipeline() result, queryable by symbol, decision and time (SQLite, WAL mode):
+# "what is the latest call on X", "every BUY this week", "how did the call on X change over
+# its subscription window".
+#
+# Writes never block an analysis: record() serialises the result and puts it on a queue; one
+# writer thread drains it in batches (up to `flush_rows` per transaction, at least every
+# `flush_interval_s`). Pool worker processes write synchronously instead (they exit without
+# atexit), and the queue is flushed on exit.
+#
+#   history_store:
+#     enabled: true
+#     path: "history/history.sqlite"
+#     flush_rows: 64
+#     flush_interval_s: 2.0
+#
+#   python -m ipobot.data.history_store latest                 # newest run per symbol
+#   python -m ipobot.data.history_store runs ZOMATO.NS --start 2025-01-01 --decision BUY
+#   python -m ipobot.data.history_store changes ZOMATO.NS      # runs where the call changed
+#   python -m ipobot.data.history_store diff ZOMATO.NS         # last two runs, field by field
+
+from __future__ import annotations
+
+import argparse, atexit, datetime as dt, json, pathlib, queue, sqlite3, sys, threading, time
+from typing import Dict, List, Optional, Union
+
+from ipobot.config import ROOT
+
+DEFAULT_DB = ROOT / "history" / "history.sqlite"
+FLUSH_ROWS = 64
+FLUSH_INTERVAL_S = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,               -- epoch seconds the result was recorded
+    symbol TEXT NOT NULL,
+    query TEXT,
+    decision TEXT,
+    probability REAL,
+    expected_gain_pct REAL,
+    sentiment REAL,
+    buy_prob REAL,
+    hold_prob REAL,
+    partial INTEGER,
+    model_path TEXT,
+    elapsed_ms REAL,
+    result TEXT NOT NULL            -- full result JSON
+);
+CREATE INDEX IF NOT EXISTS runs_symbol_ts ON runs (symbol, ts);
+CREATE INDEX IF NOT EXISTS runs_decision_ts ON runs (decision, ts);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+"""
+COLUMNS = ["id", "ts", "symbol", "query", "decision", "probability", "expected_gain_pct", "sentiment",
+           "buy_prob", "hold_prob", "partial", "model_path", "elapsed_ms"]
+_INSERT = f"INSERT INTO runs ({', '.join(COLUMNS[1:])}, result) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+# scalar fields compared by diff(), as (label, path into the result)
+DIFF_FIELDS = [
+    ("decision", ("decision",)),
+    ("probability", ("probability",)),
+    ("expected_gain_pct", ("expected_gain_pct",)),
+    ("sentiment", ("sentiment",)),
+    ("buy_prob", ("meta", "thresholds", "buy_prob")),
+    ("hold_prob", ("meta", "thresholds", "hold_prob")),
+    ("partial", ("partial",)),
+    ("model_path", ("meta", "model_path")),
+]
+
+Time = Union[None, float, int, str, dt.date, dt.datetime]
+
+
+def _ts(t: Time) -> Optional[float]:
+    """Epoch seconds from epoch / ISO date or datetime (naive = local time, like the scheduler)."""
+    if t is None or isinstance(t, (int, float)):
+        return t
+    if isinstance(t, str):
+        t = dt.datetime.fromisoformat(t)
+    if not isinstance(t, dt.datetime):
+        t = dt.datetime(t.year, t.month, t.day)
+    return t.timestamp()
+
+
+def _get(d, path):
+    for k in path:
+        d = d.get(k) if isinstance(d, dict) else None
+    return d
+
+
+def row_from_result(res: Dict, ts: Optional[float] = None) -> tuple:
+    """INSERT parameters for one result (serialised here, so later mutation of `res` is harmless)."""
+    meta = res.get("meta") or {}
+    thr = meta.get("thresholds") or {}
+    return (ts or time.time(), str(res.get("symbol") or "").upper(), res.get("query"), res.get("decision"),
+            res.get("probability"), res.get("expected_gain_pct"), res.get("sentiment"),
+            thr.get("buy_prob"), thr.get("hold_prob"), int(bool(res.get("partial"))),
+            meta.get("model_path"), meta.get("elapsed_ms"),
+            json.dumps(res, ensure_ascii=False, default=str))
+
+
+class HistoryStore:
+    """Append-only run history; a short-lived connection per read and per written batch."""
+
+    def __init__(self, path: Optional[str] = None, flush_rows: int = FLUSH_ROWS,
+                 flush_interval_s: float = FLUSH_INTERVAL_S):
+        self.path = pathlib.Path(path) if path else DEFAULT_DB
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval_s = max(0.01, float(flush_interval_s))
+        self._ready = False
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        if not self._ready:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+            self._ready = True
+        con.execute("PRAGMA synchronous=NORMAL")  # WAL: durable at checkpoint, no fsync per commit
+        return con
+
+    # ---------- write ----------
+    def append(self, res: Dict) -> None:
+        """Queue one result for the writer thread (O(serialise); never waits on SQLite)."""
+        self._ensure_writer()
+        self._q.put(row_from_result(res))
+
+    def write(self, rows: List[tuple]) -> None:
+        """Insert rows now, in one transaction."""
+        if not rows:
+            return
+        con = self._connect()
+        try:
+            with con:
+                con.executemany(_INSERT, rows)
+        finally:
+            con.close()
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Wait until everything queued so far is written. False on timeout."""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._q.put(("__flush__", done))
+        return done.wait(timeout)
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._drain, name="ipobot-history", daemon=True)
+                self._writer.start()
+
+    def _drain(self) -> None:
+        while True:
+            batch: List[tuple] = []
+            waiters: List[threading.Event] = []
+            item = self._q.get()
+            deadline = time.monotonic() + self.flush_interval_s
+            while True:
+                if len(item) == 2 and item[0] == "__flush__":
+                    waiters.append(item[1])
+                    break  # write now
+                batch.append(item)
+                if len(batch) >= self.flush_rows:
+                    break
+                try:
+                    item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as e:
+                print(f"[history] dropped {len(batch)} rows: {type(e).__name__}: {e}", file=sys.stderr)
+            for w in waiters:
+                w.set()
+
+    # ---------- read ----------
+    def _select(self, sql: str, params: tuple = (), full: bool = False) -> List[Dict]:
+        cols = COLUMNS + (["result"] if full else [])
+        con = self._connect()
+        try:
+            rows = con.execute(sql.format(cols=", ".join(f"r.{c}" for c in cols)), params).fetchall()
+        finally:
+            con.close()
+        out = [dict(zip(cols, r)) for r in rows]
+        for o in out:
+            o["partial"] = bool(o["partial"])
+            if full:
+                o["result"] = json.loads(o["result"])
+        return out
+
+    def latest(self, symbol: Optional[str] = None, full: bool = False) -> Union[Optional[Dict], List[Dict]]:
+        """Newest run for `symbol` (None if never run), or the newest run of every symbol."""
+        if symbol:
+            rows = self._select("SELECT {cols} FROM runs r WHERE r.symbol = ? ORDER BY r.ts DESC, r.id DESC LIMIT 1",
+                                (symbol.upper(),), full)
+            return rows[0] if rows else None
+        return self._select("SELECT {cols} FROM runs r JOIN (SELECT symbol, MAX(id) AS id FROM runs GROUP BY symbol) m "
+                            "ON r.id = m.id ORDER BY r.ts DESC", (), full)
+
+    def runs(self, symbol: Optional[str] = None, *, start: Time = None, end: Time = None,
+             decision: Optional[str] = None, limit: Optional[int] = None, full: bool = False) -> List[Dict]:
+        """Runs in [start, end) (any of the filters optional), oldest first."""
+        where, params = [], []
+        for cond, v in (("r.symbol = ?", symbol.upper() if symbol else None), ("r.ts >= ?", _ts(start)),
+                        ("r.ts < ?", _ts(end)), ("r.decision = ?", decision.upper() if decision else None)):
+            if v is not None:
+                where.append(cond)
+                params.append(v)
+        sql = "SELECT {cols} FROM runs r" + (" WHERE " + " AND ".join(where) if where else "")
+        if limit:  # the newest `limit`, still returned oldest first
+            sql = f"SELECT * FROM ({sql} ORDER BY r.ts DESC, r.id DESC LIMIT {int(limit)}) ORDER BY ts, id"
+        else:
+            sql += " ORDER BY r.ts, r.id"
+        return self._select(sql, tuple(params), full)
+
+    def records(self, symbol: Optional[str] = None, **filters) -> List:
+        """runs() as compact records.AnalysisRecord (for holding many IPO-days in memory)."""
+        from ipobot.records import AnalysisRecord
+
+        return [AnalysisRecord.from_result(r["result"], ts=r["ts"]) for r in self.runs(symbol, full=True, **filters)]
+
+    def changes(self, symbol: str, *, start: Time = None, end: Time = None) -> List[Dict]:
+        """Runs whose decision differs from the previous run of `symbol` (the first run included)."""
+        out, prev = [], object()
+        for r in self.runs(symbol, start=start, end=end):
+            if r["decision"] != prev:
+                out.append(r)
+                prev = r["decision"]
+        return out
+
+    def get(self, run_id: int) -> Optional[Dict]:
+        rows = self._select("SELECT {cols} FROM runs r WHERE r.id = ?", (int(run_id),), full=True)
+        return rows[0] if rows else None
+
+    def diff(self, symbol: Optional[str] = None, a: Optional[int] = None, b: Optional[int] = None) -> Optional[Dict]:
+        """
+        Field-by-field difference between runs `a` and `b` (ids; default: the two newest runs of
+        `symbol`): {'from', 'to', 'changes': {field: [old, new]}} over DIFF_FIELDS, fundamentals
+        and attributions. None when there are fewer than two runs.
+        """
+        if a is None or b is None:
+            last = self._select("SELECT {cols} FROM runs r WHERE r.symbol = ? ORDER BY r.ts DESC, r.id DESC LIMIT 2",
+                                ((symbol or "").upper(),), full=True)
+            if len(last) < 2:
+                return None
+            old, new = last[1], last[0]
+        else:
+            old, new = self.get(a), self.get(b)
+            if old is None or new is None:
+                return None
+        ro, rn = old["result"], new["result"]
+        changes: Dict[str, list] = {}
+        for label, path in DIFF_FIELDS:
+            vo, vn = _get(ro, path), _get(rn, path)
+            if vo != vn:
+                changes[label] = [vo, vn]
+        for group in ("fundamentals",):
+            fo, fn = ro.get(group) or {}, rn.get(group) or {}
+            for k in sorted(set(fo) | set(fn)):
+                if fo.get(k) != fn.get(k):
+                    changes[f"{group}.{k}"] = [fo.get(k), fn.get(k)]
+        po, pn = (ro.get("attributions") or {}).get("phi") or {}, (rn.get("attributions") or {}).get("phi") or {}
+        for k in sorted(set(po) | set(pn)):
+            if po.get(k) != pn.get(k):
+                changes[f"attributions.{k}"] = [po.get(k), pn.get(k)]
+        head = lambda r: {k: r[k] for k in ("id", "ts", "symbol", "decision", "probability")}
+        return {"from": head(old), "to": head(new), "changes": changes}
+
+
+def _in_worker_process() -> bool:
+    import multiprocessing
+
+    return multiprocessing.parent_process() is not None
+
+
+_default: Optional[HistoryStore] = None
+_default_lock = threading.Lock()
+
+
+def from_config(cfg: Optional[Dict]) -> Optional[HistoryStore]:
+    """Process-wide store from config `history_store` (None when disabled)."""
+    global _default
+    h_cfg = (cfg or {}).get("history_store") or {}
+    if not h_cfg.get("enabled", False):
+        return None
+    path = pathlib.Path(h_cfg.get("path") or DEFAULT_DB)
+    if not path.is_absolute():
+        path = ROOT / path
+    with _default_lock:
+        if _default is None or _default.path != path:
+            if _default is not None:
+                _default.flush()
+            _default = HistoryStore(path, flush_rows=int(h_cfg.get("flush_rows", FLUSH_ROWS)),
+                                    flush_interval_s=float(h_cfg.get("flush_interval_s", FLUSH_INTERVAL_S)))
+            atexit.register(_flush_quietly, _default)
+        return _default
+
+
+def _flush_quietly(store: HistoryStore) -> None:
+    try:
+        store.flush(timeout=5.0)
+    except Exception:
+        pass
+
+
+def record(res: Dict, cfg: Optional[Dict]) -> None:
+    """Append one run_pipeline() result if the store is enabled. Never raises."""
+    try:
+        store = from_config(cfg)
+        if store is None:
+            return
+        if _in_worker_process():
+            store.write([row_from_result(res)])  # pool workers exit without atexit: never queue there
+        else:
+            store.append(res)
+    except Exception:
+        pass  # persistence must never break an analysis
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Pipeline result history")
+    p.add_argument("--db", default=None, help=f"Store file (default: {DEFAULT_DB})")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    l = sub.add_parser("latest", help="Newest run per symbol (or of one symbol)")
+    l.add_argument("symbol", nargs="?")
+    r = sub.add_parser("runs", help="Runs in a time range")
+    r.add_argument("symbol", nargs="?")
+    r.add_argument("--start", help="ISO date/datetime (inclusive)")
+    r.add_argument("--end", help="ISO date/datetime (exclusive)")
+    r.add_argument("--decision", choices=["BUY", "HOLD", "AVOID"])
+    r.add_argument("--limit", type=int, default=None)
+    c = sub.add_parser("changes", help="Runs where the decision on a symbol changed")
+    c.add_argument("symbol")
+    c.add_argument("--start")
+    c.add_argument("--end")
+    d = sub.add_parser("diff", help="Two runs field by field (default: the newest two of SYMBOL)")
+    d.add_argument("symbol", nargs="?")
+    d.add_argument("--a", type=int, help="Older run id")
+    d.add_argument("--b", type=int, help="Newer run id")
+    args = p.parse_args(argv)
+
+    store = HistoryStore(args.db)
+    if args.cmd == "latest":
+        got = store.latest(args.symbol)
+        rows = [got] if isinstance(got, dict) else (got or [])
+    elif args.cmd == "runs":
+        rows = store.runs(args.symbol, start=args.start, end=args.end, decision=args.decision, limit=args.limit)
+    elif args.cmd == "changes":
+        rows = store.changes(args.symbol, start=args.start, end=args.end)
+    else:
+        got = store.diff(args.symbol, args.a, args.b)
+        rows = [got] if got else []
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+    if not rows:
+        print("(empty)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,7 @@
 
 from __future__ import annotations
 from typing import List, Dict
-import requests, datetime as dt
+import os, requests, datetime as dt
 from bs4 import BeautifulSoup
 
 Headers = {"User-Agent": "Mozilla/5.0 (compatible; IPOBot/1.0)"}
@@ -101,6 +101,9 @@ def merge_and_dedupe(lists: List[List[Dict]]) -> List[Dict]:
 
 def fetch_upcoming_ipos() -> List[Dict]:
     """Public, no-key calendar aggregator with graceful fallbacks."""
+    if os.getenv("IPOBOT_REPLAY"):
+        from ipobot.data.replay import ensure_from_env
+        ensure_from_env()
     items: List[Dict] = []
     try:
         items.extend(fetch_chittorgarh())
@@ -1,9 +1,11 @@
 # src/ipobot/data/lookup.py
 from __future__ import annotations
 from typing import Optional, Dict, Tuple, Any
-import os, requests, json
+import requests, json
 from pathlib import Path
-from ipobot.config import load_config   # keep this import
+from ipobot.config import load_config, getenv   # keep this import
+from ipobot.deadline import expired, timeout_for
+from ipobot.metrics import provider_call, cache_event
 
 # ---- default seed mappings (you can keep editing these) ----
 NAME_TO_SYMBOL: Dict[str, str] = {
@@ -47,8 +49,15 @@ def _save_persistent_mappings() -> None:
         pass
 
 
-# Load any saved mappings at import time
-_load_persistent_mappings()
+# Saved mappings are merged on first lookup (not at import time)
+_mappings_loaded = False
+
+def _ensure_mappings() -> Dict[str, str]:
+    global _mappings_loaded
+    if not _mappings_loaded:
+        _mappings_loaded = True
+        _load_persistent_mappings()
+    return NAME_TO_SYMBOL
 
 
 def _normalize_symbol(sym: Optional[str]) -> Optional[str]:
@@ -112,25 +121,29 @@ def _load_lookup_cfg() -> tuple[str, Optional[str]]:
            or cfg.get("news", {}).get("symbol_lookup")
            or {}) or {}
     provider = (lut.get("provider") or "finnhub").lower()
-    api_key = lut.get("api_key") or os.getenv("FINNHUB_API_KEY") or os.getenv("FINNHUB_TOKEN")
+    api_key = lut.get("api_key") or getenv("FINNHUB_API_KEY", "FINNHUB_TOKEN")
     return provider, api_key
 
 
-def resolve_symbol(ipo_name: str) -> tuple[Optional[str], bool]:
+def resolve_symbol(ipo_name: str, deadline=None) -> tuple[Optional[str], bool]:
     """
     Returns (symbol, learned)
     learned=True when we discovered it via API and saved to mappings.json
+    `deadline` (ipobot.deadline.Deadline) caps the live lookup.
     """
     if not ipo_name:
         return None, False
     name_key = ipo_name.strip().lower()
+    _ensure_mappings()
 
     # 1) local/persisted
     if name_key in NAME_TO_SYMBOL:
+        cache_event("symbol_mapping", True)
         return _normalize_symbol(NAME_TO_SYMBOL[name_key]), False
+    cache_event("symbol_mapping", False)
 
     # 2) live lookup
-    symbol = fetch_symbol_from_api(ipo_name)
+    symbol = None if expired(deadline) else fetch_symbol_from_api(ipo_name, deadline=deadline)
     if symbol:
         symbol = _normalize_symbol(symbol)  # ensure normalized before saving/returning
         if symbol:
@@ -141,7 +154,7 @@ def resolve_symbol(ipo_name: str) -> tuple[Optional[str], bool]:
     return None, False
 
 
-def fetch_symbol_from_api(ipo_name: str) -> Optional[str]:
+def fetch_symbol_from_api(ipo_name: str, deadline=None) -> Optional[str]:
     """
     Uses config symbol_lookup to pick provider. Default: finnhub.
     Supported provider(s):
@@ -155,7 +168,9 @@ def fetch_symbol_from_api(ipo_name: str) -> Optional[str]:
         url = "https://finnhub.io/api/v1/search"
         params = {"q": ipo_name, "token": api_key}
         try:
-            r = requests.get(url, params=params, timeout=6)
+            with provider_call("finnhub", "search") as c:
+                r = requests.get(url, params=params, timeout=timeout_for(deadline, 6))
+                c.response(r)
             r.raise_for_status()
             data = r.json() or {}
             results = data.get("result") or []
@@ -1,7 +1,11 @@
 # src/ipobot/data/news_scraper.py
-from typing import List, Dict
-import os, requests, html, urllib.parse
-import feedparser  # optional but used for RSS fallback
+from typing import List, Dict, Optional
+import datetime as dt, requests, html, urllib.parse
+from ipobot.config import getenv
+from ipobot.deadline import expired, timeout_for
+from ipobot.metrics import provider_call
+
+NEWS_TIMEOUT = 12  # seconds (per request; shrunk to the remaining budget when a deadline is given)
 
 # ================= sentiment heuristic (swap for FinBERT later) =================
 def _rule_sentiment(title: str) -> str:
@@ -28,19 +32,34 @@ def _from_config():
         news_cfg = (cfg.get("news") or {})
         return {
             "provider": (news_cfg.get("provider") or "gnews").lower(),
-            "api_key": news_cfg.get("api_key") or os.getenv("GNEWS_API_KEY") or os.getenv("NEWSAPI_KEY"),
+            "api_key": news_cfg.get("api_key") or getenv("GNEWS_API_KEY", "NEWSAPI_KEY"),
             "language": news_cfg.get("language", "en"),
             "page_size": int(news_cfg.get("page_size", 8)),
         }
     except Exception:
         # Safe defaults
-        return {"provider": "gnews", "api_key": os.getenv("GNEWS_API_KEY"), "language": "en", "page_size": 8}
+        return {"provider": "gnews", "api_key": getenv("GNEWS_API_KEY"), "language": "en", "page_size": 8}
 
 # ================= providers ====================================================
-def _newsapi_fetch(query: str, api_key: str, lang: str, n: int) -> List[Dict]:
+def _iso(d: Optional[dt.datetime]) -> Optional[str]:
+    """UTC ISO-8601 with a Z suffix (what GNews / NewsAPI expect for `from`)."""
+    if d is None:
+        return None
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=dt.timezone.utc)
+    return d.astimezone(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _article(title: str, url: Optional[str], published: Optional[str]) -> Dict:
+    return {"title": title, "sent": _rule_sentiment(title), "url": url or None, "published": published or None}
+
+def _newsapi_fetch(query: str, api_key: str, lang: str, n: int, deadline=None, since=None) -> List[Dict]:
     url = "https://newsapi.org/v2/everything"
     params = {"q": query, "language": lang, "pageSize": n, "sortBy": "publishedAt", "apiKey": api_key}
-    r = requests.get(url, params=params, timeout=12)
+    if since is not None:
+        params["from"] = _iso(since)
+    with provider_call("newsapi", "everything") as c:
+        r = requests.get(url, params=params, timeout=timeout_for(deadline, NEWS_TIMEOUT))
+        c.response(r)
     try:
         r.raise_for_status()
     except requests.HTTPError:
@@ -52,14 +71,18 @@ def _newsapi_fetch(query: str, api_key: str, lang: str, n: int) -> List[Dict]:
     for a in (data.get("articles") or []):
         title = html.unescape(a.get("title") or "").strip()
         if title:
-            items.append({"title": title, "sent": _rule_sentiment(title)})
+            items.append(_article(title, a.get("url"), a.get("publishedAt")))
     return items
 
-def _gnews_fetch(query: str, api_key: str, lang: str, n: int) -> List[Dict]:
+def _gnews_fetch(query: str, api_key: str, lang: str, n: int, deadline=None, since=None) -> List[Dict]:
     # Docs: https://gnews.io/docs/v4#search
     url = "https://gnews.io/api/v4/search"
     params = {"q": query, "lang": lang, "max": n, "token": api_key, "sortby": "publishedAt"}
-    r = requests.get(url, params=params, timeout=12)
+    if since is not None:
+        params["from"] = _iso(since)
+    with provider_call("gnews", "search") as c:
+        r = requests.get(url, params=params, timeout=timeout_for(deadline, NEWS_TIMEOUT))
+        c.response(r)
     try:
         r.raise_for_status()
     except requests.HTTPError:
@@ -71,25 +94,46 @@ def _gnews_fetch(query: str, api_key: str, lang: str, n: int) -> List[Dict]:
     for a in (data.get("articles") or []):
         title = html.unescape((a.get("title") or "")).strip()
         if title:
-            items.append({"title": title, "sent": _rule_sentiment(title)})
+            items.append(_article(title, a.get("url"), a.get("publishedAt")))
     return items
 
-def _google_rss_fetch(query: str, lang: str, n: int) -> List[Dict]:
-    # No key needed; Google News RSS
+def _google_rss_fetch(query: str, lang: str, n: int, deadline=None, since=None) -> List[Dict]:
+    # No key needed; Google News RSS (feedparser only imported when this fallback runs)
+    import feedparser
+    if since is not None:
+        query = f"{query} after:{since.date().isoformat()}"  # day granularity; callers dedupe
     q = urllib.parse.quote(query)
     url = f"https://news.google.com/rss/search?q={q}&hl={lang}"
-    feed = feedparser.parse(url)
+    with provider_call("google_rss", "search") as c:
+        if deadline is None or deadline.remaining() is None:
+            feed = feedparser.parse(url)
+            c.status = getattr(feed, "status", None)
+            c.ok = not getattr(feed, "bozo", False)
+        else:
+            # feedparser's own fetch has no timeout -> fetch with requests, parse the bytes
+            try:
+                r = requests.get(url, timeout=timeout_for(deadline, NEWS_TIMEOUT))
+                c.response(r)
+                feed = feedparser.parse(r.content)
+            except Exception:
+                c.ok = False
+                feed = feedparser.parse(b"")
     items: List[Dict] = []
     for e in (feed.entries or [])[:n]:
         title = html.unescape(getattr(e, "title", "")).strip()
         if title:
-            items.append({"title": title, "sent": _rule_sentiment(title)})
+            pp = getattr(e, "published_parsed", None)
+            published = _iso(dt.datetime(*pp[:6], tzinfo=dt.timezone.utc)) if pp else None
+            items.append(_article(title, getattr(e, "link", None), published))
     return items or [{"title": f"{query}: no recent articles (RSS)", "sent": "neutral"}]
 
 # ================= main entry ===================================================
-def fetch_news_items(query: str, use_live: bool = False) -> List[Dict]:
+def fetch_news_items(query: str, use_live: bool = False, deadline=None,
+                     since: Optional[dt.datetime] = None) -> List[Dict]:
     """
-    Return a list of dicts: {title, sent}. If use_live=False -> simulated sample.
+    Return a list of dicts: {title, sent[, url, published]}. If use_live=False -> simulated sample.
+    `deadline` (ipobot.deadline.Deadline) caps every request; the RSS fallback is skipped once it expires.
+    `since` asks providers for articles published after it only (used by data/news_store.py).
     """
     if not use_live:
         return [
@@ -109,16 +153,16 @@ def fetch_news_items(query: str, use_live: bool = False) -> List[Dict]:
         if not api_key:
             items = [{"title": f"{query}: GNews key missing", "sent": "neutral"}]
         else:
-            items = _gnews_fetch(query, api_key, lang, n)
+            items = _gnews_fetch(query, api_key, lang, n, deadline=deadline, since=since)
 
     elif provider == "newsapi":
         if not api_key:
             items = [{"title": f"{query}: NewsAPI key missing", "sent": "neutral"}]
         else:
-            items = _newsapi_fetch(query, api_key, lang, n)
+            items = _newsapi_fetch(query, api_key, lang, n, deadline=deadline, since=since)
 
     elif provider == "google_rss":
-        items = _google_rss_fetch(query, lang, n)
+        items = _google_rss_fetch(query, lang, n, deadline=deadline, since=since)
 
     else:
         items = [{"title": f"{query}: unknown provider '{provider}'", "sent": "neutral"}]
@@ -127,6 +171,7 @@ def fetch_news_items(query: str, use_live: bool = False) -> List[Dict]:
     need_fallback = (not items) or any("live fetch failed" in (it.get("title") or "") for it in items)
     if need_fallback and provider != "google_rss":
         items = [it for it in items if "live fetch failed" not in (it.get("title") or "")]
-        items.extend(_google_rss_fetch(query, lang, n))
+        if not expired(deadline):
+            items.extend(_google_rss_fetch(query, lang, n, deadline=deadline, since=since))
 
     return items
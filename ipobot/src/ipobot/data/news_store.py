@@ -0,0 +1,327 @@
+# src/ipobot/data/news_store.py
+# Persistent per-IPO article store with a time-decayed sentiment aggregate (SQLite).
+#
+# A refresh asks providers only for articles published after the newest one stored,
+# inserts what is new (deduplicated by URL and by normalised-title hash), scores just
+# those articles and folds them into an exponentially weighted mean whose weights halve
+# every `half_life_days`. Each update appends a snapshot, so the sentiment trend of an
+# IPO is a query, not a recomputation. Cost per refresh: O(new articles).
+#
+#   news_store:
+#     enabled: true
+#     path: "news_store/news.sqlite"
+#     half_life_days: 3
+#
+#   python -m ipobot.data.news_store list
+#   python -m ipobot.data.news_store trend ZOMATO.NS
+#   python -m ipobot.data.news_store articles ZOMATO.NS --limit 20
+
+from __future__ import annotations
+
+import argparse, datetime as dt, hashlib, json, pathlib, re, sqlite3, sys, threading, time
+from typing import Dict, List, Optional
+
+from ipobot.config import ROOT
+from ipobot.deadline import expired
+
+DEFAULT_DB = ROOT / "news_store" / "news.sqlite"
+HALF_LIFE_DAYS = 3.0
+OVERLAP_S = 3600  # re-ask for the last hour: providers index late and RSS is day-granular
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    ipo TEXT NOT NULL,
+    id TEXT NOT NULL,            -- sha1 of the URL
+    title_hash TEXT NOT NULL,    -- sha1 of the normalised title (same story, other URL)
+    url TEXT,
+    title TEXT,
+    sent TEXT,
+    published_ts REAL,           -- epoch seconds (fetch time when the provider gave none)
+    fetched_ts REAL,
+    score REAL,                  -- NULL until scored
+    PRIMARY KEY (ipo, id),
+    UNIQUE (ipo, title_hash)
+);
+CREATE INDEX IF NOT EXISTS articles_recent ON articles(ipo, published_ts DESC);
+CREATE TABLE IF NOT EXISTS ipos (
+    ipo TEXT PRIMARY KEY,
+    last_published_ts REAL,
+    last_refresh_ts REAL,
+    ewm_sum REAL NOT NULL DEFAULT 0,     -- decayed sum of scores as of ewm_ts
+    ewm_weight REAL NOT NULL DEFAULT 0,  -- decayed article count as of ewm_ts
+    ewm_ts REAL,
+    n_articles INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    ipo TEXT NOT NULL,
+    ts REAL NOT NULL,
+    sentiment REAL,
+    weight REAL,
+    n_articles INTEGER,
+    n_new INTEGER
+);
+CREATE INDEX IF NOT EXISTS snapshots_ipo ON snapshots(ipo, ts);
+"""
+
+
+def _sha1(s: str) -> str:
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+def _norm_title(title: str) -> str:
+    # drop the " - Publisher" tail Google News appends, punctuation and case
+    t = re.sub(r"\s+[-|–]\s+[^-|–]{1,60}$", "", title or "")
+    return " ".join(re.sub(r"[^\w\s]", " ", t.lower()).split())
+
+
+def _ts(published: Optional[str]) -> Optional[float]:
+    if not published:
+        return None
+    try:
+        d = dt.datetime.fromisoformat(str(published).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=dt.timezone.utc)
+    return d.timestamp()
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return None if ts is None else dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _item(r) -> Dict:
+    return {"title": r["title"], "sent": r["sent"], "url": r["url"], "published": _iso(r["published_ts"]),
+            "score": r["score"]}
+
+
+class NewsStore:
+    """One SQLite file; a short-lived connection per call so threads/processes can share it."""
+
+    def __init__(self, path: Optional[str] = None, half_life_days: float = HALF_LIFE_DAYS):
+        self.path = pathlib.Path(path) if path else DEFAULT_DB
+        self.half_life_s = float(half_life_days) * 86400.0
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=30, isolation_level=None)  # explicit transactions
+        con.row_factory = sqlite3.Row
+        if not self._ready:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+            self._ready = True
+        return con
+
+    # ---------- articles ----------
+    def last_published(self, ipo: str) -> Optional[dt.datetime]:
+        con = self._connect()
+        try:
+            row = con.execute("SELECT last_published_ts FROM ipos WHERE ipo = ?", (ipo,)).fetchone()
+        finally:
+            con.close()
+        if row is None or row[0] is None:
+            return None
+        return dt.datetime.fromtimestamp(row[0], dt.timezone.utc)
+
+    def add(self, ipo: str, items: List[Dict], fetched_ts: Optional[float] = None) -> List[Dict]:
+        """Insert provider items that have a URL; returns the ones that were new."""
+        now = fetched_ts or time.time()
+        rows = []
+        for it in items or []:
+            url, title = (it.get("url") or "").strip(), (it.get("title") or "").strip()
+            if not url or not title:
+                continue  # placeholders ("key missing", simulated samples) are not articles
+            rows.append((ipo, _sha1(url), _sha1(_norm_title(title) or title), url, title,
+                         it.get("sent") or "neutral", _ts(it.get("published")) or now, now))
+        if not rows:
+            return []
+        con = self._connect()
+        try:
+            new = []
+            con.execute("BEGIN IMMEDIATE")
+            for r in rows:
+                if con.execute("INSERT OR IGNORE INTO articles (ipo, id, title_hash, url, title, sent, "
+                               "published_ts, fetched_ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", r).rowcount:
+                    new.append(r)
+            newest = max((r[6] for r in rows), default=None)
+            con.execute(
+                "INSERT INTO ipos (ipo, last_published_ts, last_refresh_ts, n_articles) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(ipo) DO UPDATE SET last_refresh_ts = excluded.last_refresh_ts, "
+                "last_published_ts = max(coalesce(last_published_ts, 0), excluded.last_published_ts), "
+                "n_articles = n_articles + ?",
+                (ipo, newest, now, len(new), len(new)))
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        finally:
+            con.close()
+        return [{"title": r[4], "sent": r[5], "url": r[3], "published": _iso(r[6])} for r in new]
+
+    def recent(self, ipo: str, n: int = 8) -> List[Dict]:
+        con = self._connect()
+        try:
+            rows = con.execute("SELECT * FROM articles WHERE ipo = ? ORDER BY published_ts DESC LIMIT ?",
+                               (ipo, int(n))).fetchall()
+        finally:
+            con.close()
+        return [_item(r) for r in rows]
+
+    def refresh(self, ipo: str, query: str, *, deadline=None, n: int = 8) -> Dict:
+        """
+        Fetch articles newer than the last stored one and insert the new ones.
+        {'items': newest `n` stored (or the provider's answer when nothing is storable), 'new': count}.
+        """
+        from ipobot.data.news_scraper import fetch_news_items
+
+        last = self.last_published(ipo)
+        since = None if last is None else last - dt.timedelta(seconds=OVERLAP_S)
+        fetched = fetch_news_items(query, use_live=True, deadline=deadline, since=since)
+        new = self.add(ipo, fetched)
+        items = self.recent(ipo, n)
+        return {"items": items or fetched, "new": len(new)}
+
+    # ---------- sentiment ----------
+    def _fold(self, state, ts: float, score: float):
+        """Add one (ts, score) to (sum, weight, ref_ts), decaying to the newer of the two times."""
+        s, w, ref = state
+        if ref is None:
+            return score, 1.0, ts
+        if ts >= ref:
+            f = 0.5 ** ((ts - ref) / self.half_life_s)
+            return s * f + score, w * f + 1.0, ts
+        f = 0.5 ** ((ref - ts) / self.half_life_s)  # late arrival: weigh it by its age instead
+        return s + f * score, w + f, ref
+
+    def update_sentiment(self, ipo: str, scorer=None, deadline=None) -> Optional[Dict]:
+        """
+        Score the IPO's unscored articles (only those) and fold them into the EWMA.
+        With the budget gone, articles stay unscored for the next call. Returns aggregate().
+        """
+        con = self._connect()
+        try:
+            pending = con.execute("SELECT id, title, sent, published_ts FROM articles "
+                                  "WHERE ipo = ? AND score IS NULL ORDER BY published_ts", (ipo,)).fetchall()
+        finally:
+            con.close()
+        if pending and not expired(deadline):
+            if scorer is None:
+                from ipobot.nlp.sentiment import item_scores as scorer
+            scores = scorer([{"title": r["title"], "sent": r["sent"]} for r in pending], deadline=deadline)
+            self._apply_scores(ipo, [(r["id"], r["published_ts"], float(sc)) for r, sc in zip(pending, scores)])
+        return self.aggregate(ipo)
+
+    def _apply_scores(self, ipo: str, scored: List[tuple]) -> None:
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")  # serialises the read-modify-write across processes
+            row = con.execute("SELECT ewm_sum, ewm_weight, ewm_ts, n_articles FROM ipos WHERE ipo = ?",
+                              (ipo,)).fetchone()
+            state = (row[0], row[1], row[2]) if row else (0.0, 0.0, None)
+            n_new = 0
+            for aid, ts, score in scored:
+                # a concurrent caller may have scored it already: fold each article exactly once
+                if con.execute("UPDATE articles SET score = ? WHERE ipo = ? AND id = ? AND score IS NULL",
+                               (score, ipo, aid)).rowcount:
+                    state = self._fold(state, ts, score)
+                    n_new += 1
+            if n_new:
+                con.execute("UPDATE ipos SET ewm_sum = ?, ewm_weight = ?, ewm_ts = ? WHERE ipo = ?",
+                            (*state, ipo))
+                con.execute("INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                            (ipo, time.time(), state[0] / state[1] if state[1] else None, state[1],
+                             row[3] if row else None, n_new))
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        finally:
+            con.close()
+
+    def aggregate(self, ipo: str, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        {'sentiment': EWMA in [-1, 1], 'weight': effective article count decayed to now,
+        'n_articles', 'last_published', 'last_refresh'} or None before the first scored article.
+        """
+        con = self._connect()
+        try:
+            row = con.execute("SELECT * FROM ipos WHERE ipo = ?", (ipo,)).fetchone()
+        finally:
+            con.close()
+        if row is None or not row["ewm_weight"]:
+            return None
+        age = max(0.0, (now or time.time()) - row["ewm_ts"])
+        return {
+            "sentiment": round(row["ewm_sum"] / row["ewm_weight"], 4),
+            "weight": round(row["ewm_weight"] * 0.5 ** (age / self.half_life_s), 3),
+            "n_articles": row["n_articles"],
+            "last_published": _iso(row["last_published_ts"]),
+            "last_refresh": _iso(row["last_refresh_ts"]),
+        }
+
+    def trend(self, ipo: str, since: Optional[float] = None) -> List[Dict]:
+        """Sentiment snapshots (oldest first): {'ts', 'sentiment', 'weight', 'n_articles', 'n_new'}."""
+        con = self._connect()
+        try:
+            rows = con.execute("SELECT * FROM snapshots WHERE ipo = ? AND ts >= ? ORDER BY ts",
+                               (ipo, since or 0.0)).fetchall()
+        finally:
+            con.close()
+        return [{"ts": _iso(r["ts"]), "sentiment": r["sentiment"], "weight": r["weight"],
+                 "n_articles": r["n_articles"], "n_new": r["n_new"]} for r in rows]
+
+    def ipos(self) -> List[Dict]:
+        con = self._connect()
+        try:
+            rows = con.execute("SELECT ipo FROM ipos ORDER BY last_refresh_ts DESC").fetchall()
+        finally:
+            con.close()
+        return [{"ipo": r["ipo"], **(self.aggregate(r["ipo"]) or {})} for r in rows]
+
+
+_default: Optional[NewsStore] = None
+_default_lock = threading.Lock()
+
+
+def from_config(cfg: Optional[Dict]) -> Optional[NewsStore]:
+    """Process-wide store from config `news_store` (None when disabled)."""
+    global _default
+    ns_cfg = (cfg or {}).get("news_store") or {}
+    if not ns_cfg.get("enabled", False):
+        return None
+    path = pathlib.Path(ns_cfg.get("path") or DEFAULT_DB)
+    if not path.is_absolute():
+        path = ROOT / path
+    half_life = float(ns_cfg.get("half_life_days", HALF_LIFE_DAYS))
+    with _default_lock:
+        if _default is None or _default.path != path or _default.half_life_s != half_life * 86400.0:
+            _default = NewsStore(path, half_life_days=half_life)
+        return _default
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Per-IPO article store and sentiment trend")
+    p.add_argument("--db", default=None, help=f"Store file (default: {DEFAULT_DB})")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="IPOs with their current EWMA sentiment")
+    t = sub.add_parser("trend", help="Sentiment snapshots for one IPO")
+    t.add_argument("ipo")
+    a = sub.add_parser("articles", help="Newest stored articles for one IPO")
+    a.add_argument("ipo")
+    a.add_argument("--limit", type=int, default=20)
+    args = p.parse_args(argv)
+
+    store = NewsStore(args.db)
+    rows = (store.ipos() if args.cmd == "list" else
+            store.trend(args.ipo) if args.cmd == "trend" else store.recent(args.ipo, args.limit))
+    for r in rows:
+        print(json.dumps(r, ensure_ascii=False))
+    if not rows:
+        print("(empty)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,351 @@
+# src/ipobot/data/replay.py
+# Record / replay of outbound provider responses.
+#
+#   record: every HTTP response (Finnhub, FMP, Alpha Vantage, NSE, GNews, NewsAPI, RSS,
+#           Chittorgarh, IPOWatch) is saved to a gzip'd, content-addressed store keyed by the
+#           normalized request (method + host/path + sorted params, API keys stripped).
+#   replay: the same requests are answered from the store; nothing touches the network.
+#
+# Enable with `--record [DIR]` / `--replay [DIR]` on the CLI, or IPOBOT_REPLAY=record|replay
+# (+ IPOBOT_REPLAY_DIR). Env vars are inherited by batch process-pool workers.
+
+from __future__ import annotations
+
+import gzip, hashlib, json, os, pathlib, tempfile, threading, time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from ipobot.config import ROOT
+
+DEFAULT_DIR = ROOT / ".replay"
+
+# Query params that carry credentials: never part of a key, never written to disk
+SECRET_PARAMS = {"token", "apikey", "apiKey", "api_key", "key"}
+_DROP_HEADERS = {"set-cookie", "content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+# ---------- request normalization ----------
+def request_key(method: str, url: str) -> Tuple[str, str, Tuple[Tuple[str, str], ...]]:
+    """(METHOD, host+path, sorted non-secret params) — stable across API keys and param order."""
+    u = urlsplit(url)
+    params = tuple(sorted((k, v) for k, v in parse_qsl(u.query, keep_blank_values=True)
+                          if k not in SECRET_PARAMS))
+    path = u.path.rstrip("/") or "/"
+    return (method.upper(), f"{u.netloc.lower()}{path}", params)
+
+
+def request_hash(method: str, url: str, body: Optional[bytes] = None) -> str:
+    m, hp, params = request_key(method, url)
+    h = hashlib.sha256(json.dumps([m, hp, params], ensure_ascii=False).encode("utf-8"))
+    if body:
+        h.update(b"\0" + hashlib.sha256(body).digest())
+    return h.hexdigest()
+
+
+def redact_url(url: str) -> str:
+    u = urlsplit(url)
+    q = [(k, v) for k, v in parse_qsl(u.query, keep_blank_values=True) if k not in SECRET_PARAMS]
+    return urlunsplit((u.scheme, u.netloc, u.path, urlencode(q), ""))
+
+
+def _body_bytes(request) -> Optional[bytes]:
+    b = getattr(request, "body", None)
+    if b is None:
+        return None
+    return b.encode("utf-8") if isinstance(b, str) else bytes(b)
+
+
+# ---------- store ----------
+class ReplayStore:
+    """
+    <root>/index/<hh>/<request-hash>.json  -> {url, method, status, headers, body, recorded_at, elapsed_ms}
+    <root>/objects/<hh>/<sha256>.gz        -> response body (gzip), shared by identical payloads
+    """
+
+    def __init__(self, root: os.PathLike | str = DEFAULT_DIR):
+        self.root = pathlib.Path(root)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _index_path(self, rh: str) -> pathlib.Path:
+        return self.root / "index" / rh[:2] / f"{rh}.json"
+
+    def _object_path(self, oh: str) -> pathlib.Path:
+        return self.root / "objects" / oh[:2] / f"{oh}.gz"
+
+    @staticmethod
+    def _atomic_write(path: pathlib.Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def put(self, method: str, url: str, status: int, headers: Dict[str, str], content: bytes,
+            elapsed_ms: float = 0.0, body: Optional[bytes] = None) -> str:
+        oh = hashlib.sha256(content).hexdigest()
+        op = self._object_path(oh)
+        if not op.exists():
+            self._atomic_write(op, gzip.compress(content, compresslevel=6))
+        rh = request_hash(method, url, body)
+        entry = {
+            "method": method.upper(),
+            "url": redact_url(url),
+            "status": int(status),
+            "headers": {k: v for k, v in (headers or {}).items() if k.lower() not in _DROP_HEADERS},
+            "body": oh,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "elapsed_ms": round(float(elapsed_ms), 1),
+        }
+        self._atomic_write(self._index_path(rh), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self.writes += 1
+        return rh
+
+    def get(self, method: str, url: str, body: Optional[bytes] = None) -> Optional[Dict]:
+        ip = self._index_path(request_hash(method, url, body))
+        try:
+            entry = json.loads(ip.read_text(encoding="utf-8"))
+            entry["content"] = gzip.decompress(self._object_path(entry["body"]).read_bytes())
+        except (FileNotFoundError, ValueError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"root": str(self.root), "hits": self.hits, "misses": self.misses, "writes": self.writes}
+
+
+# ---------- transports ----------
+def build_response(request, status: int, headers: Dict[str, str], content: bytes) -> requests.Response:
+    resp = requests.Response()
+    resp.request = request
+    resp.url = request.url
+    resp.status_code = int(status)
+    resp.reason = "OK" if resp.ok else "Replayed"
+    resp.headers = CaseInsensitiveDict(headers or {})
+    resp._content = content
+    resp._content_consumed = True  # iter_content() (stream=True callers) slices _content
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers) or "utf-8"
+    return resp
+
+
+class RecordingAdapter(BaseAdapter):
+    """Wraps the session's real adapter (keeps its retries) and stores every response."""
+
+    def __init__(self, inner, store: ReplayStore):
+        super().__init__()
+        self.inner = inner
+        self.store = store
+
+    def send(self, request, **kwargs):
+        t0 = time.perf_counter()
+        resp = self.inner.send(request, **kwargs)
+        try:
+            self.store.put(request.method, request.url, resp.status_code, dict(resp.headers),
+                           resp.content, (time.perf_counter() - t0) * 1000.0, _body_bytes(request))
+        except Exception:
+            pass  # recording is best-effort; never break a live call
+        return resp
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves from the store only. A miss raises ConnectionError, which providers already handle."""
+
+    def __init__(self, store: ReplayStore):
+        super().__init__()
+        self.store = store
+
+    def send(self, request, **kwargs):
+        e = self.store.get(request.method, request.url, _body_bytes(request))
+        if e is None:
+            raise requests.ConnectionError(f"replay miss (no recorded response): {request.method} "
+                                           f"{redact_url(request.url)}", request=request)
+        return build_response(request, e["status"], e.get("headers") or {}, e["content"])
+
+    def close(self):
+        pass
+
+
+# ---------- process-wide switch ----------
+@contextmanager
+def patched_transport(get_adapter: Callable, yf_hook: Optional[Callable] = None,
+                      prices_hook: Optional[Callable] = None) -> Iterator[None]:
+    """
+    Route every requests call, feedparser URL fetches and (optionally) ratios._from_yf and
+    yf_adapter._download (batched prices) through the given hooks for the duration of the
+    block; yf_adapter's Ticker.fast_info fallback is off meanwhile. Shared with bench.standin.
+    """
+    import feedparser
+    from ipobot.fundamentals import ratios, yf_adapter
+
+    orig_get_adapter = requests.Session.get_adapter
+    orig_parse = feedparser.parse
+    orig_yf = ratios._from_yf
+    orig_download, orig_fast = yf_adapter._download, yf_adapter._fast_price
+
+    def _parse(src, *a, **kw):
+        # feedparser fetches URLs with urllib; go through requests so the hooks see it
+        if isinstance(src, str) and src.startswith(("http://", "https://")):
+            s = requests.Session()
+            try:
+                src = s.get(src, timeout=12).content
+            except Exception:
+                src = b""
+            finally:
+                s.close()
+        return orig_parse(src, *a, **kw)
+
+    requests.Session.get_adapter = lambda self, url: get_adapter(self, url, orig_get_adapter)
+    feedparser.parse = _parse
+    if yf_hook is not None:
+        ratios._from_yf = lambda symbol, deadline=None: yf_hook(symbol, deadline, orig_yf)
+    if prices_hook is not None:
+        yf_adapter._download = lambda symbols, deadline=None: prices_hook(symbols, deadline, orig_download)
+        yf_adapter._fast_price = lambda symbol: None
+    try:
+        yield
+    finally:
+        requests.Session.get_adapter = orig_get_adapter
+        feedparser.parse = orig_parse
+        ratios._from_yf = orig_yf
+        yf_adapter._download, yf_adapter._fast_price = orig_download, orig_fast
+
+
+_active: Dict[str, object] = {}
+_active_lock = threading.Lock()
+
+
+def _yf_url(symbol: str) -> str:
+    # yfinance uses its own HTTP stack; its derived output is stored under a pseudo-URL
+    return f"https://yfinance.local/{symbol}"
+
+
+def _price_url(symbol: str) -> str:
+    return f"https://yfinance.local/price/{symbol}"
+
+
+def activate(mode: str, root: os.PathLike | str | None = None) -> Optional[ReplayStore]:
+    """Turn record/replay on for this process ('off' turns it off). Returns the store."""
+    mode = (mode or "off").strip().lower()
+    deactivate()
+    if mode not in ("record", "replay"):
+        return None
+    store = ReplayStore(root or DEFAULT_DIR)
+
+    if mode == "record":
+        def get_adapter(sess, url, orig):
+            return RecordingAdapter(orig(sess, url), store)
+
+        def yf_hook(symbol, deadline, orig):
+            out = orig(symbol, deadline=deadline)
+            if out:
+                try:
+                    store.put("GET", _yf_url(symbol), 200, {"Content-Type": "application/json"},
+                              json.dumps(out).encode("utf-8"))
+                except Exception:
+                    pass
+            return out
+
+        def prices_hook(symbols, deadline, orig):
+            got = orig(symbols, deadline=deadline)
+            for s, px in got.items():  # one entry per symbol: replay works for any batch split
+                try:
+                    store.put("GET", _price_url(s), 200, {"Content-Type": "application/json"},
+                              json.dumps({"close": px}).encode("utf-8"))
+                except Exception:
+                    pass
+            return got
+    else:
+        adapter = ReplayAdapter(store)
+
+        def get_adapter(sess, url, orig):
+            return adapter
+
+        def yf_hook(symbol, deadline, orig):
+            e = store.get("GET", _yf_url(symbol))
+            return json.loads(e["content"]) if e else None
+
+        def prices_hook(symbols, deadline, orig):
+            got = {}
+            for s in symbols:
+                e = store.get("GET", _price_url(s))
+                if e:
+                    got[s] = float(json.loads(e["content"])["close"])
+            return got
+
+    cm = patched_transport(get_adapter, yf_hook, prices_hook)
+    cm.__enter__()
+    with _active_lock:
+        _active.update({"mode": mode, "store": store, "cm": cm})
+    return store
+
+
+def deactivate() -> None:
+    with _active_lock:
+        cm = _active.pop("cm", None)
+        _active.clear()
+    if cm is not None:
+        cm.__exit__(None, None, None)
+
+
+def active_store() -> Optional[ReplayStore]:
+    return _active.get("store")  # type: ignore[return-value]
+
+
+def ensure_from_env() -> Optional[ReplayStore]:
+    """Activate from IPOBOT_REPLAY / IPOBOT_REPLAY_DIR once (no-op when unset or already on)."""
+    mode = (os.getenv("IPOBOT_REPLAY") or "").strip().lower()
+    if mode not in ("record", "replay"):
+        return None
+    root = os.getenv("IPOBOT_REPLAY_DIR") or None
+    cur = _active.get("store")
+    if _active.get("mode") == mode and cur is not None and (root is None or str(cur.root) == str(pathlib.Path(root))):
+        return cur  # type: ignore[return-value]
+    return activate(mode, root)
+
+
+def set_mode_env(mode: str, root: Optional[str]) -> Optional[ReplayStore]:
+    """CLI helper: export the mode (so worker processes inherit it) and activate it here."""
+    os.environ["IPOBOT_REPLAY"] = mode
+    if root:
+        os.environ["IPOBOT_REPLAY_DIR"] = str(root)
+    return ensure_from_env()
+
+
+# ---------- CLI ----------
+def add_cli_args(parser) -> None:
+    g = parser.add_mutually_exclusive_group()
+    g.add_argument("--record", nargs="?", const="", default=None, metavar="DIR",
+                   help=f"Save every provider response to the replay store (default: {DEFAULT_DIR})")
+    g.add_argument("--replay", nargs="?", const="", default=None, metavar="DIR",
+                   help="Answer provider calls from the replay store only (no network)")
+
+
+def apply_cli_args(args) -> Optional[ReplayStore]:
+    if getattr(args, "record", None) is not None:
+        return set_mode_env("record", args.record or None)
+    if getattr(args, "replay", None) is not None:
+        return set_mode_env("replay", args.replay or None)
+    return ensure_from_env()
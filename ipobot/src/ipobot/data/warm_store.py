@@ -0,0 +1,136 @@
+# src/ipobot/data/warm_store.py
+# Latest pre-computed run_pipeline result per (symbol, query), written by the scheduler
+# (app/scheduler.py) and read by interactive paths (serve /analyze, Streamlit) so an IPO
+# on the calendar is answered from disk instead of re-fetched while the user waits.
+# Results are stored with the thresholds they were decided at; readers re-apply their own
+# with pipeline.apply_thresholds().
+#
+#   scheduler:
+#     path: ".cache/warm/results.sqlite"
+#     max_age_min: 180        # older results are not served warm
+
+from __future__ import annotations
+
+import json, pathlib, sqlite3, threading, time
+from typing import Dict, List, Optional
+
+from ipobot.config import ROOT
+from ipobot.metrics import cache_event
+
+DEFAULT_DB = ROOT / ".cache" / "warm" / "results.sqlite"
+MAX_AGE_MIN = 180
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    symbol TEXT NOT NULL,        -- upper-case
+    query TEXT NOT NULL,         -- lower-case news query the result was computed for
+    name TEXT,                   -- calendar name
+    open_date TEXT,
+    close_date TEXT,
+    ts REAL NOT NULL,            -- epoch seconds the run finished
+    elapsed_s REAL,
+    result TEXT NOT NULL,        -- JSON
+    PRIMARY KEY (symbol, query)
+);
+CREATE INDEX IF NOT EXISTS results_name ON results (name);
+"""
+
+
+class WarmStore:
+    """Latest result per (symbol, query); a short-lived connection per call (scheduler + readers)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = pathlib.Path(path) if path else DEFAULT_DB
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+            self._ready = True
+        return con
+
+    def put(self, symbol: str, query: str, result: Dict, *, name: Optional[str] = None,
+            open_date: Optional[str] = None, close_date: Optional[str] = None) -> None:
+        con = self._connect()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (symbol.upper(), query.strip().lower(), name, open_date, close_date, time.time(),
+                             result.get("elapsed_s"), json.dumps(result, ensure_ascii=False, default=str)))
+        finally:
+            con.close()
+
+    def get(self, symbol: str, query: str, max_age_s: Optional[float] = None) -> Optional[Dict]:
+        """The stored result (with meta.warm = {'age_s', 'computed_at'}), or None when missing/too old."""
+        con = self._connect()
+        try:
+            row = con.execute("SELECT ts, result FROM results WHERE symbol = ? AND query = ?",
+                              (symbol.upper(), query.strip().lower())).fetchone()
+        finally:
+            con.close()
+        if row is None:
+            return None
+        age = time.time() - row[0]
+        if max_age_s is not None and age > max_age_s:
+            return None
+        res = json.loads(row[1])
+        res["meta"] = {**(res.get("meta") or {}), "warm": {"age_s": round(age, 1), "computed_at": row[0]}}
+        return res
+
+    def last_runs(self) -> Dict[str, float]:
+        """{calendar name: ts of its newest stored result} (the scheduler's refresh clock)."""
+        con = self._connect()
+        try:
+            rows = con.execute("SELECT name, MAX(ts) FROM results WHERE name IS NOT NULL GROUP BY name").fetchall()
+        finally:
+            con.close()
+        return {n: ts for n, ts in rows}
+
+    def entries(self) -> List[Dict]:
+        con = self._connect()
+        try:
+            rows = con.execute("SELECT symbol, query, name, open_date, close_date, ts, elapsed_s "
+                               "FROM results ORDER BY ts DESC").fetchall()
+        finally:
+            con.close()
+        keys = ("symbol", "query", "name", "open_date", "close_date", "ts", "elapsed_s")
+        return [dict(zip(keys, r)) for r in rows]
+
+
+_default: Optional[WarmStore] = None
+_default_lock = threading.Lock()
+
+
+def from_config(cfg: Optional[Dict]) -> WarmStore:
+    """Process-wide store at config `scheduler.path`."""
+    global _default
+    path = pathlib.Path(((cfg or {}).get("scheduler") or {}).get("path") or DEFAULT_DB)
+    if not path.is_absolute():
+        path = ROOT / path
+    with _default_lock:
+        if _default is None or _default.path != path:
+            _default = WarmStore(path)
+        return _default
+
+
+def warm_result(symbol: str, query: str, cfg: Optional[Dict] = None) -> Optional[Dict]:
+    """Pre-computed result for an interactive request, if the scheduler has a fresh one."""
+    if not symbol or not query:
+        return None
+    if cfg is None:
+        from ipobot.config import load_config
+        cfg = load_config() or {}
+    s_cfg = cfg.get("scheduler") or {}
+    store = from_config(cfg)
+    if not store.path.exists():
+        return None  # scheduler never ran here
+    try:
+        res = store.get(symbol, query, float(s_cfg.get("max_age_min", MAX_AGE_MIN)) * 60.0)
+    except sqlite3.Error:
+        res = None
+    cache_event("warm_result", res is not None)
+    return res
@@ -0,0 +1,59 @@
+# src/ipobot/deadline.py
+# End-to-end latency budget shared by run_pipeline and every provider call.
+
+from __future__ import annotations
+
+import time
+from typing import Optional, Union
+
+
+class Deadline:
+    """Absolute monotonic deadline. `at=None` means no limit."""
+
+    __slots__ = ("at",)
+
+    def __init__(self, at: Optional[float] = None):
+        self.at = at
+
+    @classmethod
+    def from_budget(cls, budget_ms: Optional[float]) -> "Deadline":
+        if budget_ms is None:
+            return cls(None)
+        return cls(time.monotonic() + max(0.0, float(budget_ms)) / 1000.0)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (>= 0), or None when unbounded."""
+        if self.at is None:
+            return None
+        return max(0.0, self.at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.at is not None and time.monotonic() >= self.at
+
+    def __repr__(self):
+        rem = self.remaining()
+        return "Deadline(unbounded)" if rem is None else f"Deadline({rem * 1000:.0f} ms left)"
+
+
+DeadlineLike = Union[Deadline, float, None]
+
+
+def as_deadline(deadline: DeadlineLike = None, budget_ms: Optional[float] = None) -> Deadline:
+    """Accept a Deadline, an absolute time.monotonic() value, or a budget in ms."""
+    if isinstance(deadline, Deadline):
+        return deadline
+    if deadline is not None:
+        return Deadline(float(deadline))
+    return Deadline.from_budget(budget_ms)
+
+
+def expired(deadline: Optional[Deadline]) -> bool:
+    return deadline is not None and deadline.expired()
+
+
+def timeout_for(deadline: Optional[Deadline], cap: float, floor: float = 0.05) -> float:
+    """Per-request timeout: the provider's usual cap, shrunk to what is left of the budget."""
+    rem = None if deadline is None else deadline.remaining()
+    if rem is None:
+        return cap
+    return max(floor, min(cap, rem))
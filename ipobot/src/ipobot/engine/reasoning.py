@@ -1,5 +1,47 @@
+from ipobot.model.predict import FEATURES, feature_vector
+
+TOP_CONTRIBUTORS = 4
+
+
+def _label(name, value):
+    """Readable description of one model input at its value for this IPO."""
+    if name == "sentiment":
+        return f"News sentiment {value:+.2f}"
+    if name == "pe_discount":
+        if value > 0:
+            return f"P/E {value:.0%} below peers"
+        if value < 0:
+            return f"P/E {-value:.0%} above peers"
+        return "P/E in line with peers (or no peer data)"
+    if name == "roe_flag":
+        return "ROE ≥ 15%" if value else "ROE below 15% (or unknown)"
+    if name == "d2e_flag":
+        return "Debt-to-Equity ≤ 1.0" if value else "Debt-to-Equity above 1.0 (or unknown)"
+    if name == "growth_flag":
+        return "Revenue CAGR ≥ 15%" if value else "Revenue CAGR below 15% (or unknown)"
+    if name == "fscore":
+        return f"Fundamentals composite {value:.2f}"
+    return f"{name} = {value}"
+
+
+def _contributors(sent, fdetail, attributions):
+    """Bullets for the largest |phi| model inputs, signed in probability points."""
+    x = dict(zip(FEATURES, feature_vector(sent, fdetail)))
+    phi = attributions.get("phi") or {}
+    top = sorted(phi.items(), key=lambda kv: -abs(kv[1]))[:TOP_CONTRIBUTORS]
+    pts = [f"{_label(k, x.get(k, 0.0))}: {v * 100:+.1f} pts" for k, v in top if abs(v) >= 0.0005]
+    pts.append(f"Baseline gain probability {attributions.get('base', 0.0):.2f} before these inputs")
+    return pts
+
+
+def build_reason(symbol, sent, fdetail, prob, gain_est, decision, attributions=None):
+    if attributions and attributions.get("phi"):
+        # what the model actually used for this prediction (model.explain)
+        pts = _contributors(sent, fdetail, attributions)
+        pts.append(f"Model gain probability {prob:.2f}, expected gain ≈ {gain_est:.1f}%")
+        return f"""**{decision}** for {symbol}; top model contributors:
+- """ + "\n- ".join(pts)
 
-def build_reason(symbol, sent, fdetail, prob, gain_est, decision):
     pts = []
     if sent >= 0.3:
         pts.append(f"News sentiment positive ({sent:+.2f})")
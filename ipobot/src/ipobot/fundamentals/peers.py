@@ -0,0 +1,168 @@
+# fundamentals/peers.py
+# Peer P/E from configured peer sets:
+#
+#   financials:
+#     peer_symbols: ["JUBLFOOD.NS", "WESTLIFE.NS"]        # global default
+#     peer_sets:                                          # per IPO (symbol, bare symbol or name)
+#       SWIGGY.NS: ["ZOMATO.NS", "JUBLFOOD.NS"]
+#     peer_pe_stat: "median"                              # or "trimmed_mean"
+#     peer_cache_ttl_s: 21600
+#
+# Each peer's P/E comes from NSE -> Finnhub -> yfinance (prices for the whole set in one
+# batched download). Peers are fetched concurrently and cached per symbol with a TTL,
+# since many IPOs share the same peers.
+
+from __future__ import annotations
+
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from ipobot.deadline import expired
+from ipobot.metrics import bind, cache_event
+
+PEER_TTL = 6 * 3600     # seconds
+PE_RANGE = (0.0, 500.0)  # loss-makers (P/E <= 0) and absurd multiples say nothing about valuation
+MISS_TTL = 300           # peers with no P/E anywhere are retried sooner
+TRIM = 0.1               # drop this share of peers from each end for the trimmed mean
+MAX_WORKERS = 8
+
+_cache: Dict[str, tuple] = {}  # symbol -> (fetched_at, pe | None)
+_lock = threading.Lock()
+_POOL: Optional[ThreadPoolExecutor] = None      # per-peer requests
+_SET_POOL: Optional[ThreadPoolExecutor] = None  # whole peer sets (kept apart so they never wait on themselves)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _lock:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ipobot-peers")
+        return _POOL
+
+
+def _set_pool() -> ThreadPoolExecutor:
+    global _SET_POOL
+    with _lock:
+        if _SET_POOL is None:
+            _SET_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ipobot-peerset")
+        return _SET_POOL
+
+
+def peer_symbols_for(symbol: str, cfg: Optional[Dict] = None, name: Optional[str] = None) -> List[str]:
+    """Per-IPO `financials.peer_sets` entry if there is one, else the global `peer_symbols`."""
+    fin = (cfg or {}).get("financials") or {}
+    sets = fin.get("peer_sets") or {}
+    peers = None
+    if isinstance(sets, dict) and sets:
+        want = [k for k in (symbol, (symbol or "").split(".")[0], name) if k]
+        lowered = {str(k).strip().lower(): v for k, v in sets.items()}
+        for k in want:
+            peers = lowered.get(k.strip().lower())
+            if peers:
+                break
+    if not peers:
+        peers = fin.get("peer_symbols") or []
+    seen, out = set(), []
+    for p in peers:
+        p = str(p).strip()
+        if p and p != symbol and p not in seen:
+            seen.add(p)
+            out.append(p)
+    return out
+
+
+def median(values: List[float]) -> Optional[float]:
+    v = sorted(values)
+    n = len(v)
+    if not n:
+        return None
+    return v[n // 2] if n % 2 else (v[n // 2 - 1] + v[n // 2]) / 2.0
+
+
+def trimmed_mean(values: List[float], trim: float = TRIM) -> Optional[float]:
+    v = sorted(values)
+    k = int(len(v) * trim)
+    v = v[k:len(v) - k] if k else v
+    return sum(v) / len(v) if v else None
+
+
+def _primary_pe(symbol: str, deadline=None) -> Optional[float]:
+    """NSE quote (for .NS) then Finnhub metrics: one cheap request each."""
+    from ipobot.fundamentals import ratios
+
+    pe = None
+    if symbol.endswith(".NS") and not expired(deadline):
+        pe = ratios._nse_pe(symbol[:-3], deadline=deadline)
+    if pe is None and not expired(deadline):
+        pe = (ratios._from_finnhub(symbol, deadline=deadline) or {}).get("pe")
+    return pe
+
+
+def _yf_pe(symbol: str, deadline=None) -> Optional[float]:
+    from ipobot.fundamentals import ratios
+
+    return None if expired(deadline) else (ratios._from_yf(symbol, deadline=deadline) or {}).get("pe")
+
+
+def _gather(fn, symbols: List[str], deadline) -> Dict[str, Optional[float]]:
+    futs = {s: _pool().submit(bind(lambda s=s: fn(s, deadline=deadline))) for s in symbols}
+    out: Dict[str, Optional[float]] = {}
+    for s, f in futs.items():
+        try:
+            out[s] = f.result()
+        except Exception:
+            out[s] = None
+    return out
+
+
+def peer_pe(peers: Iterable[str], deadline=None, ttl: float = PEER_TTL) -> Dict:
+    """
+    {'median', 'trimmed_mean', 'n', 'peers': {symbol: pe | None}} over peers with a usable P/E.
+    Cached peers cost nothing; the rest go NSE/Finnhub concurrently, and whatever is still
+    missing gets one batched yfinance price download before the statement-based fallback.
+    """
+    peers = list(dict.fromkeys(p for p in peers if p))
+    out = {"median": None, "trimmed_mean": None, "n": 0, "peers": {}}
+    if not peers:
+        return out
+
+    now = time.time()
+    with _lock:
+        for p in peers:
+            hit = _cache.get(p)
+            if hit and now - hit[0] < (ttl if hit[1] is not None else min(ttl, MISS_TTL)):
+                out["peers"][p] = hit[1]
+    cold = [p for p in peers if p not in out["peers"]]
+    for p in peers:
+        cache_event("peer_pe", p not in cold)
+
+    if cold and not expired(deadline):
+        got = _gather(_primary_pe, cold, deadline)
+        rest = [p for p in cold if got.get(p) is None]
+        if rest and not expired(deadline):
+            from ipobot.fundamentals import yf_adapter
+            yf_adapter.prefetch(rest, deadline=deadline)
+            got.update(_gather(_yf_pe, rest, deadline))
+        if not expired(deadline):  # a miss caused by the budget is not worth remembering
+            with _lock:
+                for p in cold:
+                    _cache[p] = (time.time(), got.get(p))
+        out["peers"].update(got)
+
+    vals = [float(v) for v in out["peers"].values() if v is not None and PE_RANGE[0] < float(v) <= PE_RANGE[1]]
+    out["n"] = len(vals)
+    out["median"] = round(median(vals), 2) if vals else None
+    out["trimmed_mean"] = round(trimmed_mean(vals), 2) if vals else None
+    return out
+
+
+def peer_pe_async(peers: Iterable[str], deadline=None, ttl: float = PEER_TTL):
+    """peer_pe() on a background thread (Future), so it overlaps the symbol's own fundamentals."""
+    peers = list(peers)
+    return _set_pool().submit(bind(lambda: peer_pe(peers, deadline=deadline, ttl=ttl)))
+
+
+def clear_cache() -> None:
+    with _lock:
+        _cache.clear()
@@ -1,18 +1,15 @@
 # fundamentals/ratios.py
 # Hybrid fundamentals: NSE(.NS P/E) -> Finnhub -> FMP -> AlphaVantage -> yfinance-computed
 # Works without yfinance.info and is resilient to Yahoo 404s
+# pandas / yfinance / .env are loaded on first use so importing this module stays cheap.
 
-from dotenv import load_dotenv
-load_dotenv()  # reads .env from project root
-
-import os, time, requests
-import pandas as pd
-import yfinance as yf
-from ipobot.config import load_config  # for score_fundamentals
+import time, threading, requests
+from ipobot.config import load_config, getenv  # load_config for score_fundamentals
+from ipobot.deadline import expired, timeout_for
+from ipobot.metrics import provider_call, field_source
 
 # ---------- config ----------
 REQ_TIMEOUT = 12  # seconds
-YF_HISTORY_PERIODS = ["1mo", "3mo", "6mo"]
 NSE_HEADERS = {
     "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                    "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"),
@@ -50,24 +47,37 @@ def _revenue_cagr(series, min_years=3, max_years=5):
 
 def _round(x): return None if x is None else round(float(x), 2)
 
+_tls = threading.local()
+
 def _session():
-    s = requests.Session()
-    adapter = requests.adapters.HTTPAdapter(max_retries=2)
-    s.mount("http://", adapter)
-    s.mount("https://", adapter)
+    # one pooled session per thread: keeps TCP/TLS (and NSE cookies) warm across calls
+    s = getattr(_tls, "session", None)
+    if s is None:
+        s = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(max_retries=2)
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        _tls.session = s
     return s
 
 # ---------- NSE (unofficial) just for P/E on .NS ----------
-def _nse_pe(nse_ticker_wo_suffix):
+def _nse_pe(nse_ticker_wo_suffix, deadline=None):
     url = "https://www.nseindia.com/api/quote-equity"
     s = _session()
     try:
         # prime cookies
-        s.get("https://www.nseindia.com", headers=NSE_HEADERS, timeout=REQ_TIMEOUT)
-        time.sleep(0.25)
+        with provider_call("nse", "prime") as c:
+            c.response(s.get("https://www.nseindia.com", headers=NSE_HEADERS,
+                             timeout=timeout_for(deadline, REQ_TIMEOUT)))
+            time.sleep(0.25)
+        if expired(deadline):
+            return None
         hdrs = dict(NSE_HEADERS)
         hdrs["Referer"] = f"https://www.nseindia.com/get-quotes/equity?symbol={nse_ticker_wo_suffix}"
-        r = s.get(url, headers=hdrs, params={"symbol": nse_ticker_wo_suffix}, timeout=REQ_TIMEOUT)
+        with provider_call("nse", "quote-equity") as c:
+            r = s.get(url, headers=hdrs, params={"symbol": nse_ticker_wo_suffix},
+                      timeout=timeout_for(deadline, REQ_TIMEOUT))
+            c.response(r)
         if r.ok:
             js = r.json()
             return _to_float(js.get("priceInfo", {}).get("pE"))
@@ -76,8 +86,8 @@ def _nse_pe(nse_ticker_wo_suffix):
     return None
 
 # ---------- Finnhub ----------
-def _from_finnhub(symbol):
-    key = os.getenv("FINNHUB_API_KEY") or os.getenv("FINNHUB_TOKEN")
+def _from_finnhub(symbol, deadline=None):
+    key = getenv("FINNHUB_API_KEY", "FINNHUB_TOKEN")
     if not key:
         return None
     s = _session()
@@ -85,13 +95,18 @@ def _from_finnhub(symbol):
 
     # Try NSE-qualified first for .NS tickers, else raw
     candidates = [f"NSE:{symbol[:-3]}", symbol] if symbol.endswith(".NS") else [symbol]
-    for sym in candidates:
+    for attempt, sym in enumerate(candidates):
+        if expired(deadline):
+            break
         try:
-            r = s.get(
-                "https://finnhub.io/api/v1/stock/metric",
-                params={"symbol": sym, "metric": "all", "token": key},
-                timeout=REQ_TIMEOUT,
-            )
+            # the raw-symbol fallback is a lookup miss, not transport trouble: its own endpoint label
+            with provider_call("finnhub", "stock/metric:raw" if attempt else "stock/metric") as c:
+                r = s.get(
+                    "https://finnhub.io/api/v1/stock/metric",
+                    params={"symbol": sym, "metric": "all", "token": key},
+                    timeout=timeout_for(deadline, REQ_TIMEOUT),
+                )
+                c.response(r)
             if not r.ok:
                 continue
             m = (r.json() or {}).get("metric") or {}
@@ -138,14 +153,17 @@ def _from_finnhub(symbol):
     return out
 
 # ---------- FMP ----------
-def _from_fmp(symbol):
-    key = os.getenv("FMP_API_KEY")
+def _from_fmp(symbol, deadline=None):
+    key = getenv("FMP_API_KEY")
     if not key: return None
     base = "https://financialmodelingprep.com/api/v3"
     out, sess = {}, _session()
 
     try:
-        r = sess.get(f"{base}/profile/{symbol}", params={"apikey": key}, timeout=REQ_TIMEOUT)
+        with provider_call("fmp", "profile") as c:
+            r = sess.get(f"{base}/profile/{symbol}", params={"apikey": key},
+                         timeout=timeout_for(deadline, REQ_TIMEOUT))
+            c.response(r)
         if r.ok:
             prof = r.json()
             if isinstance(prof, list) and prof:
@@ -155,15 +173,23 @@ def _from_fmp(symbol):
 
     inc = bal = None
     try:
-        r = sess.get(f"{base}/income-statement/{symbol}",
-                     params={"period":"annual","limit":5,"apikey":key}, timeout=REQ_TIMEOUT)
-        if r.ok: inc = r.json()
+        if not expired(deadline):
+            with provider_call("fmp", "income-statement") as c:
+                r = sess.get(f"{base}/income-statement/{symbol}",
+                             params={"period":"annual","limit":5,"apikey":key},
+                             timeout=timeout_for(deadline, REQ_TIMEOUT))
+                c.response(r)
+            if r.ok: inc = r.json()
     except Exception: pass
 
     try:
-        r = sess.get(f"{base}/balance-sheet-statement/{symbol}",
-                     params={"period":"annual","limit":5,"apikey":key}, timeout=REQ_TIMEOUT)
-        if r.ok: bal = r.json()
+        if not expired(deadline):
+            with provider_call("fmp", "balance-sheet-statement") as c:
+                r = sess.get(f"{base}/balance-sheet-statement/{symbol}",
+                             params={"period":"annual","limit":5,"apikey":key},
+                             timeout=timeout_for(deadline, REQ_TIMEOUT))
+                c.response(r)
+            if r.ok: bal = r.json()
     except Exception: pass
 
     if not inc or not isinstance(inc, list): return out or None
@@ -183,15 +209,17 @@ def _from_fmp(symbol):
     return out or None
 
 # ---------- Alpha Vantage ----------
-def _from_av(symbol):
-    key = os.getenv("ALPHAVANTAGE_API_KEY")
+def _from_av(symbol, deadline=None):
+    key = getenv("ALPHAVANTAGE_API_KEY")
     if not key: return None
     out, sess = {}, _session()
 
     try:
-        r = sess.get("https://www.alphavantage.co/query",
-                     params={"function":"OVERVIEW","symbol":symbol,"apikey":key},
-                     timeout=REQ_TIMEOUT)
+        with provider_call("alphavantage", "OVERVIEW") as c:
+            r = sess.get("https://www.alphavantage.co/query",
+                         params={"function":"OVERVIEW","symbol":symbol,"apikey":key},
+                         timeout=timeout_for(deadline, REQ_TIMEOUT))
+            c.response(r)
         if r.ok:
             ov = r.json()
             if isinstance(ov, dict) and "Note" not in ov:
@@ -204,9 +232,13 @@ def _from_av(symbol):
     except Exception: pass
 
     try:
-        r = sess.get("https://www.alphavantage.co/query",
-                     params={"function":"INCOME_STATEMENT","symbol":symbol,"apikey":key},
-                     timeout=REQ_TIMEOUT)
+        if expired(deadline):
+            return out or None
+        with provider_call("alphavantage", "INCOME_STATEMENT") as c:
+            r = sess.get("https://www.alphavantage.co/query",
+                         params={"function":"INCOME_STATEMENT","symbol":symbol,"apikey":key},
+                         timeout=timeout_for(deadline, REQ_TIMEOUT))
+            c.response(r)
         if r.ok:
             js = r.json()
             ann = js.get("annualReports", []) if isinstance(js, dict) else []
@@ -218,42 +250,16 @@ def _from_av(symbol):
     return out or None
 
 # ---------- yfinance (no .info) ----------
-def _from_yf(symbol):
+def _from_yf(symbol, deadline=None):
+    """Computed fallback from yfinance prices + annual statements (see yf_adapter for caching)."""
     out = {}
     try:
-        t = yf.Ticker(symbol)
-
-        # Last price: try multiple periods, then fast_info
-        price = None
-        for per in YF_HISTORY_PERIODS:
-            try:
-                h = t.history(period=per)
-                if len(h):
-                    price = float(h["Close"].iloc[-1])
-                    break
-            except Exception:
-                pass
-        if price is None:
-            try:
-                fi = getattr(t, "fast_info", None)
-                if fi:
-                    price = float(fi.get("last_price") or fi.get("last_close") or fi.get("previous_close"))
-            except Exception:
-                pass
-
-        # Financial statements
-        inc = getattr(t, "income_stmt", None) or getattr(t, "financials", None)
-        bal = getattr(t, "balance_sheet", None)
-
-        def _find_row(df, names):
-            if df is None or df.empty: return None
-            idx = {str(i).lower(): i for i in df.index}
-            for nm in names:
-                key = nm.lower()
-                if key in idx: return df.loc[idx[key]]
-            for i in df.index:
-                s = str(i).lower()
-                if any(n.lower() in s for n in names): return df.loc[i]
+        import pandas as pd
+        from ipobot.fundamentals import yf_adapter
+
+        price = yf_adapter.last_price(symbol, deadline=deadline)
+        st = yf_adapter.statements(symbol, "yearly", deadline=deadline)
+        if st is None:
             return None
 
         def _latest(series):
@@ -262,30 +268,22 @@ def _from_yf(symbol):
             except Exception: return None
 
         # Net income & revenues
-        ni_row = _find_row(inc, ["Net Income", "NetIncome"])
-        net_income = _latest(ni_row)
+        net_income = _latest(st.row("income", ["Net Income", "NetIncome"]))
 
-        rev_row = _find_row(inc, ["Total Revenue", "Revenue"])
+        rev_row = st.row("income", ["Total Revenue", "Revenue"])
         if isinstance(rev_row, pd.Series):
             revs = [_to_float(v) for v in rev_row.values[:5]]
             out["rev_cagr"] = _pct(_revenue_cagr(revs))
 
         # Equity & Debt
-        eq_row = _find_row(bal, ["Total Stockholder Equity", "Total Shareholder Equity", "Total Equity"])
-        debt_row = _find_row(bal, ["Total Debt", "Long Term Debt"])
-        equity = _latest(eq_row)
-        debt = _latest(debt_row)
+        equity = _latest(st.row("balance", ["Total Stockholder Equity", "Total Shareholder Equity",
+                                            "Stockholders Equity", "Total Equity"]))
+        debt = _latest(st.row("balance", ["Total Debt", "Long Term Debt"]))
         out["de"] = _safe_div(debt, equity) if (debt is not None and equity not in (None, 0)) else None
         out["roe"] = _pct(_safe_div(net_income, equity))
 
         # P/E via EPS ≈ NetIncome / SharesOutstanding
-        shares = None
-        try:
-            sh = t.get_shares_full()
-            if sh is not None and not sh.empty:
-                shares = float(sh["Shares (Basic)"].dropna().iloc[-1]) if "Shares (Basic)" in sh else float(sh.iloc[-1, 0])
-        except Exception:
-            pass
+        shares = st.latest_shares()
         eps = _safe_div(net_income, shares) if (net_income is not None and shares) else None
         out["pe"] = _safe_div(price, eps) if (price is not None and eps not in (None, 0)) else None
 
@@ -294,7 +292,19 @@ def _from_yf(symbol):
         return None
 
 # ---------- public ----------
-def get_fundamentals(symbol: str, peer_pe: float | None = None) -> dict:
+_CORE_FIELDS = ["P/E", "ROE (%)", "D/E", "Revenue CAGR (%)"]
+
+def _note_sources(res, before, provider):
+    """Credit `provider` with every core field it changed (shows up in meta.field_sources)."""
+    for k in _CORE_FIELDS:
+        if res[k] != before[k]:
+            field_source(k, provider if res[k] is not None else None)
+
+def get_fundamentals(symbol: str, peer_pe: float | None = None, deadline=None) -> dict:
+    """
+    Provider cascade. With a `deadline` (ipobot.deadline.Deadline) every call gets only
+    the remaining time; providers not reached in time are skipped and `partial` is set.
+    """
     res = {
         "P/E": None,
         "Peer P/E": peer_pe,
@@ -304,41 +314,53 @@ def get_fundamentals(symbol: str, peer_pe: float | None = None) -> dict:
         "P/E discount vs peer (%)": None,
     }
 
+    if peer_pe is not None:
+        field_source("Peer P/E", "caller")
+
     # 1) NSE P/E for .NS tickers (fast win)
-    if symbol.endswith(".NS"):
-        pe = _nse_pe(symbol[:-3])
+    if symbol.endswith(".NS") and not expired(deadline):
+        pe = _nse_pe(symbol[:-3], deadline=deadline)
         if pe is not None:
             res["P/E"] = pe
+            field_source("P/E", "nse")
 
     # 1.5) Finnhub fill (great coverage incl. NSE)
-    fh = _from_finnhub(symbol)
+    fh = None if expired(deadline) else _from_finnhub(symbol, deadline=deadline)
     if fh:
+        before = dict(res)
         for src, dst in [("pe","P/E"), ("roe","ROE (%)"), ("de","D/E"), ("rev_cagr","Revenue CAGR (%)")]:
             if res[dst] is None and fh.get(src) is not None:
                 res[dst] = fh[src]
+        _note_sources(res, before, "finnhub")
 
     # 2) FMP
-    f = _from_fmp(symbol)
+    f = None if expired(deadline) else _from_fmp(symbol, deadline=deadline)
     if f:
+        before = dict(res)
         res["P/E"] = res["P/E"] if res["P/E"] is not None else f.get("pe")
         res["ROE (%)"] = f.get("roe", res["ROE (%)"])
         res["D/E"] = f.get("de", res["D/E"])
         res["Revenue CAGR (%)"] = f.get("rev_cagr", res["Revenue CAGR (%)"])
+        _note_sources(res, before, "fmp")
 
     # 3) Alpha Vantage
-    a = _from_av(symbol)
+    a = None if expired(deadline) else _from_av(symbol, deadline=deadline)
     if a:
+        before = dict(res)
         if res["P/E"] is None and a.get("pe") is not None: res["P/E"] = a["pe"]
         if res["ROE (%)"] is None and a.get("roe") is not None: res["ROE (%)"] = a["roe"]
         if res["Revenue CAGR (%)"] is None and a.get("rev_cagr") is not None: res["Revenue CAGR (%)"] = a["rev_cagr"]
+        _note_sources(res, before, "alphavantage")
 
     # 4) yfinance fallback
-    if any(res[k] is None for k in ["P/E", "ROE (%)", "D/E", "Revenue CAGR (%)"]):
-        y = _from_yf(symbol)
+    if any(res[k] is None for k in _CORE_FIELDS) and not expired(deadline):
+        y = _from_yf(symbol, deadline=deadline)
         if y:
+            before = dict(res)
             for k_src, k_dst in [("pe","P/E"), ("roe","ROE (%)"), ("de","D/E"), ("rev_cagr","Revenue CAGR (%)")]:
                 if res[k_dst] is None and y.get(k_src) is not None:
                     res[k_dst] = y[k_src]
+            _note_sources(res, before, "yfinance")
 
     # 5) P/E discount vs peer
     if res["P/E"] is not None and res["Peer P/E"] not in (None, 0):
@@ -349,6 +371,8 @@ def get_fundamentals(symbol: str, peer_pe: float | None = None) -> dict:
         if k.endswith("(%)") or k in ("P/E", "D/E", "Peer P/E"):
             res[k] = _round(res[k])
 
+    if expired(deadline) and any(res[k] is None for k in _CORE_FIELDS):
+        res["partial"] = True  # budget ran out before the cascade could fill every field
     return res
 
 # ---------- scoring ----------
@@ -0,0 +1,266 @@
+# fundamentals/yf_adapter.py
+# yfinance access for the ratios fallback, peer sets and batch screens:
+#   - prices: one yf.download() for any number of symbols (a single 6mo history request
+#     instead of trying 1mo -> 3mo -> 6mo per symbol), cached for PRICE_TTL seconds
+#   - statements: annual income statement, balance sheet and share count, cached per
+#     (symbol, period) in-process and on disk (.cache/yf/) so identical frames are never refetched
+# pandas / yfinance are imported on first use.
+
+from __future__ import annotations
+
+import pickle, threading, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ipobot.config import ROOT
+from ipobot.deadline import expired, timeout_for
+from ipobot.metrics import provider_call, cache_event
+
+REQ_TIMEOUT = 12           # seconds
+HISTORY_PERIOD = "6mo"     # long enough that thinly traded symbols still have a close
+PRICE_TTL = 300            # seconds
+STATEMENT_TTL = 24 * 3600  # statements change once a quarter at most
+CACHE_DIR = ROOT / ".cache" / "yf"
+
+_prices: Dict[str, Tuple[float, float]] = {}   # symbol -> (fetched_at, last close)
+_statements: Dict[Tuple[str, str], "Statements"] = {}
+_lock = threading.Lock()
+# Striped per-key fetch locks: a fixed set, so a long-running process gains nothing per new
+# symbol. Two keys sharing a stripe only serialize their (rare, cold) fetches.
+KEY_LOCK_STRIPES = 64
+_key_locks = tuple(threading.Lock() for _ in range(KEY_LOCK_STRIPES))
+
+
+class Statements:
+    """Statement frames for one (symbol, period) plus a lowercase row index built once per frame."""
+
+    __slots__ = ("symbol", "period", "income", "balance", "shares", "fetched_at", "_rows")
+
+    def __init__(self, symbol, period, income, balance, shares, fetched_at=None):
+        self.symbol = symbol
+        self.period = period
+        self.income = income
+        self.balance = balance
+        self.shares = shares
+        self.fetched_at = fetched_at or time.time()
+        self._rows: Dict[str, Dict[str, object]] = {}
+
+    def _index(self, which: str) -> Dict[str, object]:
+        idx = self._rows.get(which)
+        if idx is None:
+            df = getattr(self, which)
+            idx = {} if df is None or df.empty else {str(i).lower(): i for i in df.index}
+            self._rows[which] = idx
+        return idx
+
+    def row(self, which: str, names: List[str]):
+        """First row of `which` ('income' | 'balance') whose label equals, then contains, one of `names`."""
+        df = getattr(self, which)
+        idx = self._index(which)
+        if not idx:
+            return None
+        for nm in names:
+            label = idx.get(nm.lower())
+            if label is not None:
+                return df.loc[label]
+        wanted = [n.lower() for n in names]
+        for low, label in idx.items():
+            if any(w in low for w in wanted):
+                return df.loc[label]
+        return None
+
+    def latest_shares(self) -> Optional[float]:
+        sh = self.shares
+        if sh is None or len(sh) == 0:
+            return None
+        try:
+            if getattr(sh, "ndim", 1) == 2:  # older yfinance returned a frame
+                sh = sh["Shares (Basic)"] if "Shares (Basic)" in sh else sh.iloc[:, 0]
+            return float(sh.dropna().iloc[-1])
+        except Exception:
+            return None
+
+    def __getstate__(self):
+        return (self.symbol, self.period, self.income, self.balance, self.shares, self.fetched_at)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+# ---------- prices ----------
+def _last_closes(data, symbols: List[str]) -> Dict[str, float]:
+    """Last non-NaN Close per symbol from yf.download (flat or (field, ticker) columns)."""
+    out: Dict[str, float] = {}
+    if data is None or len(data) == 0:
+        return out
+    cols = data.columns
+    for s in symbols:
+        try:
+            if getattr(cols, "nlevels", 1) > 1:
+                close = data["Close"][s] if s in data["Close"] else None
+            else:
+                close = data["Close"] if len(symbols) == 1 else None
+            if close is None:
+                continue
+            close = close.dropna()
+            if len(close):
+                out[s] = float(close.iloc[-1])
+        except Exception:
+            continue
+    return out
+
+
+def last_prices(symbols: Iterable[str], deadline=None) -> Dict[str, float]:
+    """Last close for each symbol; everything not cached comes from one batched download."""
+    syms = list(dict.fromkeys(s for s in symbols if s))
+    now = time.time()
+    out: Dict[str, float] = {}
+    with _lock:
+        for s in syms:
+            hit = _prices.get(s)
+            if hit and now - hit[0] < PRICE_TTL:
+                out[s] = hit[1]
+    missing = [s for s in syms if s not in out]
+    for s in syms:
+        cache_event("yf_price", s in out)
+    if not missing or expired(deadline):
+        return out
+
+    got = _download(missing, deadline=deadline)
+    with _lock:
+        for s, px in got.items():
+            _prices[s] = (now, px)
+    out.update(got)
+    return out
+
+
+def _download(symbols: List[str], deadline=None) -> Dict[str, float]:
+    """
+    Last close per symbol from one yf.download: the only price request, so data/replay.py
+    (record/replay) and bench.standin patch this function rather than yfinance.
+    """
+    import yfinance as yf
+    with provider_call("yfinance", "download") as c:
+        data = yf.download(symbols, period=HISTORY_PERIOD, interval="1d", group_by="column",
+                           auto_adjust=False, progress=False, threads=len(symbols) > 1,
+                           timeout=timeout_for(deadline, REQ_TIMEOUT))
+        got = _last_closes(data, symbols)
+        c.ok = bool(got)
+    return got
+
+
+def _fast_price(symbol: str) -> Optional[float]:
+    """Ticker.fast_info fallback (replaced by a no-op while record/replay is on)."""
+    import yfinance as yf
+    fi = yf.Ticker(symbol).fast_info
+    return float(fi.get("last_price") or fi.get("last_close") or fi.get("previous_close"))
+
+
+def last_price(symbol: str, deadline=None) -> Optional[float]:
+    try:
+        px = last_prices([symbol], deadline=deadline).get(symbol)
+    except Exception:
+        px = None
+    if px is None and not expired(deadline):
+        try:
+            px = _fast_price(symbol)
+        except Exception:
+            px = None
+    return px
+
+
+# ---------- statements ----------
+def _disk_path(symbol: str, period: str):
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in symbol)
+    return CACHE_DIR / f"{safe}-{period}.pkl"
+
+
+def _disk_get(symbol: str, period: str) -> Optional[Statements]:
+    try:
+        with open(_disk_path(symbol, period), "rb") as f:
+            st = pickle.load(f)
+        return st if time.time() - st.fetched_at < STATEMENT_TTL else None
+    except Exception:
+        return None
+
+
+def _disk_put(st: Statements) -> None:
+    import os, tempfile
+
+    path = _disk_path(st.symbol, st.period)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(st, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception:
+        pass  # cache is best-effort
+
+
+def statements(symbol: str, period: str = "yearly", deadline=None) -> Optional[Statements]:
+    """
+    Income statement, balance sheet and share count for (symbol, period), period being
+    yfinance's freq ('yearly' | 'quarterly'). Concurrent callers for the same key share one fetch.
+    """
+    key = (symbol, period)
+    now = time.time()
+    with _lock:
+        st = _statements.get(key)
+        if st is not None and now - st.fetched_at < STATEMENT_TTL:
+            cache_event("yf_statements", True)
+            return st
+    klock = _key_locks[hash(key) % KEY_LOCK_STRIPES]
+
+    with klock:
+        with _lock:
+            st = _statements.get(key)
+        if st is not None and time.time() - st.fetched_at < STATEMENT_TTL:
+            cache_event("yf_statements", True)
+            return st
+        st = _disk_get(symbol, period)
+        cache_event("yf_statements", st is not None)
+        if st is None:
+            # yfinance has no per-call timeout here: skip when the budget is gone
+            if expired(deadline):
+                return None
+            import yfinance as yf
+            t = yf.Ticker(symbol)
+            with provider_call("yfinance", "statements") as c:
+                inc = t.get_income_stmt(freq=period)
+                bal = t.get_balance_sheet(freq=period)
+                c.ok = inc is not None and not inc.empty
+            shares = None
+            if not expired(deadline):
+                try:
+                    with provider_call("yfinance", "shares_full"):
+                        shares = t.get_shares_full()
+                except Exception:
+                    pass
+            st = Statements(symbol, period, inc, bal, shares)
+            if c.ok:
+                _disk_put(st)
+            else:
+                st.fetched_at -= STATEMENT_TTL - PRICE_TTL  # retry empty answers sooner
+        with _lock:
+            _statements[key] = st
+        return st
+
+
+def prefetch(symbols: Iterable[str], deadline=None) -> Dict[str, float]:
+    """Warm the price cache for a peer set / batch screen with one download."""
+    try:
+        return last_prices(symbols, deadline=deadline)
+    except Exception:
+        return {}
+
+
+def clear_cache(disk: bool = False) -> None:
+    with _lock:
+        _prices.clear()
+        _statements.clear()
+    if disk and CACHE_DIR.is_dir():
+        for p in CACHE_DIR.glob("*.pkl"):
+            try:
+                p.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,248 @@
+# src/ipobot/metrics.py
+# Lightweight instrumentation: per-run trace (goes into result["meta"]) + process-wide
+# counters/histograms (Prometheus text format) + pluggable listener callbacks.
+
+from __future__ import annotations
+
+import contextvars, threading, time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("ipobot_trace", default=None)
+_stage_name: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("ipobot_stage", default=None)
+
+
+# ---------- per-run trace ----------
+class Trace:
+    """Everything measured during one run_pipeline call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, float] = {}
+        self.waits: Dict[str, float] = {}  # per stage: time queued for a stage-pool worker (inside `stages`)
+        self.calls: List[Dict[str, Any]] = []
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.field_sources: Dict[str, str] = {}
+
+    def to_meta(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "timings_ms": dict(self.stages),
+                "queue_wait_ms": dict(self.waits),
+                "provider_calls": list(self.calls),
+                "cache": {k: dict(v) for k, v in self.cache.items()},
+                "field_sources": dict(self.field_sources),
+            }
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """Start a fresh trace for the current context (nested calls share the outer one)."""
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+    t = Trace()
+    token = _current.set(t)
+    try:
+        yield t
+    finally:
+        _current.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def bind(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """Carry the current trace into a worker thread (executors don't copy contextvars)."""
+    ctx = contextvars.copy_context()
+    return lambda: ctx.run(fn)
+
+
+# ---------- process-wide registry ----------
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.hists: Dict[Tuple[str, Tuple], List[float]] = {}  # bucket counts..., +Inf, sum
+        self.help: Dict[str, Tuple[str, str]] = {}
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0, help: str = ""):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.help.setdefault(name, ("counter", help))
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Dict[str, str], seconds: float, help: str = ""):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.help.setdefault(name, ("histogram", help))
+            h = self.hists.get(key)
+            if h is None:
+                h = self.hists[key] = [0.0] * (len(BUCKETS) + 2)
+            for i, b in enumerate(BUCKETS):
+                if seconds <= b:
+                    h[i] += 1
+            h[len(BUCKETS)] += 1
+            h[-1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.hists.clear()
+
+    def render(self) -> str:
+        def lbl(pairs, extra=()):
+            items = list(pairs) + list(extra)
+            if not items:
+                return ""
+            esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_) in sorted(self.help.items()):
+                if help_:
+                    lines.append(f"# HELP {name} {help_}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for (n, labels), v in sorted(self.counters.items()):
+                        if n == name:
+                            lines.append(f"{name}{lbl(labels)} {v:g}")
+                else:
+                    for (n, labels), h in sorted(self.hists.items()):
+                        if n != name:
+                            continue
+                        for i, b in enumerate(BUCKETS):
+                            lines.append(f"{name}_bucket{lbl(labels, [('le', f'{b:g}')])} {h[i]:g}")
+                        lines.append(f"{name}_bucket{lbl(labels, [('le', '+Inf')])} {h[len(BUCKETS)]:g}")
+                        lines.append(f"{name}_sum{lbl(labels)} {h[-1]:.6f}")
+                        lines.append(f"{name}_count{lbl(labels)} {h[len(BUCKETS)]:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = _Registry()
+_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def add_listener(fn: Callable[[Dict[str, Any]], None]) -> None:
+    """Register fn(event) for every stage/provider/cache event (e.g. push to StatsD/OTel)."""
+    _listeners.append(fn)
+
+
+def remove_listener(fn: Callable[[Dict[str, Any]], None]) -> None:
+    try:
+        _listeners.remove(fn)
+    except ValueError:
+        pass
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+def _emit(event: Dict[str, Any]) -> None:
+    for fn in list(_listeners):
+        try:
+            fn(event)
+        except Exception:
+            pass  # a broken exporter must never break an analysis
+
+
+# ---------- instrumentation points ----------
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time one run_pipeline stage."""
+    t0 = time.perf_counter()
+    token = _stage_name.set(name)
+    try:
+        yield
+    finally:
+        _stage_name.reset(token)
+        dt = time.perf_counter() - t0
+        t = _current.get()
+        if t is not None:
+            with t._lock:
+                t.stages[name] = round(t.stages.get(name, 0.0) + dt * 1000.0, 2)
+        REGISTRY.observe("ipobot_stage_seconds", {"stage": name}, dt, "run_pipeline stage duration")
+        _emit({"type": "stage", "stage": name, "seconds": dt})
+
+
+def queue_wait(seconds: float) -> None:
+    """Time a budgeted stage spent waiting for a worker before it started (reported apart from its run time)."""
+    name = _stage_name.get() or "unknown"
+    t = _current.get()
+    if t is not None:
+        with t._lock:
+            t.waits[name] = round(t.waits.get(name, 0.0) + seconds * 1000.0, 2)
+    REGISTRY.observe("ipobot_stage_queue_seconds", {"stage": name}, seconds, "run_pipeline stage wait for a worker")
+
+
+class _Call:
+    __slots__ = ("ok", "status", "retries")
+
+    def __init__(self):
+        self.ok = True
+        self.status = None
+        self.retries = 0
+
+    def response(self, r) -> None:
+        """Record HTTP status and urllib3 retries (HTTPAdapter(max_retries=...) hides them otherwise)."""
+        self.status = getattr(r, "status_code", None)
+        self.ok = bool(getattr(r, "ok", False))
+        try:
+            hist = r.raw.retries.history
+            self.retries += len(hist or ())
+        except Exception:
+            pass
+
+
+@contextmanager
+def provider_call(provider: str, endpoint: str = "") -> Iterator[_Call]:
+    """Time one outbound provider request. Exceptions are recorded as failures and re-raised."""
+    c = _Call()
+    t0 = time.perf_counter()
+    try:
+        yield c
+    except BaseException:
+        c.ok = False
+        raise
+    finally:
+        dt = time.perf_counter() - t0
+        labels = {"provider": provider, "endpoint": endpoint}
+        outcome = "ok" if c.ok else "error"
+        t = _current.get()
+        if t is not None:
+            with t._lock:
+                t.calls.append({"provider": provider, "endpoint": endpoint, "ms": round(dt * 1000.0, 2),
+                                "ok": c.ok, "status": c.status, "retries": c.retries})
+        REGISTRY.observe("ipobot_provider_seconds", labels, dt, "Provider request duration")
+        REGISTRY.inc("ipobot_provider_calls_total", {**labels, "outcome": outcome}, 1, "Provider requests")
+        if c.retries:
+            REGISTRY.inc("ipobot_provider_retries_total", labels, c.retries, "Provider transport retries")
+        _emit({"type": "provider", **labels, "seconds": dt, "ok": c.ok, "status": c.status, "retries": c.retries})
+
+
+def cache_event(cache: str, hit: bool) -> None:
+    t = _current.get()
+    if t is not None:
+        with t._lock:
+            d = t.cache.setdefault(cache, {"hit": 0, "miss": 0})
+            d["hit" if hit else "miss"] += 1
+    REGISTRY.inc("ipobot_cache_total", {"cache": cache, "result": "hit" if hit else "miss"}, 1, "Cache lookups")
+    _emit({"type": "cache", "cache": cache, "hit": hit})
+
+
+def field_source(field: str, provider: Optional[str]) -> None:
+    """Remember which provider supplied a fundamentals field (None = cleared)."""
+    t = _current.get()
+    if t is None:
+        return
+    with t._lock:
+        if provider is None:
+            t.field_sources.pop(field, None)
+        else:
+            t.field_sources[field] = provider
@@ -0,0 +1,168 @@
+# src/ipobot/model/backtest.py
+# Threshold backtests: given each past IPO's model probability and realised listing-day
+# return, evaluate every (buy_prob, hold_prob) pair of a grid at once.
+#
+# Decision rule (as in the pipeline): BUY if p >= buy, HOLD if hold <= p < buy, else AVOID.
+# A BUY takes a full position at the issue price and sells at the listing-day close,
+# a HOLD takes `hold_weight` of one (0 = sit out), an AVOID takes nothing.
+# Per pair:
+#   n_buy, n_hold      decisions of each kind
+#   n_trades           positions taken (BUYs, plus HOLDs when hold_weight > 0)
+#   hit_rate           share of positions that made money
+#   avg_gain_pct       position-weighted mean listing return
+#   total_gain_pct     sum of weighted returns (equal stake per IPO, no compounding)
+#   max_drawdown_pct   worst peak-to-trough fall of that running sum, in listing order
+#
+# Pairs are evaluated in chunks as (pairs x IPOs) matrices, so a 10k-pair grid over
+# thousands of listings is a handful of NumPy passes.
+
+from __future__ import annotations
+
+import csv, json, pathlib
+from typing import Dict, Iterable, List, Optional
+
+from ipobot.model.predict import FEATURES
+
+METRICS = ["n_buy", "n_hold", "n_trades", "hit_rate", "avg_gain_pct", "total_gain_pct", "max_drawdown_pct"]
+CHUNK_CELLS = 4_000_000  # pairs x IPOs per pass (~100 MB of float64 temporaries)
+
+
+def threshold_grid(lo: float = 0.30, hi: float = 0.95, step: float = 0.005):
+    """(buy, hold) arrays of every pair on the grid with hold <= buy."""
+    import numpy as np
+
+    t = np.round(np.arange(lo, hi + step / 2, step), 6)
+    b, h = np.meshgrid(t, t, indexing="ij")
+    keep = h <= b
+    return b[keep], h[keep]
+
+
+def sweep(prob, ret, buy, hold, *, hold_weight: float = 0.0, order=None) -> Dict[str, object]:
+    """
+    Metrics for every (buy[i], hold[i]) pair over IPOs with probabilities `prob` and
+    listing returns `ret` (%). `order` (e.g. listing dates) sets the sequence used for
+    drawdown; rows are taken as given otherwise. Returns {'buy_prob', 'hold_prob', *METRICS} arrays.
+    """
+    import numpy as np
+
+    p = np.asarray(prob, dtype=float)
+    r = np.asarray(ret, dtype=float)
+    ok = ~(np.isnan(p) | np.isnan(r))
+    if order is not None:
+        idx = np.argsort(np.asarray(order)[ok], kind="stable")
+        p, r = p[ok][idx], r[ok][idx]
+    else:
+        p, r = p[ok], r[ok]
+    buy = np.asarray(buy, dtype=float)
+    hold = np.asarray(hold, dtype=float)
+    if buy.shape != hold.shape:
+        raise ValueError("buy and hold grids must have the same shape")
+    n_pairs, n = buy.size, p.size
+    out = {"buy_prob": buy, "hold_prob": hold}
+    out.update({m: np.full(n_pairs, np.nan) for m in METRICS})
+    if not n:
+        out["n_buy"][:] = out["n_hold"][:] = out["n_trades"][:] = 0
+        return out
+
+    win = (r > 0).astype(float)
+    step = max(1, CHUNK_CELLS // n)
+    for s in range(0, n_pairs, step):
+        b = buy[s:s + step, None]
+        h = hold[s:s + step, None]
+        is_buy = p >= b
+        is_hold = (p >= h) & ~is_buy
+        w = is_buy + hold_weight * is_hold                # position size per IPO
+        taken = w > 0
+        n_pos = taken.sum(axis=1)
+        wsum = w.sum(axis=1)
+        pnl = w * r
+        equity = np.cumsum(pnl, axis=1)
+        peak = np.maximum.accumulate(np.maximum(equity, 0.0), axis=1)  # start flat at 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out["hit_rate"][s:s + step] = np.where(n_pos > 0, (taken * win).sum(axis=1) / n_pos, np.nan)
+            out["avg_gain_pct"][s:s + step] = np.where(wsum > 0, pnl.sum(axis=1) / wsum, np.nan)
+        out["n_buy"][s:s + step] = is_buy.sum(axis=1)
+        out["n_hold"][s:s + step] = is_hold.sum(axis=1)
+        out["n_trades"][s:s + step] = n_pos
+        out["total_gain_pct"][s:s + step] = equity[:, -1]
+        out["max_drawdown_pct"][s:s + step] = (peak - equity).max(axis=1)
+    return out
+
+
+def best(results: Dict[str, object], by: str = "total_gain_pct", *, min_trades: int = 10,
+         top: int = 10) -> List[Dict]:
+    """Top pairs by `by` (max_drawdown_pct: smallest first) among pairs with >= min_trades positions."""
+    import numpy as np
+
+    val = np.asarray(results[by], dtype=float)
+    key = np.where((results["n_trades"] >= min_trades) & ~np.isnan(val), val if by == "max_drawdown_pct" else -val, np.inf)
+    rows = []
+    for i in np.argsort(key, kind="stable")[:top]:
+        if not np.isfinite(key[i]):
+            break
+        rows.append({k: _py(results[k][i]) for k in ["buy_prob", "hold_prob"] + METRICS})
+    return rows
+
+
+def _py(v):
+    v = float(v)
+    return int(v) if v.is_integer() and abs(v) < 2 ** 53 else round(v, 4)
+
+
+# ---------- inputs ----------
+def load_history(path: str, model=None) -> Dict[str, object]:
+    """
+    {'key', 'listing_date', 'prob', 'ret'} from a CSV/JSONL with listing_return_pct (%) and
+    either a `probability` column or the FEATURES columns (build_dataset's table), which
+    are then scored with `model`. Scoring the rows a model was trained on is in-sample:
+    use a model fitted on earlier listings for an honest backtest.
+    """
+    import numpy as np
+
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        f.seek(0)
+        rows = [json.loads(l) for l in f if l.strip()] if first.lstrip().startswith("{") else list(csv.DictReader(f))
+
+    def num(v):
+        try:
+            return float(v) if v not in (None, "") else np.nan
+        except (TypeError, ValueError):
+            return np.nan
+
+    ret = np.array([num(r.get("listing_return_pct")) for r in rows])
+    if rows and "probability" in rows[0]:
+        prob = np.array([num(r.get("probability")) for r in rows])
+    else:
+        if model is None:
+            raise ValueError(f"{path}: no probability column; pass a model to score {FEATURES}")
+        X = np.array([[num(r.get(c)) for c in FEATURES] for r in rows], dtype=float).reshape(-1, len(FEATURES))
+        prob = np.asarray(model.predict_proba(np.nan_to_num(X)))[:, 1] if len(X) else np.empty(0)
+    return {
+        "key": [r.get("key") or r.get("symbol") for r in rows],
+        "listing_date": [str(r.get("listing_date") or "") for r in rows],
+        "prob": prob,
+        "ret": ret,
+    }
+
+
+def write_results(results: Dict[str, object], path: str) -> int:
+    cols = ["buy_prob", "hold_prob"] + METRICS
+    out = pathlib.Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    n = len(results["buy_prob"])
+    with open(out, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(cols)
+        for i in range(n):
+            w.writerow([_py(results[c][i]) if results[c][i] == results[c][i] else "" for c in cols])
+    return n
+
+
+def run(path: str, model=None, *, buy: Optional[Iterable[float]] = None, hold: Optional[Iterable[float]] = None,
+        hold_weight: float = 0.0, **grid) -> Dict[str, object]:
+    """load_history() + sweep() over `buy`/`hold` (paired arrays) or threshold_grid(**grid)."""
+    hist = load_history(path, model=model)
+    if buy is None or hold is None:
+        buy, hold = threshold_grid(**grid)
+    return sweep(hist["prob"], hist["ret"], buy, hold, hold_weight=hold_weight, order=hist["listing_date"])
@@ -0,0 +1,323 @@
+# src/ipobot/model/dataset.py
+# Training data from past IPOs: one row per listing with
+#   - news sentiment from the `news_days` before listing (Google News after:/before: search)
+#   - fundamentals as of listing (DRHP when one is on file, else the last annual
+#     statements dated before listing, with P/E at the issue price); rows with neither
+#     get fundamentals_source "none" and stay out of the training table
+#   - label: listing-day return vs issue price (input column, else yfinance first close)
+# Rows are extracted on a thread/process pool and appended to a JSONL checkpoint as they
+# finish, so an interrupted build resumes where it stopped.
+
+from __future__ import annotations
+
+import csv, datetime as dt, json, os, pathlib, time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from ipobot.model.predict import FEATURES, feature_vector
+
+NEWS_DAYS = 30
+LABEL_MIN_RETURN = 0.0   # listing-day return (%) above which label = 1
+TABLE_COLUMNS = ["key", "symbol", "name", "listing_date", "issue_price", "listing_price",
+                 "listing_return_pct", "label"] + FEATURES + ["n_news", "fundamentals_source"]
+
+
+# ---------- input ----------
+def _num(v) -> Optional[float]:
+    try:
+        return None if v in (None, "") else float(str(v).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def read_ipos(path: str) -> Iterator[Dict]:
+    """
+    CSV/JSONL of past IPOs: symbol, listing_date (YYYY-MM-DD), issue_price; optional name,
+    query, listing_price (listing-day close), pe_discount_pct.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        f.seek(0)
+        rows = (json.loads(l) for l in f if l.strip()) if first.lstrip().startswith("{") else csv.DictReader(f)
+        for d in rows:
+            d = {str(k).strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in d.items() if k}
+            sym, date = d.get("symbol") or "", d.get("listing_date") or ""
+            if not sym or not date:
+                continue
+            yield {
+                "key": f"{sym}@{date}",
+                "symbol": sym,
+                "name": d.get("name") or sym.split(".")[0],
+                "listing_date": date,
+                "issue_price": _num(d.get("issue_price")),
+                "listing_price": _num(d.get("listing_price")),
+                "pe_discount_pct": _num(d.get("pe_discount_pct")),
+                "query": d.get("query") or f"{d.get('name') or sym.split('.')[0]} IPO",
+            }
+
+
+# ---------- per-IPO extraction ----------
+def _history_news(query: str, listing: dt.date, days: int) -> List[Dict]:
+    from ipobot.data.news_scraper import _google_rss_fetch, _from_config
+
+    lang = _from_config().get("language", "en")
+    start = listing - dt.timedelta(days=days)
+    return _google_rss_fetch(f"{query} after:{start.isoformat()} before:{listing.isoformat()}", lang, 20)
+
+
+def _listing_price(symbol: str, listing: dt.date) -> Optional[float]:
+    """First close on/after the listing date."""
+    import yfinance as yf
+    from ipobot.metrics import provider_call
+
+    with provider_call("yfinance", "download:listing") as c:
+        h = yf.download(symbol, start=listing.isoformat(), end=(listing + dt.timedelta(days=7)).isoformat(),
+                        interval="1d", auto_adjust=False, progress=False, threads=False)
+        c.ok = h is not None and len(h) > 0
+    if not c.ok:
+        return None
+    close = h["Close"]
+    if getattr(close, "ndim", 1) == 2:
+        close = close.iloc[:, 0]
+    close = close.dropna()
+    return float(close.iloc[0]) if len(close) else None
+
+
+def _fundamentals_at(symbol: str, listing: dt.date, issue_price: Optional[float]) -> Optional[Dict]:
+    """
+    ROE / D/E / revenue CAGR from annual statements dated before listing; P/E at the issue
+    price over the share count of that balance sheet. None when yfinance has no period that
+    old (it only keeps the last few years), so missing data never reads as weak fundamentals.
+    """
+    from ipobot.fundamentals import yf_adapter
+    from ipobot.fundamentals.ratios import _revenue_cagr, _safe_div, _pct, _to_float, _round
+
+    st = yf_adapter.statements(symbol, "yearly")
+    out = {"P/E": None, "ROE (%)": None, "D/E": None, "Revenue CAGR (%)": None}
+    if st is None:
+        return None
+
+    def before(row):
+        if row is None:
+            return []
+        vals = []
+        for col, v in row.items():  # yfinance columns are period-end dates, newest first
+            try:
+                if col.date() <= listing:
+                    vals.append(_to_float(v))
+            except AttributeError:
+                vals.append(_to_float(v))
+        return [v for v in vals if v is not None and v == v]
+
+    ni = before(st.row("income", ["Net Income", "NetIncome"]))
+    rev = before(st.row("income", ["Total Revenue", "Revenue"]))
+    eq = before(st.row("balance", ["Total Stockholder Equity", "Total Shareholder Equity",
+                                   "Stockholders Equity", "Total Equity"]))
+    debt = before(st.row("balance", ["Total Debt", "Long Term Debt"]))
+    # not st.latest_shares(): today's count would leak post-listing dilution/buybacks into P/E
+    shares = before(st.row("balance", ["Ordinary Shares Number", "Share Issued"]))
+    if not (ni or rev or eq or debt):
+        return None
+    if ni and eq:
+        out["ROE (%)"] = _round(_pct(_safe_div(ni[0], eq[0])))
+    if debt and eq:
+        out["D/E"] = _round(_safe_div(debt[0], eq[0]))
+    cagr = _revenue_cagr(rev, min_years=2)
+    out["Revenue CAGR (%)"] = _round(_pct(cagr))
+    eps = _safe_div(ni[0], shares[0]) if ni and shares else None
+    if issue_price and eps:
+        out["P/E"] = _round(issue_price / eps)
+    return out
+
+
+def extract_row(ipo: Dict, news_days: int = NEWS_DAYS, label_min_return: float = LABEL_MIN_RETURN) -> Dict:
+    """Features + label for one past IPO. Never raises; failures land in `error`."""
+    from ipobot.nlp.sentiment import sentiment_score
+
+    row = {k: ipo.get(k) for k in ("key", "symbol", "name", "listing_date", "issue_price", "listing_price")}
+    try:
+        listing = dt.date.fromisoformat(str(ipo["listing_date"])[:10])
+
+        news = _history_news(ipo["query"], listing, news_days)
+        news = [n for n in news if "no recent articles" not in (n.get("title") or "")]
+        sent = sentiment_score(news) if news else 0.0
+
+        fund, source = None, "yfinance"
+        from ipobot.data.drhp_extractor import find_drhp
+        from ipobot.config import load_config
+        pdf = find_drhp(ipo.get("name") or "", load_config() or {}) or find_drhp(ipo["symbol"], load_config() or {})
+        if pdf:
+            from ipobot.data.drhp_extractor import extract_from_pdf
+            fund, source = extract_from_pdf(pdf)["fundamentals"], "drhp"
+        if fund is None or all(fund.get(k) is None for k in ("ROE (%)", "D/E", "Revenue CAGR (%)")):
+            fund = _fundamentals_at(ipo["symbol"], listing, ipo.get("issue_price"))
+            fund, source = (fund, "yfinance") if fund is not None else ({}, "none")
+        if ipo.get("pe_discount_pct") is not None:
+            fund["P/E discount vs peer (%)"] = ipo["pe_discount_pct"]
+
+        price = ipo.get("listing_price") or _listing_price(ipo["symbol"], listing)
+        issue = ipo.get("issue_price")
+        ret = (price / issue - 1.0) * 100.0 if price and issue else None
+
+        row.update(dict(zip(FEATURES, feature_vector(sent, {"fundamentals": fund}))))
+        row.update({
+            "listing_price": price,
+            "listing_return_pct": None if ret is None else round(ret, 2),
+            "label": None if ret is None else int(ret > label_min_return),
+            "n_news": len(news),
+            "fundamentals_source": source,
+        })
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+# ---------- build (parallel, checkpointed) ----------
+def done_keys(checkpoint: pathlib.Path) -> Set[str]:
+    keys: Set[str] = set()
+    try:
+        with open(checkpoint, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue  # truncated last line from an interrupted run
+                if r.get("key") and "error" not in r:
+                    keys.add(r["key"])
+    except FileNotFoundError:
+        pass
+    return keys
+
+
+def build(ipos: Iterable[Dict], checkpoint: str, *, workers: int = 8, executor: str = "thread",
+          resume: bool = True, **extract_kwargs) -> Dict:
+    """
+    Extract every IPO not yet in `checkpoint` (JSONL, appended and flushed per row).
+    Failed rows are written with `error` and retried on the next run.
+    """
+    ckpt = pathlib.Path(checkpoint)
+    ckpt.parent.mkdir(parents=True, exist_ok=True)
+    skip = done_keys(ckpt) if resume else set()
+    if not resume and ckpt.exists():
+        ckpt.unlink()
+
+    if executor == "process":
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ipobot-dataset")
+
+    stats = {"done": 0, "failed": 0, "skipped": 0}
+    t0 = time.perf_counter()
+    it = iter(ipos)
+    pending = set()
+    with pool, open(ckpt, "a", encoding="utf-8") as out:
+        def fill():
+            for ipo in it:
+                if ipo["key"] in skip:
+                    stats["skipped"] += 1
+                    continue
+                skip.add(ipo["key"])  # duplicates in the input run once
+                pending.add(pool.submit(extract_row, ipo, **extract_kwargs))
+                if len(pending) >= workers * 2:
+                    return
+
+        fill()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                pending.discard(fut)
+                row = fut.result()
+                stats["failed" if "error" in row else "done"] += 1
+                out.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+            fill()
+    stats["elapsed_s"] = round(time.perf_counter() - t0, 1)
+    return stats
+
+
+def iter_checkpoint(checkpoint: str) -> Iterator[Dict]:
+    """Latest good row per key from a checkpoint (later lines win)."""
+    rows: Dict[str, Dict] = {}
+    with open(checkpoint, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue
+            if r.get("key") and "error" not in r:
+                rows[r["key"]] = r
+    yield from rows.values()
+
+
+def write_table(checkpoint: str, table: str, *, keep_unsourced: bool = False) -> int:
+    """
+    Training table (CSV, TABLE_COLUMNS) of labelled rows, ordered by listing date.
+    Rows without fundamentals (fundamentals_source "none") are left out unless `keep_unsourced`.
+    """
+    rows = sorted((r for r in iter_checkpoint(checkpoint) if r.get("label") is not None
+                   and (keep_unsourced or r.get("fundamentals_source") != "none")),
+                  key=lambda r: (str(r.get("listing_date")), r["key"]))
+    pathlib.Path(table).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{table}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=TABLE_COLUMNS, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+    os.replace(tmp, table)
+    return len(rows)
+
+
+# ---------- training ----------
+def load_table(table: str):
+    import numpy as np
+
+    X, y, dates = [], [], []
+    with open(table, "r", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            X.append([float(r[c] or 0.0) for c in FEATURES])
+            y.append(int(r["label"]))
+            dates.append(r["listing_date"])
+    return np.asarray(X, dtype=float), np.asarray(y, dtype=int), dates
+
+
+def train(table: str, model_out: str, *, n_jobs: int = -1, n_estimators: int = 300,
+          holdout: float = 0.2, random_state: int = 0) -> Dict:
+    """
+    RandomForest on FEATURES using every core (`n_jobs=-1`). The newest `holdout` share of
+    listings is scored first (time-ordered split, no look-ahead), then the model is refit on all rows.
+    """
+    import pickle
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y, _dates = load_table(table)  # already in listing-date order
+    if len(y) < 10 or len(set(y.tolist())) < 2:
+        raise ValueError(f"need at least 10 labelled rows with both classes, got {len(y)}")
+
+    def make():
+        return RandomForestClassifier(n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state,
+                                      min_samples_leaf=2, class_weight="balanced")
+
+    report = {"rows": int(len(y)), "positive_rate": round(float(y.mean()), 4), "n_jobs": n_jobs}
+    cut = int(len(y) * (1 - holdout))
+    if 0 < cut < len(y) and len(set(y[:cut].tolist())) == 2:
+        t0 = time.perf_counter()
+        m = make().fit(X[:cut], y[:cut])
+        p = m.predict_proba(X[cut:])[:, 1]
+        report["holdout_rows"] = int(len(y) - cut)
+        report["holdout_accuracy"] = round(float(((p >= 0.5).astype(int) == y[cut:]).mean()), 4)
+        try:
+            from sklearn.metrics import roc_auc_score
+            report["holdout_auc"] = round(float(roc_auc_score(y[cut:], p)), 4)
+        except ValueError:
+            pass  # one class in the holdout
+        report["fit_s"] = round(time.perf_counter() - t0, 2)
+
+    model = make().fit(X, y)
+    out = pathlib.Path(model_out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "wb") as f:
+        pickle.dump(model, f)
+    report["model"] = str(out)
+    return report
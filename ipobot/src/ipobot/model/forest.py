@@ -0,0 +1,193 @@
+# src/ipobot/model/forest.py
+# Compiled tree ensembles: a fitted sklearn forest (RandomForest / ExtraTrees classifier)
+# flattened into contiguous NumPy arrays and scored straight from them.
+#
+#   feature[i]    split feature of node i (leaves: 0)
+#   threshold[i]  go left when x[feature] <= threshold (float32 compare, as sklearn does)
+#   left/right[i] absolute child indices; leaves point at themselves so every row can take
+#                 `depth` steps without masking
+#   missing_left  where NaN goes at node i
+#   value[i, c]   class-c probability at node i (normalised per node, like tree.predict_proba)
+#   cover[i]      weighted training samples reaching node i
+#   roots[t]      first node of tree t
+#
+# Saved with np.savez (.npz, a zip); load_or_train_model() recognises the format by its
+# magic bytes, so `model_path` may point at either a pickle or an exported model.
+#
+#   python -m ipobot.scripts.export_model models/demo_model.pkl models/demo_model.npz
+
+from __future__ import annotations
+
+import os, pathlib, tempfile
+from typing import Optional
+
+FORMAT = "ipobot-forest"
+VERSION = 1
+_ZIP_MAGIC = b"PK\x03\x04"
+
+
+class CompiledForest:
+    """predict_proba() over flattened trees: one vectorised step per tree level."""
+
+    __slots__ = ("feature", "threshold", "left", "right", "missing_left", "value", "cover",
+                 "roots", "classes", "depth", "n_features")
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, cover, roots,
+                 classes, depth, n_features):
+        import numpy as np
+
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.missing_left = np.ascontiguousarray(missing_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.cover = np.ascontiguousarray(cover, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.classes = np.asarray(classes)
+        self.depth = int(depth)
+        self.n_features = int(n_features)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def classes_(self):  # sklearn-compatible name
+        return self.classes
+
+    def apply(self, X):
+        """Leaf index reached in every tree: (n_rows, n_trees)."""
+        import numpy as np
+
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"expected {self.n_features} features, got {X.shape[1]}")
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X):
+        """(n_rows, n_classes): mean of the per-tree leaf probabilities."""
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes[self.predict_proba(X).argmax(axis=1)]
+
+    # ---------- persistence ----------
+    def save(self, path: os.PathLike) -> pathlib.Path:
+        import numpy as np
+
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".npz")
+        os.fchmod(fd, 0o644)  # mkstemp's 0600 would lock out a server/scheduler running as another user
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, format=np.array(FORMAT), version=np.array(VERSION),
+                     depth=np.array(self.depth), n_features=np.array(self.n_features),
+                     **{k: getattr(self, k) for k in ("feature", "threshold", "left", "right",
+                                                      "missing_left", "value", "cover", "roots", "classes")})
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: os.PathLike) -> "CompiledForest":
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as z:
+            if str(z["format"]) != FORMAT:
+                raise ValueError(f"{path}: not an {FORMAT} file")
+            if int(z["version"]) > VERSION:
+                raise ValueError(f"{path}: format version {int(z['version'])} is newer than {VERSION}")
+            return cls(z["feature"], z["threshold"], z["left"], z["right"], z["missing_left"],
+                       z["value"], z["cover"], z["roots"], z["classes"], z["depth"], z["n_features"])
+
+
+def is_compiled(path: os.PathLike) -> bool:
+    """True when `path` holds an exported forest (zip magic) rather than a pickle."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == _ZIP_MAGIC
+    except OSError:
+        return False
+
+
+def export(model) -> CompiledForest:
+    """Flatten a fitted sklearn forest classifier (or a single decision tree) into arrays."""
+    import numpy as np
+
+    trees = getattr(model, "estimators_", None)
+    if trees is None:
+        trees = [model]
+    if not hasattr(trees[0], "tree_") or getattr(model, "n_outputs_", 1) != 1:
+        raise TypeError(f"{type(model).__name__}: only single-output tree classifiers can be exported")
+
+    parts = {k: [] for k in ("feature", "threshold", "left", "right", "missing_left", "value", "cover")}
+    roots, offset, depth = [], 0, 0
+    for est in trees:
+        t = est.tree_
+        n = t.node_count
+        idx = np.arange(n)
+        leaf = t.children_left < 0
+        val = t.value[:, 0, :].astype(np.float64)
+        tot = val.sum(axis=1, keepdims=True)
+        tot[tot == 0.0] = 1.0
+        missing = getattr(t, "missing_go_to_left", None)
+        parts["feature"].append(np.where(leaf, 0, t.feature))
+        parts["threshold"].append(np.where(leaf, 0.0, t.threshold))
+        parts["left"].append(np.where(leaf, idx, t.children_left) + offset)
+        parts["right"].append(np.where(leaf, idx, t.children_right) + offset)
+        parts["missing_left"].append(np.zeros(n, bool) if missing is None else missing.astype(bool))
+        parts["value"].append(val / tot)
+        parts["cover"].append(t.weighted_n_node_samples.astype(np.float64))
+        roots.append(offset)
+        offset += n
+        depth = max(depth, int(t.max_depth))
+
+    return CompiledForest(**{k: np.concatenate(v) for k, v in parts.items()}, roots=roots,
+                          classes=model.classes_, depth=depth, n_features=model.n_features_in_)
+
+
+def check_parity(model, compiled: CompiledForest, X=None, atol: float = 1e-9, n: int = 2000,
+                 seed: int = 0) -> float:
+    """
+    Largest |sklearn - compiled| probability over `X` (default: `n` random rows spanning each
+    feature's split range). Raises AssertionError above `atol`.
+    """
+    import numpy as np
+
+    if X is None:
+        rng = np.random.default_rng(seed)
+        inner = compiled.left != np.arange(len(compiled.left))
+        lo = np.full(compiled.n_features, -1.0)
+        hi = np.full(compiled.n_features, 1.0)
+        for f in range(compiled.n_features):
+            thr = compiled.threshold[inner & (compiled.feature == f)]
+            if len(thr):
+                lo[f], hi[f] = thr.min() - 1.0, thr.max() + 1.0
+        X = rng.uniform(lo, hi, size=(n, compiled.n_features))
+        X[: n // 4] = np.round(X[: n // 4])  # 0/1 flags sit exactly on their split points
+    X = np.asarray(X, dtype=float)
+    diff = float(np.abs(np.asarray(model.predict_proba(X)) - compiled.predict_proba(X)).max())
+    if diff > atol:
+        raise AssertionError(f"compiled forest differs from sklearn by {diff:.3g} (> {atol:g})")
+    return diff
+
+
+def export_file(src: os.PathLike, dst: os.PathLike, verify: bool = True) -> Optional[float]:
+    """Pickled forest at `src` -> exported model at `dst`. Returns the parity error when verified."""
+    import pickle
+
+    with open(src, "rb") as f:
+        model = pickle.load(f)
+    compiled = export(model)
+    diff = check_parity(model, compiled) if verify else None
+    compiled.save(dst)
+    return diff
@@ -2,11 +2,26 @@
 import os, pickle, pathlib
 from typing import Tuple
 
+# Unpickled models keyed by (resolved path, mtime) so long-lived processes stay warm
+_MODEL_CACHE: dict = {}
+
 def load_or_train_model(path: str):
     p = pathlib.Path(path)
     if p.exists():
-        with open(p, "rb") as f:
-            return pickle.load(f)
+        key = (str(p.resolve()), p.stat().st_mtime_ns)
+        model = _MODEL_CACHE.get(key)
+        from ipobot.metrics import cache_event
+        cache_event("model", model is not None)
+        if model is None:
+            from ipobot.model.forest import CompiledForest, is_compiled
+            if is_compiled(p):  # exported by ipobot.scripts.export_model
+                model = CompiledForest.load(p)
+            else:
+                with open(p, "rb") as f:
+                    model = pickle.load(f)
+            _MODEL_CACHE.clear()
+            _MODEL_CACHE[key] = model
+        return model
     # Fallback: return a trivial stub that mimics predict_proba
     class Stub:
         def predict_proba(self, X):
@@ -19,17 +34,52 @@ def load_or_train_model(path: str):
             return np.stack([1-prob, prob], axis=1)
     return Stub()
 
-def predict_gain(model, sent: float, fdetail: dict) -> Tuple[float, float]:
-    import numpy as np
-    x = [[
+# Model input, in column order (train_demo, build_dataset and predict_gain all use this)
+FEATURES = ["sentiment", "pe_discount", "roe_flag", "d2e_flag", "growth_flag", "fscore"]
+ROE_FLAG_MIN = 15.0     # ROE (%) at or above
+D2E_FLAG_MAX = 1.0      # D/E at or below
+GROWTH_FLAG_MIN = 15.0  # revenue CAGR (%) at or above
+
+def feature_vector(sent: float, fdetail: dict) -> list:
+    """
+    One row of FEATURES. Flags come from `fdetail` when set there, else from the
+    fundamentals dict inside it (score_fundamentals details or get_fundamentals output).
+    """
+    fdetail = fdetail or {}
+    fund = fdetail.get("fundamentals") or fdetail
+    def num(*keys):
+        for k in keys:
+            v = fund.get(k)
+            if v is not None:
+                try:
+                    return float(v)
+                except (TypeError, ValueError):
+                    pass
+        return None
+    def flag(key, value, ok):
+        if key in fdetail:
+            return 1.0 if fdetail.get(key) else 0.0
+        return 1.0 if value is not None and ok(value) else 0.0
+
+    disc = fdetail.get("pe_discount_vs_peer")
+    if disc is None:
+        pct = num("P/E discount vs peer (%)")
+        disc = None if pct is None else pct / 100.0
+    roe = flag("roe_flag", num("ROE (%)", "roe"), lambda v: v >= ROE_FLAG_MIN)
+    d2e = flag("d2e_flag", num("D/E", "debt_to_equity", "de"), lambda v: v <= D2E_FLAG_MAX)
+    growth = flag("growth_flag", num("Revenue CAGR (%)", "revenue_cagr", "rev_cagr"), lambda v: v >= GROWTH_FLAG_MIN)
+    return [
         float(sent or 0.0),
-        float(fdetail.get("pe_discount_vs_peer") or 0.0),
-        1.0 if fdetail.get("roe_flag") else 0.0,
-        1.0 if fdetail.get("d2e_flag") else 0.0,
-        1.0 if fdetail.get("growth_flag") else 0.0,
+        float(disc or 0.0),
+        roe,
+        d2e,
+        growth,
         # simple composite
-        float(0.33*(fdetail.get("roe_flag") and 1 or 0) + 0.33*(fdetail.get("d2e_flag") and 1 or 0) + 0.34*(fdetail.get("growth_flag") and 1 or 0))
-    ]]
+        0.33 * roe + 0.33 * d2e + 0.34 * growth,
+    ]
+
+def predict_gain(model, sent: float, fdetail: dict) -> Tuple[float, float]:
+    x = [feature_vector(sent, fdetail)]
     prob = float(model.predict_proba(x)[0,1])
     # expected gain heuristic: map prob [0,1] -> [-10%, +30%]
     gain = -10 + 40*prob
@@ -2,16 +2,18 @@
 from typing import List, Dict
 
 # ---------- simple rule-based fallback (keeps app alive if model fails) ----------
+def _rule_item_score(n: Dict) -> float:
+    s = (n.get("sent") or n.get("tone") or "neutral").lower()
+    if "pos" in s:
+        return 1.0
+    if "neg" in s:
+        return -1.0
+    return 0.0
+
 def _rule_sentiment_score(news_items: List[Dict]) -> float:
     if not news_items:
         return 0.0
-    score = 0
-    for n in news_items:
-        s = (n.get("sent") or n.get("tone") or "neutral").lower()
-        if "pos" in s:
-            score += 1
-        elif "neg" in s:
-            score -= 1
+    score = sum(_rule_item_score(n) for n in news_items)
     return max(-1.0, min(1.0, score / max(1, len(news_items))))
 
 # ---------- FinBERT (lazy load, cached) ----------
@@ -21,6 +23,8 @@ _device = "cpu"
 
 def _load_finbert(model_name: str = "ProsusAI/finbert"):
     global _model, _tokenizer
+    from ipobot.metrics import cache_event
+    cache_event("finbert", _model is not None)
     if _model is not None:
         return
     # Optional: silence HF tokenizers parallelism warning
@@ -32,9 +36,7 @@ def _load_finbert(model_name: str = "ProsusAI/finbert"):
     _model = AutoModelForSequenceClassification.from_pretrained(model_name)
     _model.eval()
 
-def _finbert_score_headlines(headlines: List[str], max_len: int = 128) -> float:
-    if not headlines:
-        return 0.0
+def _finbert_probs(headlines: List[str], max_len: int = 128):
     import torch
     from torch.nn.functional import softmax
 
@@ -47,8 +49,12 @@ def _finbert_score_headlines(headlines: List[str], max_len: int = 128) -> float:
     )
     with torch.no_grad():
         outputs = _model(**inputs)
-        probs = softmax(outputs.logits, dim=-1)  # [N, 3] -> ['negative','neutral','positive']
+        return softmax(outputs.logits, dim=-1)  # [N, 3] -> ['negative','neutral','positive']
 
+def _finbert_score_headlines(headlines: List[str], max_len: int = 128) -> float:
+    if not headlines:
+        return 0.0
+    probs = _finbert_probs(headlines, max_len=max_len)
     neg = probs[:, 0].mean().item()
     neu = probs[:, 1].mean().item()
     pos = probs[:, 2].mean().item()
@@ -56,13 +62,16 @@ def _finbert_score_headlines(headlines: List[str], max_len: int = 128) -> float:
     return float((-1.0 * neg) + (0.0 * neu) + (+1.0 * pos))
 
 # ---------- public API ----------
-def sentiment_score(news_items: List[Dict]) -> float:
+def sentiment_score(news_items: List[Dict], deadline=None) -> float:
     """
     Returns sentiment in [-1, 1].
     If config.use_live_sentiment is true -> use FinBERT, else rule-based.
-    Falls back to rule-based if anything goes wrong (no crash).
+    Falls back to rule-based if anything goes wrong (no crash) or the `deadline` has passed.
     """
     try:
+        if deadline is not None and deadline.expired():
+            return _rule_sentiment_score(news_items)
+
         from ipobot.config import load_config
         cfg = load_config() or {}
         if not cfg.get("use_live_sentiment", False):
@@ -81,3 +90,82 @@ def sentiment_score(news_items: List[Dict]) -> float:
     except Exception:
         # Graceful fallback
         return _rule_sentiment_score(news_items)
+
+def item_scores(news_items: List[Dict], deadline=None) -> List[float]:
+    """
+    One score in [-1, 1] per item (FinBERT P(pos) - P(neg), or the rule tag), same
+    config switch and fallbacks as sentiment_score(). Used to score only new articles.
+    """
+    if not news_items:
+        return []
+    try:
+        if deadline is not None and deadline.expired():
+            return [_rule_item_score(n) for n in news_items]
+
+        from ipobot.config import load_config
+        cfg = load_config() or {}
+        if not cfg.get("use_live_sentiment", False):
+            return [_rule_item_score(n) for n in news_items]
+
+        s_cfg = cfg.get("sentiment", {}) or {}
+        _load_finbert(s_cfg.get("model", "ProsusAI/finbert"))
+        out = [_rule_item_score(n) for n in news_items]
+        idx = [i for i, n in enumerate(news_items) if str(n.get("title") or "").strip()]
+        if idx:
+            probs = _finbert_probs([str(news_items[i]["title"]).strip() for i in idx],
+                                   max_len=int(s_cfg.get("max_len", 128)))
+            for i, (neg, _neu, pos) in zip(idx, probs.tolist()):
+                out[i] = float(pos - neg)
+        return out
+
+    except Exception:
+        return [_rule_item_score(n) for n in news_items]
+
+# ---------- article bodies (long documents) ----------
+def _window_ids(texts: List[str], max_len: int, stride: int, max_windows: int):
+    """[(text index, input_ids)] token windows of every text (overlapping by `stride`)."""
+    enc = _tokenizer(texts, truncation=True, max_length=max_len, stride=stride,
+                     return_overflowing_tokens=True, padding=False)
+    per_text: Dict[int, int] = {}
+    out = []
+    for ids, i in zip(enc["input_ids"], enc["overflow_to_sample_mapping"]):
+        if per_text.get(i, 0) < max_windows:  # the lead of an article carries its gist
+            per_text[i] = per_text.get(i, 0) + 1
+            out.append((int(i), ids))
+    return out
+
+def body_scores(texts: List[str], max_len: int = 512, stride: int = 64, batch_size: int = 32,
+                max_windows: int = 16) -> List[tuple]:
+    """
+    FinBERT over long texts: each is split into `max_len`-token windows, windows from all
+    texts are packed into length-sorted batches (little padding) and each text's score is
+    the token-weighted mean of P(pos) - P(neg) over its windows. Returns [(score, windows)].
+    Call _load_finbert() first.
+    """
+    import torch
+    from torch.nn.functional import softmax
+
+    windows = _window_ids(texts, max_len, stride, max_windows)
+    windows.sort(key=lambda w: len(w[1]), reverse=True)
+    acc = [[0.0, 0.0, 0] for _ in texts]  # weighted score sum, weight, windows
+    with torch.inference_mode():
+        for b in range(0, len(windows), batch_size):
+            chunk = windows[b:b + batch_size]
+            batch = _tokenizer.pad({"input_ids": [ids for _, ids in chunk]}, return_tensors="pt")
+            probs = softmax(_model(**batch).logits, dim=-1).tolist()
+            for (i, ids), (neg, _neu, pos) in zip(chunk, probs):
+                acc[i][0] += len(ids) * (pos - neg)
+                acc[i][1] += len(ids)
+                acc[i][2] += 1
+    return [(round(s / w, 4) if w else 0.0, n) for s, w, n in acc]
+
+def body_scorer(cfg: Dict):
+    """(scorer(texts) -> [(score, windows)], model name) when FinBERT is on, else None."""
+    if not cfg.get("use_live_sentiment", False):
+        return None
+    s_cfg = cfg.get("sentiment", {}) or {}
+    b_cfg = s_cfg.get("bodies", {}) or {}
+    model_name = s_cfg.get("model", "ProsusAI/finbert")
+    _load_finbert(model_name)
+    kw = {k: int(b_cfg[k]) for k in ("max_len", "stride", "batch_size", "max_windows") if k in b_cfg}
+    return (lambda texts: body_scores(texts, **kw)), model_name
@@ -2,32 +2,72 @@
 
 from __future__ import annotations
 
+import os, time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Any, Callable, Iterable, Iterator, Tuple
+
 from .config import load_config
+from .deadline import Deadline, as_deadline, expired
+from .metrics import trace, stage, bind, queue_wait
 from .data.news_scraper import fetch_news_items
 from .data.financial_api import get_fundamentals
 from .nlp.sentiment import sentiment_score
 from .fundamentals.ratios import score_fundamentals
-from .model.predict import load_or_train_model, predict_gain
+from .model.predict import feature_vector, load_or_train_model, predict_gain
 from .engine.reasoning import build_reason
+from .records import Fundamentals
 
 def _to_ui_fundamentals(f: dict) -> dict:
-    """Return only the UI keys, mapping from internal keys when needed."""
-    f = f or {}
-    def pick(*keys):
-        for k in keys:
-            v = f.get(k)
-            if v is not None:
-                return v
-        return None
-    return {
-        "P/E": pick("P/E", "pe"),
-        "Peer P/E": pick("Peer P/E", "peer_pe"),
-        "ROE (%)": pick("ROE (%)", "roe"),
-        "D/E": pick("D/E", "debt_to_equity", "de"),
-        "Revenue CAGR (%)": pick("Revenue CAGR (%)", "revenue_cagr", "rev_cagr"),
-        "P/E discount vs peer (%)": pick("P/E discount vs peer (%)", "pe_discount_vs_peer"),
-    }
+    """Return only the UI keys, mapping from internal keys when needed (records.Fundamentals)."""
+    return Fundamentals.from_dict(f).to_ui()
+
+
+class _StagePool:
+    """
+    Threads for one run_pipeline call's budgeted stages, so a stuck provider can be abandoned.
+    Owned per run: a stage abandoned at its deadline keeps only its own run's thread busy, so
+    concurrent runs (server, batch, scheduler) never queue behind each other's stuck calls.
+    """
 
+    MAX_WORKERS = 10  # more than the stages of one run: even if every one is abandoned, none queues
+
+    def __init__(self):
+        self._pool: ThreadPoolExecutor | None = None
+
+    def submit(self, fn: Callable[[], Any]):
+        if self._pool is None:  # unbudgeted runs never start a thread
+            self._pool = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="ipobot-stage")
+        return self._pool.submit(fn)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)  # abandoned calls finish on their own
+
+
+def _run_stage(fn: Callable[[], Any], deadline: Deadline, pool: _StagePool) -> Tuple[Any, bool]:
+    """
+    Run one stage within the remaining budget. Returns (value, timed_out).
+    Unbounded deadlines call `fn` inline; exceptions propagate to the caller either way.
+    Time spent waiting for a worker goes to meta `queue_wait_ms`, not the stage's timing.
+    """
+    rem = deadline.remaining()
+    if rem is None:
+        return fn(), False
+    if rem <= 0:
+        return None, True
+    submitted = time.perf_counter()
+
+    def _started():
+        queue_wait(time.perf_counter() - submitted)
+        return fn()
+
+    fut = pool.submit(bind(_started))  # keep the caller's metrics trace in the worker
+    try:
+        return fut.result(timeout=rem), False
+    except FuturesTimeout:
+        fut.cancel()  # providers also see the deadline, so a running call winds down on its own
+        return None, True
 
 
 def run_pipeline(
@@ -36,6 +76,10 @@ def run_pipeline(
     *,
     override_thresholds: dict | None = None,
     symbol_is_final: bool = False,   # <-- NEW: if True, treat symbol_or_name as the final ticker
+    budget_ms: float | None = None,
+    deadline: Deadline | float | None = None,
+    drhp_path: str | None = None,
+    peer_symbols: list | None = None,
     **kwargs,
 ):
     """
@@ -51,36 +95,93 @@ def run_pipeline(
         Optional {'buy_prob': float, 'hold_prob': float} to override config thresholds.
     symbol_is_final : bool
         If True, do NOT call resolve_symbol or auto-append any exchange suffix. Use as-is.
+    budget_ms : float | None
+        End-to-end latency budget. Every stage and provider call only gets the remaining time.
+    deadline : Deadline | float | None
+        Absolute alternative to `budget_ms` (a Deadline or a time.monotonic() value).
+    drhp_path : str | None
+        DRHP PDF to fill fundamentals the live providers could not (not-yet-listed IPOs).
+        Without it, a matching `<name>.pdf` under config `drhp.dir` is used if present.
+    peer_symbols : list | None
+        Peers for the P/E comparison; default: config financials.peer_sets / peer_symbols.
 
     Returns
     -------
     dict
         {
           symbol, query, sentiment, fundamentals, probability, expected_gain_pct,
-          decision, reasoning, news_sample, meta, warnings, errors
+          decision, reasoning, news_sample, meta, warnings, errors, partial, partial_fields
         }
+        When the budget runs out, the stages not finished in time fall back to neutral
+        values and are listed in `partial_fields` (with `partial: true`).
+        meta also carries per-stage `timings_ms` (with `queue_wait_ms`, the part of a budgeted
+        stage spent waiting for a thread), `provider_calls` (duration, status,
+        retries), `cache` hit/miss counts and `field_sources` (provider per fundamentals field).
     """
+    pool = _StagePool()
+    try:
+        with trace() as tr:
+            res = _run_pipeline(
+                symbol_or_name, query,
+                override_thresholds=override_thresholds, symbol_is_final=symbol_is_final,
+                budget_ms=budget_ms, deadline=deadline, drhp_path=drhp_path,
+                peer_symbols=peer_symbols, pool=pool,
+            )
+            res["meta"].update(tr.to_meta())
+    finally:
+        pool.close()
+    res["meta"]["timings_ms"]["total"] = res["meta"]["elapsed_ms"]
+    return res
+
+
+def _run_pipeline(
+    symbol_or_name: str,
+    query: str,
+    *,
+    override_thresholds: dict | None = None,
+    symbol_is_final: bool = False,
+    budget_ms: float | None = None,
+    deadline: Deadline | float | None = None,
+    drhp_path: str | None = None,
+    peer_symbols: list | None = None,
+    pool: _StagePool | None = None,
+):
+    t_start = time.perf_counter()
+    if os.getenv("IPOBOT_REPLAY"):
+        from .data.replay import ensure_from_env
+        ensure_from_env()  # record/replay provider responses (see data/replay.py)
     cfg = load_config() or {}
     warnings: list[str] = []
     errors: list[str] = []
+    dl = as_deadline(deadline, budget_ms)
+    pool = pool or _StagePool()
+    partial_fields: list[str] = []
 
     # ---------------- SYMBOL RESOLUTION (robust) ----------------
-    raw = (symbol_or_name or "").strip()
-    if symbol_is_final:
-        sym = raw  # trust the UI / caller
-    else:
-        # Only resolve if it doesn't already look like a ticker
-        looks_like_ticker = (
-            ('.' in raw) or (':' in raw) or
-            (raw.isupper() and raw.replace('-', '').isalnum() and 1 <= len(raw) <= 6)
-        )
-        if looks_like_ticker:
-            sym = raw
+    with stage("symbol"):
+        raw = (symbol_or_name or "").strip()
+        if symbol_is_final:
+            sym = raw  # trust the UI / caller
         else:
-            # Lazy import to avoid circulars
-            from .data.lookup import resolve_symbol
-            s, _learned = resolve_symbol(raw)
-            sym = s or raw
+            # Only resolve if it doesn't already look like a ticker
+            looks_like_ticker = (
+                ('.' in raw) or (':' in raw) or
+                (raw.isupper() and raw.replace('-', '').isalnum() and 1 <= len(raw) <= 6)
+            )
+            if looks_like_ticker:
+                sym = raw
+            else:
+                # Lazy import to avoid circulars
+                from .data.lookup import resolve_symbol
+                try:
+                    found, timed_out = _run_stage(lambda: resolve_symbol(raw, deadline=dl), dl, pool)
+                except Exception as e:
+                    found, timed_out = None, False
+                    errors.append(f"symbol_lookup_failed: {type(e).__name__}: {e}")
+                if timed_out:
+                    partial_fields.append("symbol")
+                s = found[0] if found else None
+                sym = s or raw
 
     # Normalize trivial whitespace/case
     sym = (sym or "").strip()
@@ -88,28 +189,99 @@ def run_pipeline(
     # ---------------- NEWS ----------------
     use_live_news = bool(cfg.get("use_live_news", False))
     news_provider = (cfg.get("news", {}) or {}).get("provider", "gnews")
-    try:
-        news_items = fetch_news_items(query, use_live=use_live_news)
-    except Exception as e:
-        news_items = []
-        errors.append(f"news_fetch_failed: {type(e).__name__}: {e}")
+    # Live news goes through the per-IPO article store (config news_store): only articles
+    # newer than the last stored one are fetched and scored, sentiment is their EWMA.
+    from .data.news_store import from_config as _news_store
+    # Record/replay sessions bypass it so request URLs (no `from=`) stay reproducible.
+    store = _news_store(cfg) if use_live_news and not os.getenv("IPOBOT_REPLAY") else None
+    store_key = sym or query
+    store_info: dict = {}
+    with stage("news"):
+        try:
+            if store is not None:
+                page = int((cfg.get("news", {}) or {}).get("page_size", 8))
+                got, timed_out = _run_stage(lambda: store.refresh(store_key, query, deadline=dl, n=page), dl, pool)
+                news_items = (got or {}).get("items") or []
+                store_info["new_articles"] = (got or {}).get("new", 0)
+            else:
+                news_items, timed_out = _run_stage(
+                    lambda: fetch_news_items(query, use_live=use_live_news, deadline=dl), dl, pool)
+            if timed_out:
+                news_items = []
+                partial_fields.append("news_sample")
+        except Exception as e:
+            news_items = []
+            errors.append(f"news_fetch_failed: {type(e).__name__}: {e}")
+        news_items = news_items or []
 
     # ---------------- SENTIMENT ----------------
     # sentiment_score() already checks config.use_live_sentiment and falls back safely
-    try:
-        sent = sentiment_score(news_items)
-    except Exception as e:
-        sent = 0.0
-        errors.append(f"sentiment_failed: {type(e).__name__}: {e}")
+    with stage("sentiment"):
+        try:
+            agg, timed_out = None, False
+            if store is not None:
+                agg, timed_out = _run_stage(lambda: store.update_sentiment(store_key, deadline=dl), dl, pool)
+            if agg:
+                sent = agg["sentiment"]
+                store_info.update(agg)
+            elif not timed_out:
+                sent, timed_out = _run_stage(lambda: sentiment_score(news_items, deadline=dl), dl, pool)
+            else:
+                sent = None
+            if timed_out or "news_sample" in partial_fields:
+                partial_fields.append("sentiment")
+            if sent is None:
+                sent = 0.0
+        except Exception as e:
+            sent = 0.0
+            errors.append(f"sentiment_failed: {type(e).__name__}: {e}")
+
+    # ---------------- ARTICLE BODIES (optional) ----------------
+    # FinBERT over the full text of the sampled articles (config sentiment.bodies), blended in
+    body_cfg = (cfg.get("sentiment", {}) or {}).get("bodies", {}) or {}
+    body_info = None
+    if body_cfg.get("enabled") and use_live_news and news_items and not expired(dl):
+        from .data.article_bodies import sentiment_from_config as _body_sentiment
+        with stage("bodies"):
+            try:
+                body_info, timed_out = _run_stage(lambda: _body_sentiment(news_items, cfg, deadline=dl), dl, pool)
+                if timed_out:
+                    partial_fields.append("body_sentiment")
+                if body_info and body_info.get("score") is not None:
+                    w = float(body_cfg.get("weight", 0.5))
+                    sent = round((1.0 - w) * float(sent) + w * body_info["score"], 4)
+            except Exception as e:
+                errors.append(f"body_sentiment_failed: {type(e).__name__}: {e}")
 
     # ---------------- FUNDAMENTALS ----------------
     use_live_fin = bool(cfg.get("use_live_financials", False))
-    try:
-        # financial_api.get_fundamentals decides provider(s) based on config; `use_live` toggles live vs cache if supported
-        fins = get_fundamentals(sym, use_live=use_live_fin) or {}
-    except Exception as e:
-        fins = {}
-        errors.append(f"fundamentals_failed: {type(e).__name__}: {e}")
+    with stage("fundamentals"):
+        try:
+            # financial_api.get_fundamentals decides provider(s) based on config; `use_live` toggles live vs cache if supported
+            fins, timed_out = _run_stage(
+                lambda: get_fundamentals(sym, use_live=use_live_fin, deadline=dl,
+                                         peer_symbols=peer_symbols, name=raw), dl, pool)
+            fins = fins or {}
+            if timed_out or fins.pop("partial", False):
+                partial_fields.append("fundamentals")
+        except Exception as e:
+            fins = {}
+            errors.append(f"fundamentals_failed: {type(e).__name__}: {e}")
+
+    # ---------------- DRHP (pre-listing fallback) ----------------
+    if any(fins.get(k) is None for k in ("ROE (%)", "D/E", "Revenue CAGR (%)")):
+        from .data.drhp_extractor import find_drhp, fill_from_drhp
+        pdf = drhp_path or find_drhp(raw, cfg) or find_drhp(sym, cfg)
+        if pdf:
+            with stage("drhp"):
+                try:
+                    filled, timed_out = _run_stage(lambda: fill_from_drhp(fins, pdf), dl, pool)
+                    if timed_out:
+                        partial_fields.append("drhp")
+                    elif filled:
+                        warnings.append(f"fundamentals_from_drhp: {', '.join(filled)}")
+                except Exception as e:
+                    errors.append(f"drhp_failed: {type(e).__name__}: {e}")
 
     # Basic sanity fill (avoid None downstream)
     for k, v in {
@@ -122,38 +294,59 @@ def run_pipeline(
         fins.setdefault(k, v)
 
     # ---------------- FUNDAMENTAL SCORING ----------------
-    try:
-        fscore, fdetail = score_fundamentals(fins, cfg.get("valuation_weights", {}))
-        # fdetail is a structured details dict from score_fundamentals
-    except Exception as e:
-        # If scoring fails, fall back to a neutral detail dict
-        fdetail = {
-            "pe": fins.get("pe"),
-            "peer_pe": fins.get("peer_pe"),
-            "roe": fins.get("roe"),
-            "debt_to_equity": fins.get("debt_to_equity"),
-            "revenue_cagr": fins.get("revenue_cagr"),
-            "pe_discount_vs_peer": None,
-            "roe_flag": False,
-            "d2e_flag": False,
-            "growth_flag": False,
-        }
-        fscore = 0.5
-        errors.append(f"fundamental_scoring_failed: {type(e).__name__}: {e}")
+    with stage("scoring"):
+        try:
+            fscore, fdetail = score_fundamentals(fins, cfg.get("valuation_weights", {}))
+            # fdetail is a structured details dict from score_fundamentals
+        except Exception as e:
+            # If scoring fails, fall back to a neutral detail dict
+            fdetail = {
+                "pe": fins.get("pe"),
+                "peer_pe": fins.get("peer_pe"),
+                "roe": fins.get("roe"),
+                "debt_to_equity": fins.get("debt_to_equity"),
+                "revenue_cagr": fins.get("revenue_cagr"),
+                "pe_discount_vs_peer": None,
+                "roe_flag": False,
+                "d2e_flag": False,
+                "growth_flag": False,
+            }
+            fscore = 0.5
+            errors.append(f"fundamental_scoring_failed: {type(e).__name__}: {e}")
 
     # ---------------- MODEL ----------------
     model_path = cfg.get("model_path", "models/demo_model.pkl")
-    try:
-        model = load_or_train_model(model_path)
-    except Exception as e:
-        errors.append(f"model_load_failed: {type(e).__name__}: {e}")
-        model = load_or_train_model(model_path)
+    with stage("model"):
+        try:
+            model = load_or_train_model(model_path)
+        except Exception as e:
+            errors.append(f"model_load_failed: {type(e).__name__}: {e}")
+            model = load_or_train_model(model_path)
 
-    try:
-        prob, gain_est = predict_gain(model, sent, fdetail)
-    except Exception as e:
-        prob, gain_est = 0.5, 0.0
-        errors.append(f"prediction_failed: {type(e).__name__}: {e}")
+    with stage("predict"):
+        try:
+            prob, gain_est = predict_gain(model, sent, fdetail)
+        except Exception as e:
+            prob, gain_est = 0.5, 0.0
+            errors.append(f"prediction_failed: {type(e).__name__}: {e}")
+
+    # Exact per-feature contributions to `prob` (TreeSHAP). Only a ready table is used: building
+    # one takes seconds, so a missing table is built in the background and this run goes without.
+    attrib = None
+    with stage("explain"):
+        from .model.explain import TableNotReady, attributions, prepare
+        try:
+            fv = feature_vector(sent, fdetail)
+            got, timed_out = _run_stage(lambda: attributions(model, [fv], build=False), dl, pool)
+            if timed_out:
+                partial_fields.append("attributions")
+                prepare(model)  # no time left here; the next run finds the table ready
+            attrib = got[0] if got else None
+        except TableNotReady:
+            partial_fields.append("attributions")
+            warnings.append("attributions_pending: explainer table is being built")
+        except Exception as e:
+            warnings.append(f"attributions_unavailable: {type(e).__name__}")
 
     # ---------------- DECISION ----------------
     thr = dict(cfg.get("thresholds", {}))
@@ -162,23 +355,19 @@ def run_pipeline(
 
     buy_thr = float(thr.get("buy_prob", 0.62))
     hold_thr = float(thr.get("hold_prob", 0.45))
-    if prob >= buy_thr:
-        decision = "BUY"
-    elif prob >= hold_thr:
-        decision = "HOLD"
-    else:
-        decision = "AVOID"
+    decision = decide(prob, buy_thr, hold_thr)
 
     # ---------------- REASONING ----------------
-    try:
-        why = build_reason(sym, sent, fdetail, prob, gain_est, decision)
-    except Exception as e:
-        why = f"{decision} for {sym} based on model output. (reasoning_failed: {type(e).__name__})"
-        warnings.append("reasoning_fallback_used")
+    with stage("reasoning"):
+        try:
+            why = build_reason(sym, sent, fdetail, prob, gain_est, decision, attrib)
+        except Exception as e:
+            why = f"{decision} for {sym} based on model output. (reasoning_failed: {type(e).__name__})"
+            warnings.append("reasoning_fallback_used")
 
            # ---------------- RETURN ----------------
     ui_fins = _to_ui_fundamentals(fdetail.get("fundamentals", fins))
-    return {
+    result = {
         "symbol": sym,
         "query": query,
         "sentiment": sent,
@@ -188,14 +377,166 @@ def run_pipeline(
         "expected_gain_pct": gain_est,
         "decision": decision,
         "reasoning": why,
+        "attributions": attrib,
         "news_sample": news_items[:5],
         "meta": {
             "use_live_news": use_live_news,
             "use_live_sentiment": bool(cfg.get("use_live_sentiment", False)),
             "use_live_financials": use_live_fin,
             "news_provider": news_provider,
+            "news_store": store_info or None,
+            "body_sentiment": ({k: body_info[k] for k in ("score", "fetched", "cached")}
+                               if body_info else None),
             "model_path": model_path,
+            "thresholds": {"buy_prob": buy_thr, "hold_prob": hold_thr},
+            "budget_ms": budget_ms,
+            "elapsed_ms": round((time.perf_counter() - t_start) * 1000, 1),
         },
         "warnings": warnings,
         "errors": errors,
+        "partial": bool(partial_fields),
+        "partial_fields": partial_fields,
     }
+
+    # Persist inputs/outputs for analytics and retraining (config feature_store; buffered append)
+    from .data.feature_store import record
+    record(result, cfg, {"buy_prob": buy_thr, "hold_prob": hold_thr})
+    # ... and to the queryable run history (config history_store; queued, written off-thread)
+    from .data.history_store import record as record_history
+    record_history(result, cfg)
+    return result
+
+
+def decide(prob: float, buy_thr: float, hold_thr: float) -> str:
+    if prob >= buy_thr:
+        return "BUY"
+    if prob >= hold_thr:
+        return "HOLD"
+    return "AVOID"
+
+
+def apply_thresholds(res: dict, thresholds: dict | None = None) -> dict:
+    """
+    Copy of a run_pipeline() result with `decision` and `reasoning` re-derived for new
+    buy/hold thresholds. Sentiment, fundamentals and probability are reused as they are,
+    so this needs no network, model or FinBERT call.
+    """
+    old = (res.get("meta") or {}).get("thresholds") or {}
+    thr = {**old, **(thresholds or {})}
+    buy_thr = float(thr.get("buy_prob", 0.62))
+    hold_thr = float(thr.get("hold_prob", 0.45))
+    out = dict(res)
+    out["meta"] = {**(res.get("meta") or {}), "thresholds": {"buy_prob": buy_thr, "hold_prob": hold_thr}}
+    prob = float(res.get("probability") or 0.0)
+    out["decision"] = decide(prob, buy_thr, hold_thr)
+    if out["decision"] == res.get("decision") and res.get("reasoning"):
+        return out
+    sym, sent = res.get("symbol"), float(res.get("sentiment") or 0.0)
+    try:
+        out["reasoning"] = build_reason(sym, sent, res.get("fundamental_details") or {}, prob,
+                                        res.get("expected_gain_pct") or 0.0, out["decision"],
+                                        res.get("attributions"))
+    except Exception as e:
+        out["reasoning"] = f"{out['decision']} for {sym} based on model output. (reasoning_failed: {type(e).__name__})"
+    return out
+
+
+def warm_explainer(cfg: dict | None = None) -> bool:
+    """
+    Load (or build and cache) the configured model's attribution table now, so runs don't
+    start without one. For start-up paths: server warm-up, iter_pipeline. False if unavailable.
+    """
+    try:
+        from .model.explain import explainer_for
+        cfg = cfg if cfg is not None else (load_config() or {})
+        return explainer_for(load_or_train_model(cfg.get("model_path", "models/demo_model.pkl"))) is not None
+    except Exception:
+        return False  # runs then report attributions as partial
+
+
+# ---------------- STREAMING (many IPOs) ----------------
+_ITEM_KWARGS = ("override_thresholds", "symbol_is_final", "drhp_path", "peer_symbols")
+
+
+def _coerce_item(item: Any) -> Tuple[str, str, dict]:
+    """
+    Accept 'SYMBOL_OR_NAME', (symbol_or_name, query) or
+    {'symbol'|'name': ..., 'query': ..., 'symbol_is_final': ..., 'override_thresholds': ...}.
+    """
+    if isinstance(item, dict):
+        sym = item.get("symbol") or item.get("name") or ""
+        query = item.get("query") or f"{sym} IPO latest news"
+        extra = {k: item[k] for k in _ITEM_KWARGS if k in item}
+        return sym, query, extra
+    if isinstance(item, (tuple, list)):
+        sym = item[0] if item else ""
+        query = item[1] if len(item) > 1 and item[1] else f"{sym} IPO latest news"
+        return sym, query, {}
+    sym = str(item or "")
+    return sym, f"{sym} IPO latest news", {}
+
+
+def _run_item(item: Any, kwargs: dict) -> dict:
+    """Worker for iter_pipeline (module-level so process pools can pickle it)."""
+    sym, query, extra = _coerce_item(item)
+    t0 = time.perf_counter()
+    try:
+        res = run_pipeline(sym, query, **{**kwargs, **extra})
+    except Exception as e:
+        res = {"symbol": sym, "query": query, "error": f"{type(e).__name__}: {e}"}
+    res["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return res
+
+
+def iter_pipeline(
+    items: Iterable[Any],
+    *,
+    workers: int = 4,
+    max_in_flight: int | None = None,
+    executor: str = "thread",
+    **kwargs,
+) -> Iterator[Tuple[Any, dict]]:
+    """
+    Run run_pipeline over `items` and yield (item, result) in completion order.
+
+    `items` is consumed lazily: at most `max_in_flight` (default 2 x workers) are
+    submitted at once and new ones are only pulled when the consumer asks for more,
+    so a 10k-item screen keeps flat memory. Closing the generator early (break, or
+    .close()) cancels everything not yet started. A failing item yields a result
+    with an 'error' key instead of raising.
+    """
+    workers = max(1, int(workers))
+    limit = max(1, int(max_in_flight or 2 * workers))
+    worker = _run_item
+    if executor != "fork":  # (the fork pool's preload does this itself)
+        warm_explainer()
+    if executor == "fork":
+        # workers forked after FinBERT/model are loaded here: weights shared copy-on-write
+        from .prefork import fork_pool, run_item as worker
+        pool = fork_pool(workers)
+    elif executor == "process":
+        from concurrent.futures import ProcessPoolExecutor  # ~20 ms import, only when asked
+        pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    source = iter(items)
+    pending: dict = {}
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < limit:
+                try:
+                    item = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[pool.submit(worker, item, kwargs)] = item
+            if not pending:
+                return
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield pending.pop(fut), fut.result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
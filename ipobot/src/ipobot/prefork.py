@@ -0,0 +1,121 @@
+# src/ipobot/prefork.py
+# Pre-forked worker pool (iter_pipeline / batch `--executor fork`, POSIX only).
+#
+# The parent loads everything heavy once -- FinBERT (model + tokenizer, ~440 MB) when
+# use_live_sentiment is on, the tree model and its attribution tables -- then forks the
+# workers. Their pages are shared copy-on-write: inference only reads the weights, and
+# gc.freeze() keeps the collector from writing to the parent's objects in every child, so
+# each worker adds only its private working set. memory_report() reads /proc/<pid>/smaps_rollup
+# after every item so the batch summary shows whether the sharing holds under load
+# (PSS = RSS with shared pages split between the processes mapping them).
+
+from __future__ import annotations
+
+import gc, os, sys, threading
+from typing import Any, Dict, Iterable, List, Optional
+
+_preloaded: Optional[Dict] = None
+_lock = threading.Lock()
+
+
+def preload(cfg: Optional[Dict] = None) -> Dict:
+    """Load the shared state in this (parent) process once; returns what was loaded."""
+    global _preloaded
+    with _lock:
+        if _preloaded is not None:
+            return _preloaded
+        from ipobot.config import load_config
+        import ipobot.pipeline  # noqa: F401  (module code shared too)
+
+        cfg = cfg if cfg is not None else (load_config() or {})
+        loaded: Dict[str, Any] = {}
+        try:
+            from ipobot.model.predict import load_or_train_model
+            model = load_or_train_model(cfg.get("model_path", "models/demo_model.pkl"))
+            loaded["model"] = type(model).__name__
+            from ipobot.model.explain import explainer_for
+            loaded["explainer"] = explainer_for(model) is not None
+        except Exception as e:
+            loaded["model_error"] = f"{type(e).__name__}: {e}"
+        if cfg.get("use_live_sentiment", False):
+            try:
+                from ipobot.nlp.sentiment import _load_finbert
+                _load_finbert((cfg.get("sentiment") or {}).get("model", "ProsusAI/finbert"))
+                loaded["finbert"] = True
+            except Exception as e:
+                loaded["finbert_error"] = f"{type(e).__name__}: {e}"
+        gc.collect()
+        gc.freeze()  # everything so far is permanent: child GC passes won't dirty these pages
+        loaded["parent"] = memory_report()
+        _preloaded = loaded
+        return loaded
+
+
+def _child_init() -> None:
+    # N workers x all-core intra-op pools oversubscribe the box; parallelism comes from the pool
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+
+def fork_pool(workers: int, cfg: Optional[Dict] = None):
+    """ProcessPoolExecutor whose workers are forked from this process after preload()."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise RuntimeError("executor 'fork' needs a POSIX fork(); use 'process' or 'thread'")
+    preload(cfg)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"),
+                               initializer=_child_init)
+
+
+def run_item(item: Any, kwargs: dict) -> dict:
+    """pipeline._run_item plus this worker's memory after the item (result['worker_memory'])."""
+    from ipobot.pipeline import _run_item
+
+    res = _run_item(item, kwargs)
+    res["worker_memory"] = memory_report()
+    return res
+
+
+# ---------- memory ----------
+def memory_report(pid: Optional[int] = None) -> Optional[Dict]:
+    """{'pid', 'rss_mb', 'pss_mb', 'shared_mb', 'private_mb'} from smaps_rollup (None off Linux)."""
+    pid = pid or os.getpid()
+    kb: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                k, _, rest = line.partition(":")
+                if rest.strip().endswith("kB"):
+                    kb[k] = int(rest.split()[0])
+    except (OSError, ValueError):
+        return None
+    mb = lambda *keys: round(sum(kb.get(k, 0) for k in keys) / 1024, 1)
+    return {
+        "pid": pid,
+        "rss_mb": mb("Rss"),
+        "pss_mb": mb("Pss"),
+        "shared_mb": mb("Shared_Clean", "Shared_Dirty"),
+        "private_mb": mb("Private_Clean", "Private_Dirty"),
+    }
+
+
+def summarize(reports: Iterable[Dict]) -> Dict:
+    """Latest report per worker plus totals (sum of RSS counts shared pages once per worker; PSS doesn't)."""
+    last: Dict[int, Dict] = {}
+    peak: Dict[int, float] = {}
+    for r in reports:
+        if r:
+            last[r["pid"]] = r
+            peak[r["pid"]] = max(peak.get(r["pid"], 0.0), r["private_mb"])
+    workers: List[Dict] = [{**r, "peak_private_mb": peak[p]} for p, r in sorted(last.items())]
+    parent = memory_report()
+    everyone = workers + ([parent] if parent else [])
+    return {
+        "parent": parent,
+        "workers": workers,
+        "total_rss_mb": round(sum(r["rss_mb"] for r in everyone), 1),
+        "total_pss_mb": round(sum(r["pss_mb"] for r in everyone), 1),
+        "preloaded": {k: v for k, v in (_preloaded or {}).items() if k != "parent"},
+    }
@@ -0,0 +1,156 @@
+# src/ipobot/profiling.py
+# --profile support: a wall-clock stack sampler (all threads -> collapsed/folded stacks for
+# flamegraph.pl / speedscope / inferno) plus tracemalloc top allocations per pipeline stage.
+
+from __future__ import annotations
+
+import datetime as dt, os, pathlib, sys, threading, time, tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_IDLE_LEAVES = {("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select")}
+
+
+class StackSampler:
+    """Samples sys._current_frames() every `interval_ms` from a daemon thread."""
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval = max(0.0005, float(interval_ms) / 1000.0)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _label(code) -> str:
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample_once(self, own_id: int):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for tid, frame in sys._current_frames().items():
+            if tid == own_id:
+                continue
+            leaf = frame.f_code
+            stack: List[str] = []
+            f = frame
+            while f is not None:
+                stack.append(self._label(f.f_code))
+                f = f.f_back
+            # skip parked pool workers; real waits (sockets, futures) stay in
+            if (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES and \
+                    any("_worker (thread.py" in s for s in stack):
+                continue
+            stack.append(f"thread:{names.get(tid, tid)}")
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample_once(own)
+            except Exception:
+                pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ipobot-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def write_folded(self, path: pathlib.Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+class StageAllocations:
+    """tracemalloc snapshot at the end of each stage; the diff to the previous one is that stage's."""
+
+    _FILTERS = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+
+    def __init__(self, top: int = 15):
+        self.top = top
+        self._lock = threading.Lock()
+        self._last: Optional[tracemalloc.Snapshot] = None
+        self.stages: List[Tuple[str, List[tracemalloc.StatisticDiff], int]] = []
+
+    def start(self, nframes: int = 1):
+        tracemalloc.start(nframes)
+        self._last = tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+
+    def on_event(self, event: Dict) -> None:
+        if event.get("type") != "stage" or not tracemalloc.is_tracing():
+            return
+        with self._lock:
+            snap = tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+            diff = snap.compare_to(self._last, "lineno")
+            net = sum(d.size_diff for d in diff)
+            self.stages.append((event["stage"], diff[: self.top], net))
+            self._last = snap
+
+    def stop(self) -> Tuple[int, int]:
+        cur, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return cur, peak
+
+    def write_report(self, path: pathlib.Path, peak: int, concurrent: bool) -> None:
+        lines = [f"# tracemalloc top {self.top} allocations per stage (net bytes since previous stage end)",
+                 f"# peak traced memory: {peak / 1024:.1f} KiB"]
+        if concurrent:
+            lines.append("# NOTE: stages ran concurrently (batch); attribution between stages is approximate")
+        for name, diff, net in self.stages:
+            lines.append("")
+            lines.append(f"== {name}: net {net / 1024:+.1f} KiB")
+            for d in diff:
+                fr = d.traceback[0]
+                lines.append(f"  {d.size_diff / 1024:+10.1f} KiB {d.count_diff:+7d} blocks  {fr.filename}:{fr.lineno}")
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@contextmanager
+def profile_run(out_dir: str = "profiles", tag: str = "run", interval_ms: float = 5.0,
+                top: int = 15, concurrent: bool = False) -> Iterator[Dict[str, str]]:
+    """
+    Profile the enclosed block. Yields a dict that is filled with the written file paths:
+    {'folded': <stacks for flamegraph>, 'alloc': <per-stage top allocations>}.
+    """
+    from ipobot import metrics
+
+    out = pathlib.Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in tag)[:60] or "run"
+    prefix = out / f"ipobot-{safe}-{dt.datetime.now():%Y%m%d-%H%M%S}"
+    paths: Dict[str, str] = {}
+
+    allocs = StageAllocations(top=top)
+    sampler = StackSampler(interval_ms)
+    allocs.start()
+    metrics.add_listener(allocs.on_event)
+    sampler.start()
+    t0 = time.perf_counter()
+    try:
+        yield paths
+    finally:
+        sampler.stop()
+        metrics.remove_listener(allocs.on_event)
+        _cur, peak = allocs.stop()
+        folded = prefix.parent / (prefix.name + ".folded")
+        alloc = prefix.parent / (prefix.name + ".alloc.txt")
+        sampler.write_folded(folded)
+        allocs.write_report(alloc, peak, concurrent)
+        paths.update({"folded": str(folded), "alloc": str(alloc)})
+        print(f"[profile] {sampler.samples} samples over {time.perf_counter() - t0:.2f}s "
+              f"(tracemalloc on: timings inflated); peak traced {peak / 1024:.1f} KiB\n"
+              f"[profile] stacks: {folded}  (flamegraph.pl {folded.name} > flame.svg, or speedscope)\n"
+              f"[profile] allocations: {alloc}", file=sys.stderr)
@@ -0,0 +1,177 @@
+# src/ipobot/records.py
+# Compact record types with one canonical schema for what the pipeline passes around as
+# free-form dicts. Fundamentals in particular arrive under two key schemas -- UI labels
+# ("P/E", "ROE (%)", ...) from get_fundamentals and code keys ("pe", "roe", ...) from the
+# providers / fallbacks -- and used to be re-mapped by hand wherever they were read.
+#
+#   canonical field     accepted keys (first non-None wins)
+#   pe                  P/E, pe
+#   peer_pe             Peer P/E, peer_pe
+#   roe_pct             ROE (%), roe, roe_pct
+#   de                  D/E, de, debt_to_equity
+#   revenue_cagr_pct    Revenue CAGR (%), revenue_cagr, rev_cagr, rev_cagr_pct
+#   pe_discount_pct     P/E discount vs peer (%), pe_discount_pct, pe_discount_vs_peer (fraction -> %)
+#
+# The canonical names are the feature store's columns. Conversion happens at the edges only:
+# from_dict() when a dict comes in, to_ui() / to_dict() / to_result() when one goes out.
+# Records use __slots__ (no per-instance __dict__); AnalysisRecord keeps what a result needs
+# for analytics and re-deciding (see scripts/bench_records.py for the memory comparison).
+
+from __future__ import annotations
+
+import sys, time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+FUND_FIELDS = ("pe", "peer_pe", "roe_pct", "de", "revenue_cagr_pct", "pe_discount_pct")
+UI_LABELS = {
+    "pe": "P/E",
+    "peer_pe": "Peer P/E",
+    "roe_pct": "ROE (%)",
+    "de": "D/E",
+    "revenue_cagr_pct": "Revenue CAGR (%)",
+    "pe_discount_pct": "P/E discount vs peer (%)",
+}
+_ALIASES = {
+    "pe": ("P/E", "pe"),
+    "peer_pe": ("Peer P/E", "peer_pe"),
+    "roe_pct": ("ROE (%)", "roe", "roe_pct"),
+    "de": ("D/E", "de", "debt_to_equity"),
+    "revenue_cagr_pct": ("Revenue CAGR (%)", "revenue_cagr", "rev_cagr", "rev_cagr_pct"),
+    "pe_discount_pct": ("P/E discount vs peer (%)", "pe_discount_pct"),
+}
+_FRACTION_ALIASES = {"pe_discount_pct": "pe_discount_vs_peer"}  # stored as a fraction under this key
+
+
+def _f(v) -> Optional[float]:
+    try:
+        return None if v is None else float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class Fundamentals:
+    pe: Optional[float] = None
+    peer_pe: Optional[float] = None
+    roe_pct: Optional[float] = None
+    de: Optional[float] = None
+    revenue_cagr_pct: Optional[float] = None
+    pe_discount_pct: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, d: Optional[Dict]) -> "Fundamentals":
+        """From either key schema (or a score_fundamentals details dict holding 'fundamentals')."""
+        d = d or {}
+        if isinstance(d.get("fundamentals"), dict):
+            d = d["fundamentals"]
+        vals = []
+        for field in FUND_FIELDS:
+            v = None
+            for k in _ALIASES[field]:
+                v = _f(d.get(k))
+                if v is not None:
+                    break
+            if v is None and field in _FRACTION_ALIASES:
+                frac = _f(d.get(_FRACTION_ALIASES[field]))
+                v = None if frac is None else frac * 100.0
+            vals.append(v)
+        return cls(*vals)
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        return {f: getattr(self, f) for f in FUND_FIELDS}
+
+    def to_ui(self) -> Dict[str, Optional[float]]:
+        return {UI_LABELS[f]: getattr(self, f) for f in FUND_FIELDS}
+
+
+@dataclass(slots=True)
+class NewsItem:
+    title: str
+    sent: str = "neutral"
+    url: Optional[str] = None
+    published: Optional[str] = None
+    score: Optional[float] = None  # per-item sentiment when one was computed
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "NewsItem":
+        return cls(str(d.get("title") or ""), sys.intern(str(d.get("sent") or "neutral")),
+                   d.get("url") or None, d.get("published") or None, _f(d.get("score")))
+
+    def to_dict(self) -> Dict:
+        out = {"title": self.title, "sent": self.sent, "url": self.url, "published": self.published}
+        if self.score is not None:
+            out["score"] = self.score
+        return out
+
+
+@dataclass(slots=True)
+class AnalysisRecord:
+    """One analysis (IPO-day): inputs, model features, decision. No reasoning / meta text."""
+
+    symbol: str
+    query: str
+    ts: float
+    sentiment: float
+    fundamentals: Fundamentals
+    features: Tuple[float, ...]          # model.predict.FEATURES order
+    probability: float
+    expected_gain_pct: float
+    decision: str
+    buy_prob: Optional[float] = None
+    hold_prob: Optional[float] = None
+    partial: bool = False
+    phi: Optional[Tuple[float, ...]] = None  # attributions in FEATURES order
+    phi_base: Optional[float] = None
+    news: Tuple[NewsItem, ...] = ()
+
+    @classmethod
+    def from_result(cls, res: Dict, ts: Optional[float] = None) -> "AnalysisRecord":
+        from ipobot.model.predict import FEATURES, feature_vector
+
+        fdetail = res.get("fundamental_details") or {}
+        thr = (res.get("meta") or {}).get("thresholds") or {}
+        att = res.get("attributions") or {}
+        phi = att.get("phi")
+        return cls(
+            symbol=sys.intern(str(res.get("symbol") or "")),
+            query=str(res.get("query") or ""),
+            ts=ts if ts is not None else time.time(),
+            sentiment=_f(res.get("sentiment")) or 0.0,
+            fundamentals=Fundamentals.from_dict(res.get("fundamentals") or fdetail),
+            features=tuple(feature_vector(res.get("sentiment"), fdetail)),
+            probability=_f(res.get("probability")) or 0.0,
+            expected_gain_pct=_f(res.get("expected_gain_pct")) or 0.0,
+            decision=sys.intern(str(res.get("decision") or "")),
+            buy_prob=_f(thr.get("buy_prob")),
+            hold_prob=_f(thr.get("hold_prob")),
+            partial=bool(res.get("partial")),
+            phi=tuple(float(phi.get(f, 0.0)) for f in FEATURES) if phi else None,
+            phi_base=_f(att.get("base")),
+            news=tuple(NewsItem.from_dict(n) for n in res.get("news_sample") or ()),
+        )
+
+    def to_result(self) -> Dict:
+        """
+        Result-shaped dict for the UI / JSON edges. `reasoning` is not kept:
+        pipeline.apply_thresholds(record.to_result()) rebuilds it.
+        """
+        from ipobot.model.predict import FEATURES
+
+        ui = self.fundamentals.to_ui()
+        thr = {"buy_prob": self.buy_prob, "hold_prob": self.hold_prob} if self.buy_prob is not None else {}
+        return {
+            "symbol": self.symbol,
+            "query": self.query,
+            "sentiment": self.sentiment,
+            "fundamentals": ui,
+            "fundamental_details": {"fundamentals": ui},
+            "probability": self.probability,
+            "expected_gain_pct": self.expected_gain_pct,
+            "decision": self.decision,
+            "attributions": ({"base": self.phi_base, "phi": dict(zip(FEATURES, self.phi))}
+                             if self.phi is not None else None),
+            "news_sample": [n.to_dict() for n in self.news],
+            "meta": {"thresholds": thr, "ts": self.ts},
+            "partial": self.partial,
+        }
@@ -0,0 +1,67 @@
+# src/ipobot/scripts/backtest.py
+# Sweep buy/hold thresholds over past IPOs and show the best pairs.
+#
+#   python -m ipobot.scripts.backtest datasets/ipo_train.csv                      # score with config model_path
+#   python -m ipobot.scripts.backtest scored.csv --step 0.0025 --by max_drawdown_pct
+#   python -m ipobot.scripts.backtest datasets/ipo_train.csv --hold-weight 0.5 -o datasets/sweep.csv
+#
+# Input: build_dataset's table (FEATURES + listing_return_pct), or any CSV/JSONL with
+# probability, listing_return_pct and listing_date columns.
+
+from __future__ import annotations
+
+import argparse, json, sys, time
+from typing import List, Optional
+
+from ipobot.config import load_config
+from ipobot.model import backtest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Vectorised buy/hold threshold backtest")
+    p.add_argument("history", help="CSV/JSONL of past IPOs with listing_return_pct")
+    p.add_argument("--model-path", help="Model used when the input has no probability column "
+                                        "(default: config model_path)")
+    p.add_argument("--lo", type=float, default=0.30)
+    p.add_argument("--hi", type=float, default=0.95)
+    p.add_argument("--step", type=float, default=0.005, help="Grid step for both thresholds")
+    p.add_argument("--hold-weight", type=float, default=0.0, help="Position size of a HOLD (0 = sit out)")
+    p.add_argument("--by", choices=backtest.METRICS, default="total_gain_pct")
+    p.add_argument("--min-trades", type=int, default=10)
+    p.add_argument("--top", type=int, default=10)
+    p.add_argument("-o", "--out", help="Write every pair's metrics to this CSV")
+    args = p.parse_args(argv)
+
+    cfg = load_config()
+    model = None
+    with open(args.history, "r", encoding="utf-8") as f:
+        head = f.readline()
+    if "probability" not in head:
+        from ipobot.model.predict import load_or_train_model
+        model = load_or_train_model(args.model_path or cfg.get("model_path", "models/demo_model.pkl"))
+
+    t0 = time.perf_counter()
+    hist = backtest.load_history(args.history, model=model)
+    buy, hold = backtest.threshold_grid(args.lo, args.hi, args.step)
+    res = backtest.sweep(hist["prob"], hist["ret"], buy, hold, hold_weight=args.hold_weight,
+                         order=hist["listing_date"])
+    elapsed = time.perf_counter() - t0
+    print(f"[backtest] {len(buy)} threshold pairs x {len(hist['ret'])} IPOs in {elapsed:.2f}s", file=sys.stderr)
+
+    thr = cfg.get("thresholds") or {}
+    cur = backtest.sweep(hist["prob"], hist["ret"], [float(thr.get("buy_prob", 0.62))],
+                         [float(thr.get("hold_prob", 0.45))], hold_weight=args.hold_weight,
+                         order=hist["listing_date"])
+    print(json.dumps({
+        "current": {k: backtest._py(cur[k][0]) if cur[k][0] == cur[k][0] else None
+                    for k in ["buy_prob", "hold_prob"] + backtest.METRICS},
+        "best": backtest.best(res, args.by, min_trades=args.min_trades, top=args.top),
+    }, indent=2))
+    if args.out:
+        n = backtest.write_results(res, args.out)
+        print(f"[backtest] {n} rows -> {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
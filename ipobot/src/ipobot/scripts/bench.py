@@ -0,0 +1,254 @@
+# src/ipobot/scripts/bench.py
+# Offline benchmark: replays recorded provider fixtures (ipobot.bench.standin) and measures
+# end-to-end latency (and p50/p95 per pipeline stage, from result meta), throughput across concurrency levels and peak memory.
+#
+#   python -m ipobot.scripts.bench                       # writes bench_results/<time>-<sha>.json
+#   python -m ipobot.scripts.bench --compare bench_results/old.json
+#   python -m ipobot.scripts.bench --latency-scale 0     # pure CPU cost, no simulated network
+
+from __future__ import annotations
+
+import argparse, datetime as dt, json, os, pathlib, platform, statistics
+import subprocess, sys, tempfile, time, tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+DEFAULT_SYMBOLS = ["ZOMATO.NS"]
+DEFAULT_CONCURRENCY = [1, 4, 8, 16]
+
+
+# ---------- environment ----------
+def _bench_config(base: dict, finbert: bool, model_path: Optional[str]) -> pathlib.Path:
+    """Write a config that turns every live provider on (all answered by fixtures)."""
+    cfg = dict(base or {})
+    cfg.update({"use_live_news": True, "use_live_financials": True, "use_live_sentiment": bool(finbert)})
+    cfg["news"] = {**(cfg.get("news") or {}), "provider": "gnews", "api_key": "bench"}
+    cfg["symbol_lookup"] = {"provider": "finnhub", "api_key": "bench"}
+    cfg["feature_store"] = {**(cfg.get("feature_store") or {}), "enabled": False}
+    cfg["news_store"] = {**(cfg.get("news_store") or {}), "enabled": False}  # every run sees the same news
+    cfg["history_store"] = {**(cfg.get("history_store") or {}), "enabled": False}
+    if model_path:
+        cfg["model_path"] = model_path
+    fd, path = tempfile.mkstemp(prefix="ipobot-bench-", suffix=".yaml")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        yaml.safe_dump(cfg, f)
+    return pathlib.Path(path)
+
+
+def _prepare_env(finbert: bool, model_path: Optional[str]) -> pathlib.Path:
+    from ipobot.config import load_config
+
+    for k in ("FMP_API_KEY", "ALPHAVANTAGE_API_KEY", "FINNHUB_API_KEY"):
+        os.environ[k] = "bench"  # providers only run with a key; fixtures ignore it
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")  # FinBERT only from local cache
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    path = _bench_config(load_config(), finbert, model_path)
+    os.environ["IPOBOT_CONFIG"] = str(path)
+    return path
+
+
+def _git_sha() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=pathlib.Path(__file__).resolve().parent, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+# ---------- measurement ----------
+def _stats(samples_s: List[float]) -> Dict:
+    ms = sorted(x * 1000.0 for x in samples_s)
+    if not ms:
+        return {}
+    def q(p):
+        return ms[min(len(ms) - 1, int(round(p * (len(ms) - 1))))]
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(q(0.50), 3),
+        "p95_ms": round(q(0.95), 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def stage_stats(metas: List[Dict]) -> Dict:
+    """p50/p95 per pipeline stage from run_pipeline results' meta timings_ms (and queue_wait_ms)."""
+    samples: Dict[str, List[float]] = {}
+    for meta in metas:
+        for name, ms in (meta.get("timings_ms") or {}).items():
+            samples.setdefault(name, []).append(ms / 1000.0)
+        for name, ms in (meta.get("queue_wait_ms") or {}).items():
+            samples.setdefault(f"{name}:queue_wait", []).append(ms / 1000.0)
+    return {name: _stats(v) for name, v in sorted(samples.items())}
+
+
+def time_it(fn: Callable[[], object], repeat: int, warmup: int = 1) -> Dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return _stats(samples)
+
+
+def peak_memory_kib(fn: Callable[[], object]) -> float:
+    """Peak traced Python allocation of one call (separate run: tracemalloc skews timings)."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024.0, 1)
+
+
+def throughput(symbols: List[str], levels: List[int], items_per_level: int) -> List[Dict]:
+    from ipobot.pipeline import iter_pipeline
+
+    out = []
+    for c in levels:
+        items = [{"symbol": symbols[i % len(symbols)], "query": f"{symbols[i % len(symbols)]} IPO latest news",
+                  "symbol_is_final": True} for i in range(items_per_level)]
+        lat, metas = [], []
+        t0 = time.perf_counter()
+        for _item, res in iter_pipeline(items, workers=c):
+            lat.append(res.get("elapsed_s") or 0.0)
+            metas.append(res.get("meta") or {})
+        elapsed = time.perf_counter() - t0
+        out.append({
+            "concurrency": c,
+            "items": len(items),
+            "elapsed_s": round(elapsed, 3),
+            "items_per_s": round(len(items) / elapsed, 3) if elapsed > 0 else None,
+            "latency": _stats(lat),
+            "stages": stage_stats(metas),
+        })
+    return out
+
+
+def run_bench(symbols: List[str], repeat: int, levels: List[int], items_per_level: int,
+              latency_scale: float) -> Dict:
+    from ipobot.bench.standin import standin
+    from ipobot.pipeline import run_pipeline
+    from ipobot.fundamentals.ratios import get_fundamentals
+    from ipobot.data.news_scraper import fetch_news_items
+    from ipobot.nlp.sentiment import sentiment_score
+    from ipobot.data.ipo_calendar import fetch_upcoming_ipos
+
+    sym = symbols[0]
+    query = f"{sym} IPO latest news"
+    metas: List[Dict] = []
+
+    def _pipeline():
+        metas.append(run_pipeline(sym, query, symbol_is_final=True)["meta"])
+
+    with standin(latency_scale=latency_scale) as adapter:
+        news = fetch_news_items(query, use_live=True)
+        targets: Dict[str, Callable[[], object]] = {
+            "fetch_news_items": lambda: fetch_news_items(query, use_live=True),
+            "sentiment_score": lambda: sentiment_score(news),
+            "get_fundamentals": lambda: get_fundamentals(sym),
+            "fetch_upcoming_ipos": fetch_upcoming_ipos,
+            "run_pipeline": _pipeline,
+        }
+        latency, memory, stages = {}, {}, {}
+        for name, fn in targets.items():
+            print(f"[bench] {name} …", file=sys.stderr)
+            latency[name] = time_it(fn, repeat)
+            if name == "run_pipeline":
+                stages = stage_stats(metas[-repeat:])  # the timed calls only (not warm-up)
+            memory[name] = {"peak_kib": peak_memory_kib(fn)}
+        print("[bench] throughput …", file=sys.stderr)
+        tp = throughput(symbols, levels, items_per_level)
+        standin_stats = adapter.stats()
+
+    return {"latency": latency, "stages": stages, "memory": memory, "throughput": tp, "standin": standin_stats}
+
+
+# ---------- reporting ----------
+def compare(cur: Dict, base: Dict) -> List[str]:
+    """p50 / peak-memory / throughput deltas vs a previous results file."""
+    lines = []
+    for name, st in cur.get("latency", {}).items():
+        old = (base.get("latency") or {}).get(name) or {}
+        if old.get("p50_ms"):
+            d = (st["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+            lines.append(f"{name:22s} p50 {old['p50_ms']:9.2f} -> {st['p50_ms']:9.2f} ms ({d:+.1f}%)")
+        om = ((base.get("memory") or {}).get(name) or {}).get("peak_kib")
+        if om:
+            nm = cur["memory"][name]["peak_kib"]
+            lines.append(f"{'':22s} mem {om:9.1f} -> {nm:9.1f} KiB ({(nm - om) / om * 100:+.1f}%)")
+    for name, st in cur.get("stages", {}).items():
+        old = (base.get("stages") or {}).get(name) or {}
+        if old.get("p50_ms") and st.get("p50_ms") is not None:
+            d = (st["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+            lines.append(f"  stage {name:16s} p50 {old['p50_ms']:9.2f} -> {st['p50_ms']:9.2f} ms ({d:+.1f}%)")
+    old_tp = {r["concurrency"]: r for r in base.get("throughput", [])}
+    for r in cur.get("throughput", []):
+        o = old_tp.get(r["concurrency"])
+        if o and o.get("items_per_s"):
+            d = (r["items_per_s"] - o["items_per_s"]) / o["items_per_s"] * 100
+            lines.append(f"throughput x{r['concurrency']:<3d}        {o['items_per_s']:9.2f} -> {r['items_per_s']:9.2f} /s ({d:+.1f}%)")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="IPOBot offline benchmark (recorded fixtures)")
+    p.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    p.add_argument("--repeat", type=int, default=10, help="Timed calls per target")
+    p.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY)
+    p.add_argument("--items", type=int, default=32, help="run_pipeline calls per concurrency level")
+    p.add_argument("--latency-scale", type=float, default=1.0,
+                   help="Multiply recorded provider latency (0 = no simulated network)")
+    p.add_argument("--finbert", action="store_true", help="Use FinBERT (needs it in the local HF cache)")
+    p.add_argument("--model-path", help="Model pickle (default: config model_path)")
+    p.add_argument("--out", help="Results JSON (default: bench_results/<utc>-<sha>.json)")
+    p.add_argument("--compare", help="Previous results JSON to diff against")
+    args = p.parse_args(argv)
+
+    cfg_path = _prepare_env(args.finbert, args.model_path)
+    try:
+        res = run_bench(args.symbols, args.repeat, args.concurrency, args.items, args.latency_scale)
+    finally:
+        cfg_path.unlink(missing_ok=True)
+
+    now = dt.datetime.now(dt.timezone.utc)
+    sha = _git_sha()
+    res["meta"] = {
+        "timestamp": now.isoformat(timespec="seconds"),
+        "git_sha": sha,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "symbols": args.symbols,
+        "repeat": args.repeat,
+        "latency_scale": args.latency_scale,
+        "finbert": args.finbert,
+    }
+
+    out = pathlib.Path(args.out or f"bench_results/{now:%Y%m%dT%H%M%SZ}-{sha or 'nogit'}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(res, indent=2), encoding="utf-8")
+
+    for name, st in res["latency"].items():
+        print(f"{name:22s} p50 {st['p50_ms']:9.2f} ms  p95 {st['p95_ms']:9.2f} ms  "
+              f"peak {res['memory'][name]['peak_kib']:9.1f} KiB")
+    for name, st in res["stages"].items():
+        print(f"  stage {name:16s} p50 {st['p50_ms']:9.2f} ms  p95 {st['p95_ms']:9.2f} ms")
+    for r in res["throughput"]:
+        print(f"throughput x{r['concurrency']:<3d} {r['items_per_s']:8.2f} items/s")
+    if res["standin"]["misses"]:
+        print(f"[bench] WARNING unmatched requests (no fixture): {res['standin']['misses']}", file=sys.stderr)
+    if args.compare:
+        base = json.loads(pathlib.Path(args.compare).read_text(encoding="utf-8"))
+        print("\n".join(compare(res, base)))
+    print(f"Saved results to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
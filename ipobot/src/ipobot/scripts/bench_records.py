@@ -0,0 +1,119 @@
+# src/ipobot/scripts/bench_records.py
+# Memory and conversion cost of ipobot.records against the dict representation, for N
+# synthetic IPO-days shaped like run_pipeline() results (5 news items, both fundamentals
+# schemas, attributions, meta).
+#
+#   python -m ipobot.scripts.bench_records                 # 10k IPO-days
+#   python -m ipobot.scripts.bench_records -n 100000 --symbols 500
+#
+# Reports bytes per IPO-day (tracemalloc) for: full result dicts, the same fields as
+# AnalysisRecord held as a flat dict, and AnalysisRecord; plus microseconds per conversion.
+
+from __future__ import annotations
+
+import argparse, gc, json, random, sys, time, tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from ipobot.model.predict import FEATURES
+from ipobot.records import AnalysisRecord, Fundamentals
+
+
+def synthetic_result(rng: random.Random, sym: str, day: int) -> Dict:
+    ui = {"P/E": round(rng.uniform(8, 90), 2), "Peer P/E": round(rng.uniform(8, 90), 2),
+          "ROE (%)": round(rng.uniform(-5, 40), 2), "D/E": round(rng.uniform(0, 3), 2),
+          "Revenue CAGR (%)": round(rng.uniform(-10, 60), 2), "P/E discount vs peer (%)": round(rng.uniform(-50, 50), 2)}
+    code = {"pe": ui["P/E"], "peer_pe": ui["Peer P/E"], "roe": ui["ROE (%)"], "debt_to_equity": ui["D/E"],
+            "revenue_cagr": ui["Revenue CAGR (%)"]}
+    p = rng.random()
+    return {
+        "symbol": sym,
+        "query": f"{sym} IPO latest news",
+        "sentiment": round(rng.uniform(-1, 1), 4),
+        "fundamentals": dict(ui),
+        "fundamental_details": {"components": {"pe_under_peer": rng.random() * 0.15, "roe": rng.random() * 0.1},
+                                "weights": {"pe": 0.15, "roe": 0.1}, "fundamentals": {**ui, **code}},
+        "probability": p,
+        "expected_gain_pct": round(-10 + 40 * p, 1),
+        "decision": "BUY" if p >= 0.62 else "HOLD" if p >= 0.45 else "AVOID",
+        "attributions": {"base": 0.58, "phi": {f: round(rng.uniform(-0.2, 0.2), 6) for f in FEATURES}},
+        "news_sample": [{"title": f"{sym} IPO day {day}: headline number {i} about the subscription status",
+                         "sent": rng.choice(("positive", "neutral", "negative")),
+                         "url": f"https://news.example.com/{sym.lower()}/{day}/{i}",
+                         "published": f"2025-01-{1 + day % 28:02d}T{i:02d}:00:00Z"} for i in range(5)],
+        "meta": {"thresholds": {"buy_prob": 0.62, "hold_prob": 0.45}, "model_path": "models/demo_model.pkl",
+                 "elapsed_ms": round(rng.uniform(200, 4000), 1)},
+        "partial": False,
+    }
+
+
+def _flat(r: AnalysisRecord) -> Dict:
+    """The record's fields as plain dicts/lists (what holding the same data without records costs)."""
+    return {
+        "symbol": r.symbol, "query": r.query, "ts": r.ts, "sentiment": r.sentiment,
+        "fundamentals": r.fundamentals.to_dict(), "features": list(r.features),
+        "probability": r.probability, "expected_gain_pct": r.expected_gain_pct, "decision": r.decision,
+        "buy_prob": r.buy_prob, "hold_prob": r.hold_prob, "partial": r.partial,
+        "phi": list(r.phi) if r.phi else None, "phi_base": r.phi_base,
+        "news": [n.to_dict() for n in r.news],
+    }
+
+
+def _bytes_per(build: Callable[[], List], n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    held = build()
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del held
+    return size / max(1, n)
+
+
+def _us_per(fn: Callable, items: List) -> float:
+    t0 = time.perf_counter()
+    for it in items:
+        fn(it)
+    return (time.perf_counter() - t0) / max(1, len(items)) * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Record types vs dicts: memory and conversion cost")
+    p.add_argument("-n", type=int, default=10_000, help="IPO-days")
+    p.add_argument("--symbols", type=int, default=200, help="Distinct IPOs among them")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    syms = [f"IPO{i:04d}.NS" for i in range(args.symbols)]
+    # JSON round trip: results as they come back from the history store / a JSONL file
+    make = lambda: [json.loads(json.dumps(synthetic_result(random.Random(args.seed + i), syms[i % len(syms)], i)))
+                    for i in range(args.n)]
+    results = make()[:5000]
+    records = [AnalysisRecord.from_result(r) for r in results]
+
+    out = {
+        "ipo_days": args.n,
+        "bytes_per_ipo_day": {
+            "result_dict": round(_bytes_per(make, args.n)),
+            # built from fresh results so each representation owns its strings
+            "flat_dict": round(_bytes_per(lambda: [_flat(AnalysisRecord.from_result(r)) for r in make()], args.n)),
+            "record": round(_bytes_per(lambda: [AnalysisRecord.from_result(r) for r in make()], args.n)),
+        },
+        "us_per_conversion": {
+            "record_from_result": round(_us_per(AnalysisRecord.from_result, results), 2),
+            "record_to_result": round(_us_per(AnalysisRecord.to_result, records), 2),
+            "fundamentals_from_dict": round(_us_per(lambda r: Fundamentals.from_dict(r["fundamental_details"]),
+                                                    results), 2),
+        },
+    }
+    b = out["bytes_per_ipo_day"]
+    out["record_vs_result_dict"] = round(b["record"] / b["result_dict"], 3)
+    out["record_vs_flat_dict"] = round(b["record"] / b["flat_dict"], 3)
+    print(json.dumps(out, indent=2))
+    print(f"[records] {args.n} IPO-days: {b['result_dict'] * args.n / 2**20:.1f} MB as result dicts, "
+          f"{b['flat_dict'] * args.n / 2**20:.1f} MB as flat dicts, {b['record'] * args.n / 2**20:.1f} MB as records",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
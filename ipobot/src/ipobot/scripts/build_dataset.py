@@ -0,0 +1,56 @@
+# src/ipobot/scripts/build_dataset.py
+# Build the historical IPO training table and train on it.
+#
+#   python -m ipobot.scripts.build_dataset past_ipos.csv                 # extract (resumable) + table + train
+#   python -m ipobot.scripts.build_dataset past_ipos.csv --no-train -w 16
+#   python -m ipobot.scripts.build_dataset --train-only --table datasets/ipo_train.csv
+
+from __future__ import annotations
+
+import argparse, json, pathlib, sys
+from typing import List, Optional
+
+from ipobot.config import ROOT
+from ipobot.model import dataset
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Historical IPO dataset builder + trainer")
+    p.add_argument("input", nargs="?", help="CSV/JSONL: symbol, listing_date, issue_price[, name, query, listing_price]")
+    p.add_argument("--checkpoint", default=str(ROOT / "datasets" / "ipo_rows.jsonl"),
+                   help="Per-row JSONL checkpoint (resume point)")
+    p.add_argument("--table", default=str(ROOT / "datasets" / "ipo_train.csv"), help="Training table output")
+    p.add_argument("--model-out", default=str(ROOT / "models" / "ipo_model.pkl"))
+    p.add_argument("-w", "--workers", type=int, default=8)
+    p.add_argument("--executor", choices=["thread", "process"], default="thread")
+    p.add_argument("--no-resume", action="store_true", help="Start over instead of skipping finished rows")
+    p.add_argument("--news-days", type=int, default=dataset.NEWS_DAYS)
+    p.add_argument("--label-min-return", type=float, default=dataset.LABEL_MIN_RETURN,
+                   help="Listing-day return (%%) above which an IPO is labelled 1")
+    p.add_argument("--keep-no-fundamentals", action="store_true",
+                   help="Also train on rows with no statements dated before listing (features all 0)")
+    p.add_argument("--no-train", action="store_true")
+    p.add_argument("--train-only", action="store_true", help="Skip extraction; train on --table")
+    p.add_argument("--n-jobs", type=int, default=-1, help="Cores for training (-1 = all)")
+    p.add_argument("--n-estimators", type=int, default=300)
+    args = p.parse_args(argv)
+
+    if not args.train_only:
+        if not args.input:
+            p.error("input is required unless --train-only")
+        stats = dataset.build(dataset.read_ipos(args.input), args.checkpoint, workers=args.workers,
+                              executor=args.executor, resume=not args.no_resume,
+                              news_days=args.news_days, label_min_return=args.label_min_return)
+        print(f"[dataset] {json.dumps(stats)}", file=sys.stderr)
+        n = dataset.write_table(args.checkpoint, args.table, keep_unsourced=args.keep_no_fundamentals)
+        print(f"[dataset] {n} labelled rows -> {args.table}", file=sys.stderr)
+
+    if not args.no_train:
+        report = dataset.train(args.table, args.model_out, n_jobs=args.n_jobs, n_estimators=args.n_estimators)
+        print(json.dumps(report, indent=2))
+        print(f"Point config model_path at {pathlib.Path(args.model_out)} to use it.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+# src/ipobot/scripts/check_import_time.py
+# Import-time regression check for the CLI entry point, based on `python -X importtime`.
+#
+#   python -m ipobot.scripts.check_import_time              # exit 1 on regression
+#   python -m ipobot.scripts.check_import_time --max-ms 250 --top 15
+
+from __future__ import annotations
+
+import argparse, os, pathlib, re, subprocess, sys
+from typing import Dict, List, Optional, Tuple
+
+SRC = pathlib.Path(__file__).resolve().parents[2]
+
+# Must stay off the `python -m ipobot` import path (loaded on first use instead)
+FORBIDDEN = ["pandas", "yfinance", "dotenv", "feedparser", "numpy", "sklearn",
+             "torch", "transformers", "bs4", "streamlit"]
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str = "ipobot.__main__") -> Tuple[float, Dict[str, float], List[str]]:
+    """One fresh interpreter: (total ms for `module`, cumulative ms per imported module, top-level names)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, timeout=120)
+    if proc.returncode != 0:
+        raise SystemExit(f"import of {module} failed:\n{proc.stderr[-2000:]}")
+    cumulative: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            cumulative[m.group(4)] = int(m.group(2)) / 1000.0
+    return cumulative.get(module, 0.0), cumulative, list(cumulative)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Fail if the CLI import path gets slow or heavy again")
+    p.add_argument("--module", default="ipobot.__main__")
+    p.add_argument("--max-ms", type=float, default=400.0, help="Budget for the module's cumulative import time")
+    p.add_argument("--runs", type=int, default=3, help="Take the best of N fresh interpreters")
+    p.add_argument("--top", type=int, default=10, help="Show the N slowest imports")
+    args = p.parse_args(argv)
+
+    best = None
+    for _ in range(max(1, args.runs)):
+        total, cum, names = measure(args.module)
+        if best is None or total < best[0]:
+            best = (total, cum, names)
+    total, cum, names = best
+
+    bad = sorted({n.split(".")[0] for n in names if n.split(".")[0] in FORBIDDEN})
+    print(f"{args.module}: {total:.1f} ms cumulative import (best of {args.runs}, budget {args.max_ms:.0f} ms)")
+    for name, ms in sorted(cum.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    ok = True
+    if bad:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(bad)}")
+        ok = False
+    if total > args.max_ms:
+        print(f"FAIL: {total:.1f} ms > {args.max_ms:.0f} ms budget")
+        ok = False
+    if ok:
+        print("OK")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+# src/ipobot/scripts/check_stages.py
+# Regression check for budgeted stages under concurrency: many runs at once, each with a
+# provider that hangs past the budget, must not starve each other's later stages.
+#
+#   python -m ipobot.scripts.check_stages                  # exit 1 on regression
+#   python -m ipobot.scripts.check_stages --runs 32 --budget-ms 300
+#
+# Every simulated run abandons one stuck stage ("news", sleeps --hang-s) at its deadline and
+# then runs a quick stage ("fundamentals") with the budget left. With a process-wide pool,
+# the stuck threads of earlier runs used to hold every worker, so later runs' quick stages
+# timed out without having started. Checks, per run: the quick stage finished, it waited
+# at most --max-wait-ms for a thread, and the run returned within budget + slack.
+
+from __future__ import annotations
+
+import argparse, json, sys, threading, time
+from typing import Dict, List, Optional
+
+
+def _one_run(budget_ms: float, hang_s: float, out: List[Dict]) -> None:
+    from ipobot.deadline import Deadline
+    from ipobot.metrics import stage, trace
+    from ipobot.pipeline import _StagePool, _run_stage
+
+    pool = _StagePool()
+    t0 = time.perf_counter()
+    try:
+        with trace() as tr:
+            dl = Deadline.from_budget(budget_ms)
+            with stage("news"):
+                # stuck provider: gets half the budget, then is abandoned while still running
+                _, hung_out = _run_stage(lambda: time.sleep(hang_s), Deadline.from_budget(budget_ms / 2), pool)
+            with stage("fundamentals"):
+                value, timed_out = _run_stage(lambda: 42, dl, pool)
+            meta = tr.to_meta()
+    finally:
+        pool.close()
+    out.append({
+        "stuck_abandoned": hung_out,
+        "quick_ok": value == 42 and not timed_out,
+        "wait_ms": meta["queue_wait_ms"].get("fundamentals", 0.0),
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+    })
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Fail if concurrent budgeted runs starve each other's stages")
+    p.add_argument("--runs", type=int, default=24, help="Concurrent pipeline runs")
+    p.add_argument("--budget-ms", type=float, default=300.0)
+    p.add_argument("--hang-s", type=float, default=2.0, help="How long the stuck stage keeps its thread")
+    p.add_argument("--max-wait-ms", type=float, default=50.0, help="Allowed wait for a stage thread")
+    p.add_argument("--slack-ms", type=float, default=150.0, help="Allowed overrun of the budget")
+    args = p.parse_args(argv)
+
+    results: List[Dict] = []
+    threads = [threading.Thread(target=_one_run, args=(args.budget_ms, args.hang_s, results))
+               for _ in range(args.runs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    starved = sum(not r["quick_ok"] for r in results)
+    waited = max(r["wait_ms"] for r in results)
+    slowest = max(r["elapsed_ms"] for r in results)
+    report = {"runs": len(results), "quick_stage_starved": starved, "max_queue_wait_ms": waited,
+              "max_elapsed_ms": slowest, "budget_ms": args.budget_ms}
+    print(json.dumps(report, indent=2))
+    bad = (starved or waited > args.max_wait_ms or slowest > args.budget_ms + args.slack_ms
+           or len(results) != args.runs)
+    print(f"[stages] {'FAIL' if bad else 'OK'}: {args.runs} concurrent runs, {starved} starved, "
+          f"max wait {waited:.1f} ms, slowest {slowest:.0f} ms", file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+# src/ipobot/scripts/export_model.py
+# Export a pickled forest to the compiled array format (ipobot.model.forest), check it
+# against sklearn and compare single-row latency and size.
+#
+#   python -m ipobot.scripts.export_model models/demo_model.pkl models/demo_model.npz
+#   python -m ipobot.scripts.export_model models/demo_model.pkl models/demo_model.npz --rows 5000
+#
+# Exit 1 when the exported model's probabilities differ from sklearn's by more than --atol;
+# nothing is written in that case. Point config `model_path` at the .npz to use it.
+# Also builds the model's TreeSHAP attribution table into .cache/explain/ (model/explain.py),
+# so no request ever pays for it; --no-explain skips that.
+
+from __future__ import annotations
+
+import argparse, json, os, pathlib, pickle, sys, time
+from typing import List, Optional
+
+from ipobot.model.forest import check_parity, export
+from ipobot.model.predict import FEATURES
+
+
+def _per_call_us(fn, x, repeat: int) -> float:
+    fn(x)  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(x)
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Flatten a trained forest into NumPy arrays")
+    p.add_argument("src", help="Pickled sklearn forest (train_demo / build_dataset output)")
+    p.add_argument("dst", help="Exported model (.npz)")
+    p.add_argument("--rows", type=int, default=2000, help="Random rows for the parity check")
+    p.add_argument("--atol", type=float, default=1e-9)
+    p.add_argument("--repeat", type=int, default=200, help="Single-row calls per latency measurement")
+    p.add_argument("--no-explain", action="store_true", help="Don't build the attribution table")
+    args = p.parse_args(argv)
+
+    with open(args.src, "rb") as f:
+        model = pickle.load(f)
+    compiled = export(model)
+    try:
+        diff = check_parity(model, compiled, n=args.rows, atol=args.atol)
+    except AssertionError as e:
+        print(f"[export] FAIL: {e}", file=sys.stderr)
+        return 1
+    dst = compiled.save(args.dst)
+
+    row = [[0.2, 0.1, 1.0, 1.0, 0.0, 0.66]] if compiled.n_features == len(FEATURES) else [[0.0] * compiled.n_features]
+    report = {
+        "trees": compiled.n_trees,
+        "nodes": int(len(compiled.feature)),
+        "max_depth": compiled.depth,
+        "parity_max_abs_diff": diff,
+        "sklearn_us_per_row": round(_per_call_us(model.predict_proba, row, args.repeat), 1),
+        "compiled_us_per_row": round(_per_call_us(compiled.predict_proba, row, args.repeat), 1),
+        "pickle_bytes": os.path.getsize(args.src),
+        "exported_bytes": os.path.getsize(dst),
+    }
+    if not args.no_explain:
+        from ipobot.model.explain import explainer_for
+        t0 = time.perf_counter()
+        exp = explainer_for(compiled)  # same content key as the sklearn model and the saved .npz
+        report["explain_table_s"] = round(time.perf_counter() - t0, 2)
+        report["explain_table_bytes"] = exp.nbytes if exp is not None else None
+    print(json.dumps(report, indent=2))
+    print(f"[export] OK -> {pathlib.Path(dst)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())